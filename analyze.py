@@ -0,0 +1,233 @@
+"""Search a batch of positions and write the analysis of each as JSON lines.
+
+Positions are read one per line in the text encoding of `Board.to_fen()`
+(blank lines and lines starting with "#" are skipped) from the files named
+on the command line, or from standard input, or as binary records of
+`Board.to_bytes()` with --binary. Every position is searched with the side
+to move played by a registered search agent (see tournament.AGENTS),
+optionally with another heuristic, to the given depth, node count and/or
+time per position. A node budget replaces the clock (see
+IsolationPlayer), so --nodes and --time cannot be combined.
+
+Positions are spread across worker processes and each result is written
+as soon as it is ready, so the output is not in input order unless
+--ordered is given; the "id" field is the position's index in the input.
+Every line holds:
+
+    {"id": 0, "fen": "...", "move": [2, 3], "score": 1.5,
+     "pv": [[2, 3], [4, 4], ...], "depth": 6, "nodes": 51234, "ms": 812.4}
+
+"score" is the value of the position for the side to move and is null for
+positions decided within the search, which have "result": "win" or
+"loss" instead. Agents without a transposition table or root value (e.g.,
+minimax agents) report a null score and a one-move "pv". A line that
+cannot be parsed is reported with an "error" field.
+
+Examples:
+
+    python analyze.py positions.txt --depth 6 --agent AB_Custom
+    python analyze.py --binary positions.bin --time 500 -o analysis.jsonl
+    cat positions.txt | python analyze.py --nodes 200000 --score \\
+        sample_players:improved_score --processes 4
+"""
+import json
+import math
+import multiprocessing
+import random
+import sys
+import timeit
+
+from collections import namedtuple
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer, IsolationPlayer
+from tournament import AGENTS
+
+# The search settings shared by every position of a batch; `hash_entries`
+# sizes the private transposition table of alpha-beta agents (0 for none)
+Settings = namedtuple("Settings", ["agent", "score", "depth", "nodes",
+                                   "time_limit", "hash_entries"])
+
+DEFAULT_AGENT = "AB_Custom"
+HASH_ENTRIES = 1 << 16
+
+_worker = None
+
+
+def make_searcher(settings):
+    """Construct the agent described by `settings`.
+
+    Raises ValueError for agents that are not depth-first search agents,
+    and for settings with both a node and a time limit, since agents with
+    a node budget never read the clock.
+    """
+    factory = AGENTS[settings.agent]
+    cls = getattr(factory, "func", factory)
+    if not (isinstance(cls, type) and issubclass(cls, IsolationPlayer)):
+        raise ValueError("{} is not a search agent".format(settings.agent))
+    if settings.nodes is not None and settings.time_limit is not None:
+        raise ValueError("a node limit and a time limit cannot be combined")
+    options = {"node_limit": settings.nodes}
+    if settings.score is not None:
+        from tuner import load_score
+        options["score_fn"] = load_score(settings.score)
+    if issubclass(cls, AlphaBetaPlayer):
+        options["depth_limit"] = settings.depth
+    elif settings.depth is not None:
+        options["search_depth"] = settings.depth
+    return factory(**options)
+
+
+def _new_table(entries):
+    from isolation.ttable import EntryTable
+    return EntryTable(bytearray(EntryTable.size_for(entries)), entries)
+
+
+def _init_worker(settings):
+    global _worker
+    _worker = (settings, make_searcher(settings))
+
+
+def analyze(job):
+    """Search one position and return its analysis as a dict.
+
+    Parameters
+    ----------
+    job : (int, str)
+        The index of the position in the input and its text encoding.
+    """
+    index, fen = job
+    settings, agent = _worker
+    result = {"id": index, "fen": fen}
+    try:
+        game = Board.from_fen(fen, agent, "Opponent")
+    except ValueError as e:
+        result["error"] = str(e)
+        return result
+    if game.active_player is not agent:
+        game = Board.from_fen(fen, "Opponent", agent)
+    # a fresh table and move order for every position, so that the result
+    # does not depend on which positions the worker searched before
+    if isinstance(agent, AlphaBetaPlayer) and settings.hash_entries:
+        agent.ttable = _new_table(settings.hash_entries)
+    random.seed(fen)
+
+    start = timeit.default_timer()
+    if settings.time_limit is None:
+        time_left = lambda: float("inf")
+    else:
+        time_left = lambda: settings.time_limit - \
+            1000 * (timeit.default_timer() - start)
+    move = agent.get_move(game, time_left)
+    elapsed = 1000 * (timeit.default_timer() - start)
+
+    score = getattr(agent, "best_value", None)
+    if move == (-1, -1):
+        move, pv, score = None, [], game.utility(agent)
+    elif isinstance(agent, AlphaBetaPlayer):
+        pv = agent.principal_variation(game, move,
+                                       max(1, agent.completed_depth))
+    else:
+        pv = [move]
+    if score is not None and math.isinf(score):
+        result["result"] = "win" if score > 0 else "loss"
+        score = None
+    result.update({"move": move, "score": score, "pv": pv,
+                   "depth": agent.completed_depth, "nodes": agent.nodes,
+                   "ms": round(elapsed, 1)})
+    return result
+
+
+def read_positions(streams, binary=False):
+    """Yield the text encoding of every position in the open `streams`."""
+    for stream in streams:
+        if binary:
+            from isolation.serialization import iter_boards
+            data = stream.buffer.read() if hasattr(stream, "buffer") \
+                else stream.read()
+            for board in iter_boards(data, "Player1", "Player2"):
+                yield board.to_fen()
+            continue
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def run(positions, settings, processes=None, ordered=False):
+    """Analyze an iterable of position strings and yield one dict per
+    position as its search finishes (or in input order, if `ordered`).
+
+    Parameters
+    ----------
+    processes : int (optional)
+        The number of worker processes (default: one per core); 0 searches
+        in this process.
+    """
+    jobs = enumerate(positions)
+    if processes == 0:
+        _init_worker(settings)
+        for job in jobs:
+            yield analyze(job)
+        return
+    with multiprocessing.Pool(processes, _init_worker, (settings,)) as pool:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        for result in mapper(analyze, jobs):
+            yield result
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="position files ('-' for standard input)")
+    parser.add_argument("--binary", action="store_true",
+                        help="inputs hold Board.to_bytes() records")
+    parser.add_argument("--agent", default=DEFAULT_AGENT,
+                        choices=[name for name in AGENTS
+                                 if name.startswith(("AB_", "MM_"))])
+    parser.add_argument("--score", default=None,
+                        help="heuristic as module:function (default: the "
+                             "agent's own)")
+    parser.add_argument("--depth", type=int, default=None)
+    parser.add_argument("--nodes", type=int, default=None,
+                        help="nodes per position (not with --time)")
+    parser.add_argument("--time", type=float, default=None,
+                        help="milliseconds per position (not with --nodes)")
+    parser.add_argument("--hash", type=int, default=HASH_ENTRIES,
+                        help="transposition table entries (0 for none)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--ordered", action="store_true",
+                        help="write results in input order")
+    parser.add_argument("-o", "--output", default=None,
+                        help="output file (default: standard output)")
+    args = parser.parse_args()
+    if args.depth is None and args.nodes is None and args.time is None:
+        parser.error("give at least one of --depth, --nodes and --time")
+    if args.nodes is not None and args.time is not None:
+        parser.error("--nodes and --time cannot be combined")
+
+    settings = Settings(args.agent, args.score, args.depth, args.nodes,
+                        args.time, args.hash)
+    make_searcher(settings)  # fail early on a bad agent or heuristic
+    mode = "rb" if args.binary else "r"
+    streams = [(sys.stdin if path == "-" else open(path, mode))
+               for path in args.inputs]
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for result in run(read_positions(streams, args.binary), settings,
+                          args.processes, args.ordered):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        for stream in streams:
+            if stream is not sys.stdin:
+                stream.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Compare one event loop driving many games with Board.play_async against a
+thread per game with Board.play, for agents that spend each move waiting
+on a remote agent server.
+
+A stub agent server on localhost answers every move request with a random
+legal move after --delay ms. The async agents await the reply on one
+event loop; the blocking agents wait on a socket in their game's thread.
+The table reports the wall time, games per second and peak threads.
+
+Example:
+
+    python benchmarks/async_play.py --games 2000 --delay 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from isolation import Board  # noqa: E402
+
+
+def request_line(game):
+    return (json.dumps(game.get_legal_moves()) + "\n").encode()
+
+
+def parse_reply(line):
+    reply = json.loads(line.decode())
+    return tuple(reply) if reply else (-1, -1)
+
+
+class AsyncRemoteAgent(object):
+    """Ask the stub server for each move over one persistent connection."""
+
+    def __init__(self, port):
+        self.port = port
+        self._streams = None
+
+    async def get_move(self, game, time_left):
+        if self._streams is None:
+            self._streams = await asyncio.open_connection("127.0.0.1",
+                                                          self.port)
+        reader, writer = self._streams
+        writer.write(request_line(game))
+        return parse_reply(await reader.readline())
+
+    def close(self):
+        if self._streams is not None:
+            self._streams[1].close()
+
+
+class BlockingRemoteAgent(object):
+    """The same agent with a blocking socket, for Board.play."""
+
+    def __init__(self, port):
+        self._sock = socket.create_connection(("127.0.0.1", port))
+        self._file = self._sock.makefile("rwb")
+
+    def get_move(self, game, time_left):
+        self._file.write(request_line(game))
+        self._file.flush()
+        return parse_reply(self._file.readline())
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+async def serve_stub(delay, port, ready, stop):
+    async def handle(reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            legal = json.loads(line.decode())
+            await asyncio.sleep(delay / 1000.)
+            move = random.choice(legal) if legal else None
+            writer.write((json.dumps(move) + "\n").encode())
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=4096)
+    port.append(server.sockets[0].getsockname()[1])
+    ready.set()
+    while not stop.is_set():
+        await asyncio.sleep(0.05)
+    server.close()
+
+
+def run_async(port, games):
+    async def play_all():
+        agents = [(AsyncRemoteAgent(port), AsyncRemoteAgent(port))
+                  for _ in range(games)]
+        boards = [Board(a, b) for a, b in agents]
+        results = await asyncio.gather(*(board.play_async(time_limit=None)
+                                         for board in boards))
+        for pair in agents:
+            for agent in pair:
+                agent.close()
+        return results
+
+    return asyncio.run(play_all()), 1
+
+
+def run_threads(port, games):
+    results = []
+
+    def play():
+        agents = (BlockingRemoteAgent(port), BlockingRemoteAgent(port))
+        results.append(Board(*agents).play(time_limit=None))
+        for agent in agents:
+            agent.close()
+
+    threads = [threading.Thread(target=play) for _ in range(games)]
+    for thread in threads:
+        thread.start()
+    peak = threading.active_count()
+    for thread in threads:
+        thread.join()
+    return results, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=5.,
+                        help="milliseconds the stub server waits per move")
+    args = parser.parse_args()
+
+    # the stub server runs its own event loop in a background thread
+    bound, ready, stop = [], threading.Event(), threading.Event()
+    server = threading.Thread(
+        target=lambda: asyncio.run(serve_stub(args.delay, bound, ready,
+                                              stop)), daemon=True)
+    server.start()
+    ready.wait()
+    port = bound[0]
+
+    print("{:<22}{:>10}{:>12}{:>10}".format("driver", "seconds", "games/s",
+                                           "threads"))
+    for name, run in [("play_async, 1 loop", run_async),
+                      ("play, thread/game", run_threads)]:
+        start = timeit.default_timer()
+        results, threads = run(port, args.games)
+        elapsed = timeit.default_timer() - start
+        print("{:<22}{:>10.2f}{:>12.1f}{:>10}".format(
+            name, elapsed, len(results) / elapsed, threads))
+    stop.set()
+
+
+if __name__ == "__main__":
+    main()
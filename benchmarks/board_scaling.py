@@ -0,0 +1,120 @@
+"""Measure how search throughput and per-node memory scale with board size.
+
+For each square board size the benchmark plays a few random openings, then
+runs a fixed-depth minimax search with `improved_score` at the leaves from
+the resulting positions, counting every board created by `forecast_move`
+as one node. Memory per node is the traced allocation of a set of
+forecasted boards divided by their number. Results are printed as a table
+with bar charts, and optionally written as CSV.
+
+Example:
+
+    python benchmarks/board_scaling.py --sizes 7 11 15 21 31 --csv out.csv
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from isolation import Board  # noqa: E402
+from sample_players import improved_score  # noqa: E402
+
+BAR_WIDTH = 30
+
+
+class _Player(object):
+    """Placeholder player object for search positions."""
+
+
+def search(game, depth, player, counter):
+    """Plain fixed-depth minimax, counting forecasted nodes in counter[0]."""
+    if depth == 0:
+        return improved_score(game, player)
+    moves = game.get_legal_moves()
+    if not moves:
+        return game.utility(player)
+    values = []
+    for move in moves:
+        counter[0] += 1
+        values.append(search(game.forecast_move(move), depth - 1, player,
+                             counter))
+    return max(values) if game.active_player is player else min(values)
+
+
+def sample_positions(size, count, fill, seed):
+    """Return positions with about `fill` of the cells already blocked."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = Board(_Player(), _Player(), width=size, height=size)
+        for _ in range(max(2, int(fill * size * size))):
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        if game.get_legal_moves():
+            positions.append(game)
+    return positions
+
+
+def measure(size, depth=3, positions=5, fill=0.2, seed=0):
+    """Return (nodes per second, bytes per node) for one board size."""
+    games = sample_positions(size, positions, fill, seed)
+
+    counter = [0]
+    start = timeit.default_timer()
+    for game in games:
+        search(game, depth, game.active_player, counter)
+    elapsed = timeit.default_timer() - start
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [game.forecast_move(move) for game in games
+             for move in game.get_legal_moves()]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding the boards is not part of a node
+    per_node = (after - before - sys.getsizeof(nodes)) / max(1, len(nodes))
+    return counter[0] / elapsed, per_node
+
+
+def bar(value, largest):
+    return "#" * max(1, int(round(BAR_WIDTH * value / largest)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[7, 11, 15, 21, 27, 31])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--positions", type=int, default=5)
+    parser.add_argument("--fill", type=float, default=0.2,
+                        help="fraction of cells blocked before searching")
+    parser.add_argument("--csv", default=None, help="write results as CSV")
+    args = parser.parse_args()
+
+    rows = [(size,) + measure(size, args.depth, args.positions, args.fill)
+            for size in args.sizes]
+
+    top_rate = max(rate for _, rate, _ in rows)
+    top_mem = max(mem for _, _, mem in rows)
+    print("{:>7} {:>12}  {:<{w}} {:>10}  {}".format(
+        "size", "nodes/sec", "", "bytes/node", "", w=BAR_WIDTH))
+    for size, rate, mem in rows:
+        print("{:>7} {:>12,.0f}  {:<{w}} {:>10,.0f}  {}".format(
+            "{0}x{0}".format(size), rate, bar(rate, top_rate), mem,
+            bar(mem, top_mem), w=BAR_WIDTH))
+
+    if args.csv:
+        with open(args.csv, "w") as f:
+            f.write("size,nodes_per_sec,bytes_per_node\n")
+            for size, rate, mem in rows:
+                f.write("{},{:.1f},{:.1f}\n".format(size, rate, mem))
+
+
+if __name__ == "__main__":
+    main()
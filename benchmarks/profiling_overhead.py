@@ -0,0 +1,73 @@
+"""Measure the cost of profiling games with isolation.profiling.Profiler.
+
+The same seeded games between node-limited alpha-beta agents are played
+without a profiler, with the board and agent timers, and with only the
+get_move() timers (`timers=False`), each with and without the stack
+sampler. The table reports games per second and the slowdown relative to
+the unprofiled games.
+
+Example:
+
+    python benchmarks/profiling_overhead.py --games 20 --nodes 2000
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from isolation import Board  # noqa: E402
+from isolation.profiling import Profiler  # noqa: E402
+from game_agent import AlphaBetaPlayer  # noqa: E402
+from sample_players import improved_score  # noqa: E402
+
+
+def play_games(games, nodes, profiler=None):
+    """Play the seeded games and return the elapsed seconds."""
+    start = timeit.default_timer()
+    for seed in range(games):
+        random.seed(seed)
+        players = [AlphaBetaPlayer(score_fn=improved_score, node_limit=nodes)
+                   for _ in range(2)]
+        game = Board(*players)
+        if profiler is None:
+            game.play(time_limit=None)
+        else:
+            with profiler:
+                game.play(time_limit=None, profiler=profiler)
+    return timeit.default_timer() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--nodes", type=int, default=1000,
+                        help="nodes searched per move")
+    parser.add_argument("--interval", type=float, default=0.005,
+                        help="stack sampling interval in seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    configs = [("off", lambda: None),
+               ("timers", lambda: Profiler()),
+               ("timers + sampler",
+                lambda: Profiler(sample_interval=args.interval)),
+               ("get_move only", lambda: Profiler(timers=False)),
+               ("get_move + sampler",
+                lambda: Profiler(sample_interval=args.interval,
+                                 timers=False))]
+    print("{:<18}{:>10}{:>10}{:>10}".format("profiling", "seconds",
+                                             "games/s", "slowdown"))
+    base = None
+    for name, make in configs:
+        elapsed = min(play_games(args.games, args.nodes, make())
+                      for _ in range(args.repeat))
+        base = base or elapsed
+        print("{:<18}{:>10.2f}{:>10.2f}{:>9.2f}x".format(
+            name, elapsed, args.games / elapsed, elapsed / base))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure the nodes saved by the selective search options of AlphaBetaPlayer.
+
+Each configuration searches the same sample positions with iterative
+deepening to a fixed depth (no clock), and the table reports the nodes
+visited relative to the full-width search, how often the chosen move
+agrees with it, the number of reductions and how many of them had to be
+searched again, and the number of futility cut-offs with the nodes they
+skipped.
+
+Example:
+
+    python benchmarks/selective_search.py --depth 6 --positions 30 --margin 2
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from isolation import Board  # noqa: E402
+from game_agent import AlphaBetaPlayer, custom_score  # noqa: E402
+
+
+def sample_positions(count, seed, width=7, height=7):
+    """Return positions after 4 to 12 random plies with moves left."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = Board("Player1", "Player2", width=width, height=height)
+        for _ in range(rng.randint(4, 12)):
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        if game.get_legal_moves():
+            positions.append(game.to_bytes())
+    return positions
+
+
+def run(positions, depth, seed, **options):
+    """Search every position; return (nodes, seconds, moves, stats)."""
+    forever = lambda: float("inf")
+    nodes, moves = 0, []
+    player = AlphaBetaPlayer(score_fn=custom_score, depth_limit=depth,
+                             **options)
+    start = timeit.default_timer()
+    for data in positions:
+        random.seed(seed)  # the same legal move order for every option
+        game = Board.from_bytes(data, player, "Opponent")
+        if game.active_player is not player:
+            game = Board.from_bytes(data, "Opponent", player)
+        moves.append(player.get_move(game, forever))
+        nodes += player.nodes
+    return nodes, timeit.default_timer() - start, moves, player.search_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--positions", type=int, default=20)
+    parser.add_argument("--margin", type=float, default=2.,
+                        help="futility margin in score units")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    positions = sample_positions(args.positions, args.seed)
+    configs = [
+        ("full width", {}),
+        ("LMR", {"late_move_reduction": True}),
+        ("futility", {"futility_margin": args.margin}),
+        ("LMR + futility", {"late_move_reduction": True,
+                            "futility_margin": args.margin}),
+    ]
+    print("{:<16}{:>10}{:>8}{:>8}{:>8}{:>12}{:>10}{:>10}".format(
+        "search", "nodes", "saved", "secs", "agree", "reductions",
+        "re-search", "futile"))
+    base_nodes = base_moves = None
+    for name, options in configs:
+        nodes, secs, moves, stats = run(positions, args.depth, args.seed,
+                                        **options)
+        if base_nodes is None:
+            base_nodes, base_moves = nodes, moves
+        agree = sum(a == b for a, b in zip(moves, base_moves)) / len(moves)
+        re_search = stats["re_searches"] / max(1, stats["reductions"])
+        print("{:<16}{:>10}{:>7.0%}{:>8.2f}{:>7.0%}{:>12}{:>9.0%}{:>10}".format(
+            name, nodes, 1 - nodes / base_nodes, secs, agree,
+            stats["reductions"], re_search,
+            "{}/{}".format(stats["futility_prunes"], stats["futility_nodes"])))
+
+
+if __name__ == "__main__":
+    main()
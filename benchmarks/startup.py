@@ -0,0 +1,103 @@
+"""Measure how long a fresh interpreter takes to import the project modules
+and how long a spawned match worker takes to become ready.
+
+Each import is timed in a new `python -c "import <module>"` process, and
+the time of a bare interpreter is reported alongside as the baseline. The
+worker measurement starts a process with the "spawn" method (as on macOS
+and Windows) that imports the tournament registry and constructs an agent,
+which is the start-up cost of every short-lived match worker. With
+--importtime the modules that took longest to execute during each import
+are listed, as reported by `python -X importtime`.
+
+Example:
+
+    python benchmarks/startup.py --runs 20 --importtime 5
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODULES = ["isolation", "game_agent", "tournament", "league"]
+
+
+def time_command(code, runs):
+    """Return the median wall time in ms of `python -c code`."""
+    times = []
+    for _ in range(runs):
+        start = timeit.default_timer()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        times.append(1000 * (timeit.default_timer() - start))
+    return statistics.median(times)
+
+
+def slowest_imports(module, count):
+    """Return the `count` (self us, name) pairs of the modules that took
+    longest to execute during a fresh `import module`.
+    """
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                          "import " + module], cwd=ROOT, check=True,
+                         stderr=subprocess.PIPE, universal_newlines=True).stderr
+    rows = []
+    for line in out.splitlines()[1:]:
+        own, _, name = line.split(":", 1)[1].split("|")
+        rows.append((int(own), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def _ready_worker(conn):
+    from tournament import make_agent
+    make_agent("AB_Improved")
+    conn.send(True)
+
+
+def time_worker(runs):
+    """Return the median ms from starting a spawned worker until it has
+    built an agent.
+    """
+    context = multiprocessing.get_context("spawn")
+    times = []
+    for _ in range(runs):
+        parent, child = context.Pipe()
+        start = timeit.default_timer()
+        process = context.Process(target=_ready_worker, args=(child,))
+        process.start()
+        parent.recv()
+        times.append(1000 * (timeit.default_timer() - start))
+        process.join()
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="list the N slowest imports of each module")
+    args = parser.parse_args()
+
+    baseline = time_command("pass", args.runs)
+    print("{:<24}{:>10}{:>12}".format("command", "ms", "over bare"))
+    print("{:<24}{:>10.1f}{:>12}".format("python -c pass", baseline, "-"))
+    for module in args.modules:
+        elapsed = time_command("import " + module, args.runs)
+        print("{:<24}{:>10.1f}{:>12.1f}".format(
+            "import " + module, elapsed, elapsed - baseline))
+    elapsed = time_worker(args.runs)
+    print("{:<24}{:>10.1f}{:>12.1f}".format("spawned worker ready", elapsed,
+                                             elapsed - baseline))
+
+    for module in args.modules if args.importtime else []:
+        print("\nslowest imports of {}:".format(module))
+        for own, name in slowest_imports(module, args.importtime):
+            print("  {:>8.1f} ms  {}".format(own / 1000., name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Measure how close agents come to the move time limit and recommend the
+smallest safe TIMER_THRESHOLD for each agent on this machine.
+
+Every agent searches the same sample positions under the tournament clock,
+and the time_left() callable it is given remembers its last reading. For
+every move the report records:
+
+- the time the move took, and the time left when get_move() returns (a
+  negative value forfeits the game in a tournament)
+- whether the search was cut off, i.e., the agent's last reading of the
+  clock was below its TIMER_THRESHOLD and raised SearchTimeout
+- for cut-off searches, the exit cost: the milliseconds from that final
+  reading until get_move() returned, spent unwinding the search
+
+A cut-off search returns with `TIMER_THRESHOLD - spent` milliseconds left,
+where `spent` covers the exit cost and how far below the threshold the
+final reading landed (the work between two readings of the clock). The
+recommended threshold is the largest `spent` seen, times a safety factor.
+Thresholds depend on the speed and load of the machine, so run the tool
+on the machine (and under the load) the tournament will use.
+
+Example:
+
+    python calibrate.py --agents AB_Improved AB_Custom --positions 100 \\
+        --threshold 1 --json calibration.json
+"""
+import json
+import math
+import platform
+import random
+import sys
+import timeit
+
+from collections import namedtuple
+
+from isolation import Board
+from tournament import AGENTS, TIME_LIMIT
+
+# The measurements of one call of get_move(); `exit_cost` and `spent` are
+# None unless the search was cut off by the clock
+Sample = namedtuple("Sample", ["elapsed", "time_left", "cut_off",
+                               "exit_cost", "spent"])
+
+SAFETY = 1.5  # factor applied to the largest time spent past the threshold
+
+
+def _millis():
+    return 1000 * timeit.default_timer()
+
+
+class Clock(object):
+    """The time_left() callable passed to an agent, as in `Board.play()`,
+    that also remembers when it was last read.
+
+    Parameters
+    ----------
+    time_limit : numeric
+        The time limit of the move in milliseconds.
+
+    Attributes
+    ----------
+    start : float
+        The timestamp (in milliseconds) when the clock was started.
+
+    last : float
+        The timestamp of the most recent reading, or None.
+    """
+
+    def __init__(self, time_limit):
+        self.time_limit = time_limit
+        self.last = None
+        self.start = _millis()
+
+    def __call__(self):
+        self.last = _millis()
+        return self.time_limit - (self.last - self.start)
+
+    def left(self, timestamp):
+        """Return the time left at `timestamp`."""
+        return self.time_limit - (timestamp - self.start)
+
+
+def sample_positions(count, seed=0, width=7, height=7, plies=(2, 30)):
+    """Return `count` positions (as `Board.to_bytes()`) reached by random
+    play with a number of plies drawn uniformly from the range `plies`,
+    where the side to move has at least one legal move.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = Board("Player1", "Player2", width=width, height=height)
+        for _ in range(rng.randint(*plies)):
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        if game.get_legal_moves():
+            positions.append(game.to_bytes())
+    return positions
+
+
+def measure_move(agent, game, time_limit):
+    """Call `agent.get_move()` for `game` under a clock of `time_limit`
+    milliseconds and return a Sample.
+    """
+    threshold = getattr(agent, "TIMER_THRESHOLD", None)
+    clock = Clock(time_limit)
+    agent.get_move(game, clock)
+    end = _millis()
+    elapsed, time_left = end - clock.start, clock.left(end)
+    if threshold is None or clock.last is None or \
+            clock.left(clock.last) >= threshold:
+        return Sample(elapsed, time_left, False, None, None)
+    return Sample(elapsed, time_left, True, end - clock.last,
+                  threshold - time_left)
+
+
+def measure(agent, positions, time_limit=TIME_LIMIT, seed=0):
+    """Search every position with `agent` to move and return the list of
+    Samples. One unmeasured move is made first so that import and cache
+    warm-up costs are not counted.
+    """
+    samples = []
+    for i, data in enumerate(positions[:1] + positions):
+        random.seed(seed)
+        game = Board.from_bytes(data, agent, "Opponent")
+        if game.active_player is not agent:
+            game = Board.from_bytes(data, "Opponent", agent)
+        sample = measure_move(agent, game, time_limit)
+        if i:
+            samples.append(sample)
+    return samples
+
+
+def percentile(values, q):
+    """Return the `q`-th percentile (0 to 100) of `values` by the nearest
+    rank method, or None if `values` is empty.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(math.ceil(q / 100. * len(ordered))))
+    return ordered[rank - 1]
+
+
+def recommend(samples, safety=SAFETY):
+    """Return the recommended TIMER_THRESHOLD (in milliseconds, rounded up
+    to a tenth) for the agent measured by `samples`, or None if none of
+    its searches was cut off by the clock.
+    """
+    spent = [s.spent for s in samples if s.cut_off]
+    if not spent:
+        return None
+    return math.ceil(10 * safety * max(spent)) / 10.
+
+
+def summarize(samples, threshold=None, safety=SAFETY):
+    """Return a dict of statistics for the Samples of one agent: the time
+    used per move ("used_"), the exit cost of cut-off searches ("exit_")
+    and the smallest time left at return ("left_min").
+    """
+    used = [s.elapsed for s in samples]
+    exits = [s.exit_cost for s in samples if s.cut_off]
+    return {
+        "moves": len(samples),
+        "cut_off": len(exits),
+        "timeouts": sum(1 for s in samples if s.time_left < 0),
+        "used_p50": percentile(used, 50),
+        "used_p99": percentile(used, 99),
+        "used_max": max(used) if used else None,
+        "left_min": min(s.time_left for s in samples) if samples else None,
+        "exit_p50": percentile(exits, 50),
+        "exit_p99": percentile(exits, 99),
+        "exit_max": max(exits) if exits else None,
+        "threshold": threshold,
+        "recommended": recommend(samples, safety),
+    }
+
+
+def machine():
+    """Describe the machine the measurements were taken on."""
+    return {"host": platform.node(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "python": sys.version.split()[0]}
+
+
+def calibrate(names, positions, time_limit=TIME_LIMIT, threshold=None,
+              safety=SAFETY, seed=0):
+    """Measure the registered agents `names` on `positions` and return a
+    report with the machine description and a summary for every agent.
+
+    If `threshold` is given, it replaces the TIMER_THRESHOLD of the agents
+    that have one, e.g., to measure a thinner margin than the default.
+    """
+    report = {"machine": machine(), "time_limit": time_limit,
+              "positions": len(positions), "safety": safety, "agents": {}}
+    for name in names:
+        agent = AGENTS[name]()
+        if threshold is not None and hasattr(agent, "TIMER_THRESHOLD"):
+            agent.TIMER_THRESHOLD = threshold
+        samples = measure(agent, positions, time_limit, seed)
+        report["agents"][name] = summarize(
+            samples, getattr(agent, "TIMER_THRESHOLD", None), safety)
+    return report
+
+
+def print_report(report):
+    columns = ["moves", "cut_off", "timeouts", "used_p50", "used_p99",
+               "used_max", "left_min", "exit_p50", "exit_p99", "exit_max",
+               "threshold", "recommended"]
+    header = ["agent", "moves", "cut", "t/o", "used p50", "p99", "max",
+              "left", "exit p50", "p99", "max", "thresh", "advice"]
+    widths = [14, 7, 6, 5, 10, 8, 8, 8, 10, 8, 8, 8, 8]
+
+    def fmt(value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return "{:.2f}".format(value)
+        return str(value)
+
+    print("{host} ({processor}, Python {python})".format(**report["machine"]))
+    print("{} positions, {} ms per move, all times in ms\n".format(
+        report["positions"], report["time_limit"]))
+    print("".join("{:<{}}".format(h, w) if i == 0 else "{:>{}}".format(h, w)
+                  for i, (h, w) in enumerate(zip(header, widths))))
+    for name, stats in report["agents"].items():
+        cells = [name] + [fmt(stats[c]) for c in columns]
+        print("".join("{:<{}}".format(v, w) if i == 0 else
+                      "{:>{}}".format(v, w)
+                      for i, (v, w) in enumerate(zip(cells, widths))))
+    print("\nused: time per move; left: least time left at return\n"
+          "exit: ms from the final clock read to return\n"
+          "advice: {} x the largest time spent past the threshold".format(
+              report["safety"]))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--agents", nargs="+",
+                        default=[name for name in AGENTS
+                                 if name.startswith("AB_")],
+                        choices=list(AGENTS), metavar="AGENT",
+                        help="registered agents (default: the AB_ agents)")
+    parser.add_argument("--positions", type=int, default=50)
+    parser.add_argument("--time-limit", type=float, default=TIME_LIMIT,
+                        help="milliseconds per move")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="TIMER_THRESHOLD to measure with (default: "
+                             "each agent's own)")
+    parser.add_argument("--safety", type=float, default=SAFETY)
+    parser.add_argument("--size", type=int, nargs=2, default=(7, 7),
+                        metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None,
+                        help="also write the report to this file")
+    args = parser.parse_args()
+
+    positions = sample_positions(args.positions, args.seed, *args.size)
+    report = calibrate(args.agents, positions, args.time_limit,
+                       args.threshold, args.safety, args.seed)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
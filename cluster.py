@@ -0,0 +1,479 @@
+"""Play a tournament on many machines: a coordinator hands out chunks of
+match jobs to workers that connect to it over TCP.
+
+The coordinator holds the whole schedule (agents, opening and board size
+of every game) and splits it into chunks. Workers on any host connect,
+pull one chunk at a time, play its games (optionally on a local process
+pool) and send back one compact row per game. The protocol is
+newline-delimited JSON, one request and one reply at a time:
+
+    {"op": "hello", "worker": "rack3-4121"}       -> {"type": "ok"}
+    {"op": "pull"}
+        -> {"type": "chunk", "chunk": 7, "jobs": [{"id": 56,
+            "player_1": "AB_Custom", "player_2": "Random", "opening":
+            [[3, 3], [2, 1]], "width": 7, "height": 7, "time_limit": 150},
+            ...]}
+        or {"type": "wait", "retry": 1.0} while the remaining chunks are
+           leased to other workers
+        or {"type": "done"} once every game has a result
+    {"op": "results", "chunk": 7, "results": [[56, 1, "forfeit", 23], ...]}
+        (job id, winning seat, termination, plies)   -> {"type": "ok"}
+        Rows that do not match this form, or name a job the coordinator
+        did not schedule, are rejected and counted in the reply, e.g.,
+        {"type": "ok", "rejected": 2}; games of the chunk that are still
+        missing a result are handed out again.
+    {"op": "status"}                              -> {"type": "status", ...}
+
+A chunk is leased to the worker that pulled it. If the worker disconnects,
+or does not report within the lease timeout (e.g., its host hangs), the
+chunk goes back to the queue and another worker plays the games that are
+still missing. Results are keyed by job id, so a late report of a
+reissued chunk is counted as a duplicate and ignored.
+
+Example, with the coordinator on one host and a worker on every host:
+
+    python cluster.py coordinate --host 0.0.0.0 --matches 20 \\
+        --results games.jsonl
+    python cluster.py work --host coordinator.local --processes 8
+
+or everything on one machine with `python cluster.py local --workers 4`.
+The results file holds one league-style record per game.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import time
+
+from collections import deque, OrderedDict, defaultdict
+
+from isolation import Board
+from tournament import AGENTS, TIME_LIMIT, NUM_MATCHES
+
+DEFAULT_PORT = 8766
+
+TEST_AGENTS = ["AB_Improved", "AB_Custom", "AB_Custom_2", "AB_Custom_3"]
+CPU_AGENTS = ["Random", "MM_Open", "MM_Center", "MM_Improved", "AB_Open",
+              "AB_Center", "AB_Improved"]
+
+# Agents are constructed once per seat in each worker process and reused
+_agent_cache = {}
+
+
+def _get_agent(name, seat):
+    if (name, seat) not in _agent_cache:
+        _agent_cache[(name, seat)] = AGENTS[name]()
+    return _agent_cache[(name, seat)]
+
+
+def play_job(job):
+    """Play one match job and return its result row (job id, winning
+    seat, termination, plies).
+    """
+    player_1 = _get_agent(job["player_1"], 0)
+    player_2 = _get_agent(job["player_2"], 1)
+    game = Board(player_1, player_2, width=job["width"], height=job["height"])
+    for move in job["opening"]:
+        game.apply_move(tuple(move))
+    winner, history, termination = game.play(time_limit=job["time_limit"])
+    return [job["id"], 1 if winner is player_1 else 2, termination,
+            len(history)]
+
+
+def tournament_jobs(test_agents, cpu_agents, num_matches, openings=None,
+                    time_limit=TIME_LIMIT):
+    """Return the jobs of a tournament: every test agent plays every cpu
+    agent `num_matches` times from each opening with either color. The
+    openings are `num_matches` random two-move openings shared by all
+    pairings, or the first `num_matches` of a list of Openings.
+    """
+    from league import random_opening
+
+    if openings:
+        starts = [(o.width, o.height, o.moves)
+                  for o in (openings * num_matches)[:num_matches]]
+    else:
+        starts = [(7, 7, [list(m) for m in random_opening()])
+                  for _ in range(num_matches)]
+    jobs = []
+    for cpu in cpu_agents:
+        for width, height, moves in starts:
+            for test in test_agents:
+                for first, second in [(cpu, test), (test, cpu)]:
+                    jobs.append({"id": len(jobs), "player_1": first,
+                                 "player_2": second, "opening": moves,
+                                 "width": width, "height": height,
+                                 "time_limit": time_limit})
+    return jobs
+
+
+class Coordinator(object):
+    """Lease chunks of match jobs to workers and collect their results.
+
+    Parameters
+    ----------
+    jobs : list<dict>
+        Match jobs with unique "id" fields (see tournament_jobs()).
+
+    chunk_size : int (optional)
+        The number of jobs handed out per pull.
+
+    lease_timeout : float (optional)
+        Seconds a worker may hold a chunk before it is handed out again.
+
+    retry_interval : float (optional)
+        Seconds an idle worker waits before pulling again.
+
+    Attributes
+    ----------
+    results : OrderedDict
+        Maps job ids to league-style game records, in order of arrival.
+    """
+
+    def __init__(self, jobs, chunk_size=8, lease_timeout=600.,
+                 retry_interval=1.):
+        self.jobs = OrderedDict((job["id"], job) for job in jobs)
+        self.lease_timeout = lease_timeout
+        self.retry_interval = retry_interval
+        ids = list(self.jobs)
+        self._chunks = [ids[i:i + chunk_size]
+                        for i in range(0, len(ids), chunk_size)]
+        self._ready = deque(range(len(self._chunks)))
+        self._leases = {}       # chunk -> (connection token, deadline)
+        self._tokens = iter(range(1, 1 << 62))
+        self.results = OrderedDict()
+        self.metrics = {"connected": 0, "chunks_sent": 0, "reissued": 0,
+                        "lost_workers": 0, "duplicates": 0, "rejected": 0}
+        self._finished = None
+        self._server = None
+        self._handlers = {}     # writer -> task of each connection
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Begin listening; returns the bound port."""
+        self._finished = asyncio.Event()
+        if len(self.results) == len(self.jobs):
+            self._finished.set()
+        self._server = await asyncio.start_server(self._handle_worker,
+                                                  host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def wait(self):
+        """Return the results once every job has one."""
+        await self._finished.wait()
+        return self.results
+
+    async def close(self):
+        """Stop listening and drop the workers still connected."""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._handlers):
+                writer.close()
+            await asyncio.gather(*self._handlers.values(),
+                                 return_exceptions=True)
+            await self._server.wait_closed()
+
+    def snapshot(self):
+        stats = dict(self.metrics)
+        stats.update(jobs=len(self.jobs), completed=len(self.results),
+                     chunks=len(self._chunks), leased=len(self._leases),
+                     ready=len(self._ready))
+        return stats
+
+    def _complete(self, chunk):
+        return all(job_id in self.results for job_id in self._chunks[chunk])
+
+    def _reclaim_expired(self):
+        now = time.monotonic()
+        for chunk, (_, deadline) in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[chunk]
+                if not self._complete(chunk):
+                    self._ready.append(chunk)
+                    self.metrics["reissued"] += 1
+
+    def _next_chunk(self, token, leased):
+        if self._finished.is_set():
+            return {"type": "done"}
+        if not self._ready:
+            self._reclaim_expired()
+        while self._ready:
+            chunk = self._ready.popleft()
+            if self._complete(chunk):
+                continue
+            self._leases[chunk] = (token,
+                                   time.monotonic() + self.lease_timeout)
+            leased.add(chunk)
+            self.metrics["chunks_sent"] += 1
+            return {"type": "chunk", "chunk": chunk,
+                    "jobs": [self.jobs[job_id] for job_id in
+                             self._chunks[chunk]
+                             if job_id not in self.results]}
+        return {"type": "wait", "retry": self.retry_interval}
+
+    def _valid_row(self, row):
+        """Check a result row from a worker before it is trusted."""
+        if not isinstance(row, list) or len(row) != 4:
+            return False
+        job_id, seat, termination, plies = row
+        return type(job_id) is int and job_id in self.jobs and \
+            type(seat) is int and seat in (1, 2) and \
+            isinstance(termination, str) and \
+            type(plies) is int and plies >= 0
+
+    def _record(self, rows):
+        """Record the valid result rows; returns the number rejected."""
+        rejected = 0
+        for row in rows:
+            if not self._valid_row(row):
+                rejected += 1
+                continue
+            job_id, seat, termination, plies = row
+            job = self.jobs[job_id]
+            if job_id in self.results:
+                self.metrics["duplicates"] += 1
+                continue
+            self.results[job_id] = {
+                "player_1": job["player_1"], "player_2": job["player_2"],
+                "opening": job["opening"],
+                "winner": job["player_{}".format(seat)],
+                "winner_seat": seat, "termination": termination,
+                "moves": plies, "width": job["width"],
+                "height": job["height"]}
+        self.metrics["rejected"] += rejected
+        if len(self.results) == len(self.jobs):
+            self._finished.set()
+        return rejected
+
+    def _release(self, chunk, token, leased):
+        """End the lease of a reported chunk, handing it out again if some
+        of its games still have no result.
+        """
+        leased.discard(chunk)
+        if self._leases.get(chunk, (None,))[0] == token:
+            del self._leases[chunk]
+            if not self._complete(chunk):
+                self._ready.append(chunk)
+                self.metrics["reissued"] += 1
+
+    async def _handle_worker(self, reader, writer):
+        token = next(self._tokens)
+        leased = set()
+        self.metrics["connected"] += 1
+        self._handlers[writer] = asyncio.current_task()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line.decode())
+                    op = message.get("op")
+                except (ValueError, AttributeError):
+                    message, op = None, None
+
+                if op == "hello":
+                    reply = {"type": "ok"}
+                elif op == "pull":
+                    reply = self._next_chunk(token, leased)
+                elif op == "results":
+                    rows, chunk = message.get("results"), message.get("chunk")
+                    if not isinstance(rows, list) or type(chunk) is not int:
+                        self.metrics["rejected"] += 1
+                        reply = {"type": "error", "error": "malformed results"}
+                    else:
+                        reply = {"type": "ok"}
+                        rejected = self._record(rows)
+                        if rejected:
+                            reply["rejected"] = rejected
+                        self._release(chunk, token, leased)
+                elif op == "status":
+                    reply = dict(type="status", **self.snapshot())
+                else:
+                    reply = {"type": "error", "error": "unknown request"}
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.metrics["connected"] -= 1
+            del self._handlers[writer]
+            # hand back the unfinished chunks this worker still holds
+            lost = [chunk for chunk in leased
+                    if self._leases.get(chunk, (None,))[0] == token]
+            for chunk in lost:
+                del self._leases[chunk]
+                if not self._complete(chunk):
+                    self._ready.appendleft(chunk)
+                    self.metrics["reissued"] += 1
+            if lost:
+                self.metrics["lost_workers"] += 1
+            writer.close()
+
+
+def run_worker(host, port=DEFAULT_PORT, processes=1, name=None):
+    """Pull and play chunks from a coordinator until it reports that every
+    game is done or goes away; returns the number of games played.
+    """
+    name = name or "{}-{}".format(socket.gethostname(), os.getpid())
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    mapper = pool.map if pool is not None else map
+    played = 0
+    try:
+        with socket.create_connection((host, port)) as sock:
+            stream = sock.makefile("rwb")
+
+            def call(message):
+                stream.write((json.dumps(message) + "\n").encode())
+                stream.flush()
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError("coordinator closed the connection")
+                return json.loads(line.decode())
+
+            call({"op": "hello", "worker": name})
+            while True:
+                reply = call({"op": "pull"})
+                if reply["type"] == "done":
+                    break
+                if reply["type"] == "wait":
+                    time.sleep(reply["retry"])
+                    continue
+                rows = list(mapper(play_job, reply["jobs"]))
+                call({"op": "results", "chunk": reply["chunk"],
+                      "results": rows})
+                played += len(rows)
+    except ConnectionError:
+        pass
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return played
+
+
+def summarize(results, test_agents, cpu_agents):
+    """Return {test agent: {cpu agent: (wins, games)}}."""
+    table = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    for record in results.values():
+        for test, cpu in [(record["player_1"], record["player_2"]),
+                          (record["player_2"], record["player_1"])]:
+            if test in test_agents and cpu in cpu_agents:
+                entry = table[test][cpu]
+                entry[0] += record["winner"] == test
+                entry[1] += 1
+    return {test: {cpu: tuple(v) for cpu, v in row.items()}
+            for test, row in table.items()}
+
+
+def print_summary(results, test_agents, cpu_agents, stats):
+    table = summarize(results, test_agents, cpu_agents)
+    print("\n{:^13}".format("Opponent") +
+          "".join("{:^13}".format(name) for name in test_agents))
+    for cpu in cpu_agents:
+        cells = []
+        for test in test_agents:
+            wins, games = table.get(test, {}).get(cpu, (0, 0))
+            cells.append("{:^13}".format("{} | {}".format(wins,
+                                                          games - wins)))
+        print("{:^13}".format(cpu) + "".join(cells))
+    print("-" * (13 * (len(test_agents) + 1)))
+    rates = []
+    for test in test_agents:
+        wins = sum(w for w, _ in table.get(test, {}).values())
+        games = sum(g for _, g in table.get(test, {}).values())
+        rates.append("{:.1f}%".format(100. * wins / max(1, games)))
+    print("{:^13}".format("Win Rate:") +
+          "".join("{:^13}".format(rate) for rate in rates))
+    print("\n{} games; {} chunks sent, {} reissued, {} workers lost, "
+          "{} duplicate results ignored, {} invalid results rejected".format(
+              stats["completed"], stats["chunks_sent"], stats["reissued"],
+              stats["lost_workers"], stats["duplicates"], stats["rejected"]))
+
+
+def coordinate(jobs, host="127.0.0.1", port=DEFAULT_PORT, workers=0,
+               **options):
+    """Serve `jobs` until every game has a result, starting `workers`
+    local worker processes; returns (results, metrics).
+    """
+    async def serve():
+        coordinator = Coordinator(jobs, **options)
+        bound = await coordinator.start(host, port)
+        print("Coordinating {} games on {}:{}".format(len(jobs), host, bound))
+        local = [multiprocessing.Process(
+            target=run_worker, args=("127.0.0.1", bound), daemon=True)
+            for _ in range(workers)]
+        for process in local:
+            process.start()
+        try:
+            results = await coordinator.wait()
+        finally:
+            await coordinator.close()
+        return results, coordinator.snapshot(), local
+
+    results, stats, local = asyncio.run(serve())
+    for process in local:
+        process.join()
+    return results, stats
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command")
+    for command in ("coordinate", "local"):
+        p = sub.add_parser(command)
+        p.add_argument("--host", default="127.0.0.1",
+                       help="interface to listen on")
+        p.add_argument("--port", type=int,
+                       default=DEFAULT_PORT if command == "coordinate" else 0)
+        p.add_argument("--test-agents", nargs="+", default=TEST_AGENTS,
+                       choices=list(AGENTS))
+        p.add_argument("--cpu-agents", nargs="+", default=CPU_AGENTS,
+                       choices=list(AGENTS))
+        p.add_argument("--matches", type=int, default=NUM_MATCHES,
+                       help="openings played by every pairing")
+        p.add_argument("--openings", default=None,
+                       help="opening suite file (see isolation.openings)")
+        p.add_argument("--time-limit", type=int, default=TIME_LIMIT)
+        p.add_argument("--chunk-size", type=int, default=8)
+        p.add_argument("--lease-timeout", type=float, default=600.)
+        p.add_argument("--results", default=None,
+                       help="JSON-lines file to write the game records to")
+        if command == "local":
+            p.add_argument("--workers", type=int,
+                           default=multiprocessing.cpu_count())
+    work = sub.add_parser("work")
+    work.add_argument("--host", default="127.0.0.1")
+    work.add_argument("--port", type=int, default=DEFAULT_PORT)
+    work.add_argument("--processes", type=int, default=1,
+                      help="games played at once on this host")
+    args = parser.parse_args()
+
+    if args.command == "work":
+        played = run_worker(args.host, args.port, args.processes)
+        print("Played {} games".format(played))
+        return
+    if args.command is None:
+        parser.error("choose a command: coordinate, work or local")
+
+    openings = None
+    if args.openings:
+        from isolation.openings import load_suite
+        openings = load_suite(args.openings)
+    jobs = tournament_jobs(args.test_agents, args.cpu_agents, args.matches,
+                           openings, args.time_limit)
+    workers = args.workers if args.command == "local" else 0
+    results, stats = coordinate(jobs, args.host, args.port, workers,
+                                chunk_size=args.chunk_size,
+                                lease_timeout=args.lease_timeout)
+    if args.results:
+        with open(args.results, "a") as f:
+            for record in results.values():
+                f.write(json.dumps(record) + "\n")
+    print_summary(results, args.test_agents, args.cpu_agents, stats)
+
+
+if __name__ == "__main__":
+    main()
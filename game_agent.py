@@ -4,6 +4,15 @@ and include the results in your report.
 """
 import random
 
+from isolation.ttable import EXACT, LOWER, UPPER, NO_MOVE, function_salt, \
+    position_key
+
+
+# Magnitude of the value of a position solved by a tablebase; the distance
+# to the end is subtracted so that quicker wins and slower losses are
+# preferred, and any solved value outranks every heuristic score
+SOLVED_VALUE = 1e6
+
 
 class SearchTimeout(Exception):
     """Subclass base exception for code clarity. """
@@ -34,8 +43,20 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    # TODO: finish this function!
-    raise NotImplementedError
+    if game.is_loser(player):
+        return float("-inf")
+
+    if game.is_winner(player):
+        return float("inf")
+
+    # Flood-fill area dominates once the players are partitioned; immediate
+    # mobility breaks ties while they still share the same region
+    opponent = game.get_opponent(player)
+    own_area = game.get_reachable_area(player)
+    opp_area = game.get_reachable_area(opponent)
+    own_moves = len(game.get_legal_moves(player))
+    opp_moves = len(game.get_legal_moves(opponent))
+    return float(own_area - opp_area) + 0.5 * (own_moves - opp_moves)
 
 
 def custom_score_2(game, player):
@@ -60,8 +81,16 @@ def custom_score_2(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    # TODO: finish this function!
-    raise NotImplementedError
+    if game.is_loser(player):
+        return float("-inf")
+
+    if game.is_winner(player):
+        return float("inf")
+
+    opponent = game.get_opponent(player)
+    own_moves = game.get_second_order_mobility(player)
+    opp_moves = game.get_second_order_mobility(opponent)
+    return float(own_moves - opp_moves)
 
 
 def custom_score_3(game, player):
@@ -86,8 +115,19 @@ def custom_score_3(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    # TODO: finish this function!
-    raise NotImplementedError
+    if game.is_loser(player):
+        return float("-inf")
+
+    if game.is_winner(player):
+        return float("inf")
+
+    # Aggressive "improved" score with a two-ply mobility correction
+    opponent = game.get_opponent(player)
+    own_moves = len(game.get_legal_moves(player))
+    opp_moves = len(game.get_legal_moves(opponent))
+    own_reach = game.get_second_order_mobility(player)
+    opp_reach = game.get_second_order_mobility(opponent)
+    return float(own_moves - 2 * opp_moves) + 0.25 * (own_reach - opp_reach)
 
 
 class IsolationPlayer:
@@ -111,12 +151,37 @@ class IsolationPlayer:
         Time remaining (in milliseconds) when search is aborted. Should be a
         positive value large enough to allow the function to return before the
         timer expires.
+
+    node_limit : int (optional)
+        If set, each call to get_move() searches at most this many nodes and
+        the timer is ignored, so that the chosen move does not depend on
+        machine speed or load. Combine with `Board.play(time_limit=None)` and
+        a seeded `random` module to reproduce whole games exactly.
+
+    depth_limit : int (optional)
+        If set, iterative deepening stops after completing this depth.
     """
-    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.):
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 node_limit=None, depth_limit=None):
         self.search_depth = search_depth
         self.score = score_fn
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        self.node_limit = node_limit
+        self.depth_limit = depth_limit
+        self.nodes = 0
+        self.completed_depth = 0
+
+    def check_budget(self):
+        """Count one visited node and raise SearchTimeout once the node
+        budget, or in timed mode the clock, is exhausted.
+        """
+        self.nodes += 1
+        if self.node_limit is not None:
+            if self.nodes > self.node_limit:
+                raise SearchTimeout()
+        elif self.time_left() < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
 
 
 class MinimaxPlayer(IsolationPlayer):
@@ -154,10 +219,13 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        self.nodes = 0
+        self.completed_depth = 0
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
-        best_move = (-1, -1)
+        legal_moves = game.get_legal_moves()
+        best_move = legal_moves[0] if legal_moves else (-1, -1)
 
         try:
             # The try/except block will automatically catch the exception
@@ -209,19 +277,107 @@ class MinimaxPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.check_budget()
+
+        best_move = (-1, -1)
+        best_value = float("-inf")
+        for move in game.get_legal_moves():
+            value = self._min_value(game.forecast_move(move), depth - 1)
+            if value > best_value or best_move == (-1, -1):
+                best_value, best_move = value, move
+        self.completed_depth = depth
+        return best_move
+
+    def _max_value(self, game, depth):
+        """Return the minimax value of a state where this player moves."""
+        self.check_budget()
 
-        # TODO: finish this function!
-        raise NotImplementedError
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return game.utility(self)
+        if depth <= 0:
+            return self.score(game, self)
+        return max(self._min_value(game.forecast_move(m), depth - 1)
+                   for m in legal_moves)
+
+    def _min_value(self, game, depth):
+        """Return the minimax value of a state where the opponent moves."""
+        self.check_budget()
+
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return game.utility(self)
+        if depth <= 0:
+            return self.score(game, self)
+        return min(self._max_value(game.forecast_move(m), depth - 1)
+                   for m in legal_moves)
 
 
 class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    ttable : isolation.ttable.EntryTable (optional)
+        A transposition table for search results, such as a
+        `SharedTranspositionTable` attached by every worker process of a
+        tournament or a `DiskTranspositionTable` kept between runs. Entries
+        are keyed by the score function and seat, so agents with different
+        heuristics can share one table.
+
+    tablebase : isolation.tablebase.Tablebase (optional)
+        Solved endgame positions; every searched position the tablebase
+        covers is scored exactly instead of searched further.
+
+    late_move_reduction : bool (optional)
+        If True, moves are ordered by the score of the position they lead
+        to at nodes at least LMR_MIN_DEPTH plies from the horizon, and all
+        but the first LMR_FULL_MOVES of them are searched one ply
+        shallower; a reduced move that looks better than the best move so
+        far is searched again to full depth.
+
+    futility_margin : float (optional)
+        If set, a node one ply above the horizon whose own score is worse
+        than the bound already secured by this margin or more is cut off
+        without scoring its moves.
+
+    See IsolationPlayer for the other parameters.
+
+    Attributes
+    ----------
+    best_value : float
+        The value of the move returned by the last get_move() call, from
+        its deepest completed iteration, or None if no iteration completed.
+
+    search_stats : dict
+        Running totals of "reductions" (moves searched shallower),
+        "re_searches" (reduced moves searched again at full depth),
+        "futility_prunes" (nodes cut off) and "futility_nodes" (the moves
+        of those nodes, i.e., nodes that were never visited).
     """
 
+    # late move reductions start at this remaining depth, after the first
+    # few moves in search order
+    LMR_MIN_DEPTH = 3
+    LMR_FULL_MOVES = 2
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 node_limit=None, depth_limit=None, ttable=None,
+                 tablebase=None, late_move_reduction=False,
+                 futility_margin=None):
+        super().__init__(search_depth, score_fn, timeout, node_limit,
+                         depth_limit)
+        self.ttable = ttable
+        self.tablebase = tablebase
+        self.late_move_reduction = late_move_reduction
+        self.futility_margin = futility_margin
+        self.best_value = None
+        self.search_stats = {"reductions": 0, "re_searches": 0,
+                             "futility_prunes": 0, "futility_nodes": 0}
+        self._salt = 0
+
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
         result before the time limit expires.
@@ -253,9 +409,34 @@ class AlphaBetaPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        self.nodes = 0
+        self.completed_depth = 0
+        self.best_value = None
+
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return (-1, -1)
+        best_move = legal_moves[0]
+        if self.ttable is not None:
+            # values are from this player's point of view, so entries are
+            # kept apart by seat as well as by heuristic
+            seat = 0 if game.active_player is game._player_1 else 1
+            self._salt = 2 * function_salt(self.score) + seat
+
+        # No game can last longer than the number of blank cells, so deeper
+        # iterations could never change the result
+        max_depth = len(game.get_blank_spaces())
+        if self.depth_limit is not None:
+            max_depth = min(max_depth, self.depth_limit)
+
+        try:
+            for depth in range(1, max_depth + 1):
+                best_move = self.alphabeta(game, depth)
+                self.completed_depth = depth
+        except SearchTimeout:
+            pass
 
-        # TODO: finish this function!
-        raise NotImplementedError
+        return best_move
 
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
         """Implement depth-limited minimax search with alpha-beta pruning as
@@ -302,8 +483,181 @@ class AlphaBetaPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.check_budget()
 
-        # TODO: finish this function!
-        raise NotImplementedError
+        best_move = (-1, -1)
+        for move in game.get_legal_moves():
+            value = self._min_value(game.forecast_move(move), depth - 1,
+                                    alpha, beta)
+            if value > alpha or best_move == (-1, -1):
+                best_move = move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        self.best_value = alpha
+        return best_move
+
+    def _max_value(self, game, depth, alpha, beta):
+        """Return the alpha-beta value of a state where this player moves."""
+        self.check_budget()
+
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return game.utility(self)
+        if self.tablebase is not None:
+            solved = self.tablebase.probe(game)
+            if solved is not None:
+                return self._solved_value(game, solved)
+        if depth <= 0:
+            return self.score(game, self)
+        key, value, hint = self._probe(game, depth, alpha, beta, legal_moves)
+        if value is not None:
+            return value
+        if depth == 1 and self.futility_margin is not None:
+            bound = self.score(game, self) + self.futility_margin
+            if bound <= alpha:
+                self._count_futile(legal_moves)
+                return bound
+
+        reduce = self.late_move_reduction and depth >= self.LMR_MIN_DEPTH
+        children = self._children(game, legal_moves, hint, reduce, True)
+        value, best_move = float("-inf"), legal_moves[0]
+        for i, (move, child) in enumerate(children):
+            floor = max(alpha, value)
+            if reduce and i >= self.LMR_FULL_MOVES:
+                self.search_stats["reductions"] += 1
+                result = self._min_value(child, depth - 2, floor, beta)
+                if result > floor:
+                    self.search_stats["re_searches"] += 1
+                    result = self._min_value(child, depth - 1, floor, beta)
+            else:
+                result = self._min_value(child, depth - 1, floor, beta)
+            if result > value:
+                value, best_move = result, move
+            if value >= beta:
+                break
+        self._store(key, game, depth, value, alpha, beta, best_move)
+        return value
+
+    def _min_value(self, game, depth, alpha, beta):
+        """Return the alpha-beta value of a state where the opponent moves."""
+        self.check_budget()
+
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return game.utility(self)
+        if self.tablebase is not None:
+            solved = self.tablebase.probe(game)
+            if solved is not None:
+                return self._solved_value(game, solved)
+        if depth <= 0:
+            return self.score(game, self)
+        key, value, hint = self._probe(game, depth, alpha, beta, legal_moves)
+        if value is not None:
+            return value
+        if depth == 1 and self.futility_margin is not None:
+            bound = self.score(game, self) - self.futility_margin
+            if bound >= beta:
+                self._count_futile(legal_moves)
+                return bound
+
+        reduce = self.late_move_reduction and depth >= self.LMR_MIN_DEPTH
+        children = self._children(game, legal_moves, hint, reduce, False)
+        value, best_move = float("inf"), legal_moves[0]
+        for i, (move, child) in enumerate(children):
+            ceiling = min(beta, value)
+            if reduce and i >= self.LMR_FULL_MOVES:
+                self.search_stats["reductions"] += 1
+                result = self._max_value(child, depth - 2, alpha, ceiling)
+                if result < ceiling:
+                    self.search_stats["re_searches"] += 1
+                    result = self._max_value(child, depth - 1, alpha, ceiling)
+            else:
+                result = self._max_value(child, depth - 1, alpha, ceiling)
+            if result < value:
+                value, best_move = result, move
+            if value <= alpha:
+                break
+        self._store(key, game, depth, value, alpha, beta, best_move)
+        return value
+
+    def principal_variation(self, game, move, max_length=None):
+        """Return the line of play expected after the last search of `game`
+        chose `move`, by following the best moves stored in the
+        transposition table. The line stops at the first position that is
+        missing from the table, after `max_length` moves, or at the end of
+        the game; without a table it is just `[move]`.
+        """
+        line = [move]
+        board = game.forecast_move(move)
+        while self.ttable is not None and \
+                (max_length is None or len(line) < max_length):
+            entry = self.ttable.probe(position_key(board, self._salt))
+            if entry is None or entry.move == NO_MOVE:
+                break
+            move = (entry.move % board.height, entry.move // board.height)
+            if move not in board.get_legal_moves():
+                break
+            line.append(move)
+            board = board.forecast_move(move)
+        return line
+
+    def _children(self, game, legal_moves, hint, order, maximizing):
+        """Return (move, successor) pairs in search order. When `order` is
+        set, the table's best move comes first, followed by the others from
+        the best score for the side to move to the worst.
+        """
+        children = [(move, game.forecast_move(move)) for move in legal_moves]
+        if order:
+            sign = -1 if maximizing else 1
+            children.sort(key=lambda pair: (
+                pair[0] != hint, sign * self.score(pair[1], self)))
+        return children
+
+    def _count_futile(self, legal_moves):
+        self.search_stats["futility_prunes"] += 1
+        self.search_stats["futility_nodes"] += len(legal_moves)
+
+    def _solved_value(self, game, solved):
+        """Return the value to this player of a tablebase Probe."""
+        value = SOLVED_VALUE - solved.distance
+        return value if solved.win == (game.active_player is self) else -value
+
+    def _probe(self, game, depth, alpha, beta, legal_moves):
+        """Look a state up in the transposition table.
+
+        Returns the key of the state, a stored value that settles it for
+        this depth and window (or None), and the stored best move (or
+        None), which is also moved to the front of `legal_moves`.
+        """
+        if self.ttable is None:
+            return None, None, None
+        key = position_key(game, self._salt)
+        entry = self.ttable.probe(key)
+        if entry is None:
+            return key, None, None
+        if entry.depth >= depth:
+            if entry.flag == EXACT or \
+                    (entry.flag == LOWER and entry.value >= beta) or \
+                    (entry.flag == UPPER and entry.value <= alpha):
+                return key, entry.value, None
+        if entry.move != NO_MOVE:
+            move = (entry.move % game.height, entry.move // game.height)
+            if move in legal_moves:
+                legal_moves.remove(move)
+                legal_moves.insert(0, move)
+                return key, None, move
+        return key, None, None
+
+    def _store(self, key, game, depth, value, alpha, beta, best_move):
+        """Record a searched state, bounded by the window it was searched in."""
+        if key is None:
+            return
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        move = best_move[0] + best_move[1] * game.height
+        self.ttable.store(key, value, depth, flag, move)
@@ -7,5 +7,25 @@ location is blocked for the rest of the game. The first player with no
 legal moves loses, and the opponent is declared the winner.
 """
 
+import importlib
+
 # Make the Board class available at the root of the module for imports
 from .isolation import Board
+
+# Subsystems are only imported on first use (e.g., `isolation.feed`), so
+# that processes which just play games do not pay for the servers, caches
+# and NumPy code they never touch
+_SUBMODULES = ("feed", "openings", "perft", "profiling", "reference",
+               "results", "sandbox", "serialization", "tablebase", "ttable",
+               "vectorized")
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_SUBMODULES))
@@ -0,0 +1,275 @@
+"""
+Publish games as they are played to a newline-delimited JSON feed, and serve
+feeds to the isoviz viewer.
+
+A feed file holds one JSON event per line. Each game is announced by a
+"start" event that records its geometry and the position it starts from
+(so games that began from an opening still replay exactly), followed by one
+"move" event per ply and an "end" event:
+
+    {"type": "start", "game": "812-1", "player_1": "AB_Improved",
+     "player_2": "Random", "width": 7, "height": 7, "active": 1,
+     "locations": [[3, 3], [2, 1]], "blocked": []}
+    {"type": "move", "game": "812-1", "ply": 2, "player": 1,
+     "move": [1, 5], "elapsed": 101.7}
+    {"type": "end", "game": "812-1", "winner": 2, "winner_name": "Random",
+     "termination": "timeout", "plies": 17}
+
+Events of concurrent games may interleave; readers group them by "game".
+Record a game by passing a recorder as the `on_move` callback of
+`Board.play()`:
+
+    feed = MoveFeed("games.ndjson")
+    recorder = feed.record(game, "AB_Improved", "Random")
+    winner, history, termination = game.play(on_move=recorder)
+    recorder.finish(winner, termination)
+
+Run `python -m isolation.feed games.ndjson` to serve the viewer in isoviz/
+together with the feed; the viewer can page through stored games and follow
+new games live while the file is still being written.
+"""
+import itertools
+import json
+import os
+import threading
+
+from urllib.parse import urlparse, parse_qs
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from functools import partial
+
+VIEWER_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "isoviz")
+
+
+class MoveFeed(object):
+    """Append game events to a newline-delimited JSON file.
+
+    Parameters
+    ----------
+    path : str
+        The feed file; events are appended if it already exists.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._prefix = os.getpid()
+
+    def publish(self, event):
+        """Write one event and flush it so readers see it immediately."""
+        line = json.dumps(event) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def record(self, board, name_1="Player1", name_2="Player2"):
+        """Announce a game starting from the current position of `board`
+        and return a GameRecorder to pass as `Board.play(on_move=...)`.
+        """
+        game_id = "{}-{}".format(self._prefix, next(self._ids))
+        return GameRecorder(self, game_id, board, name_1, name_2)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameRecorder(object):
+    """Publish the moves of one game to a MoveFeed; see MoveFeed.record()."""
+
+    def __init__(self, feed, game_id, board, name_1, name_2):
+        self.feed = feed
+        self.game_id = game_id
+        self.names = (name_1, name_2)
+        self._players = (board._player_1, board._player_2)
+        locations = [board.get_player_location(p) for p in self._players]
+        held = set(loc for loc in locations if loc is not None)
+        blank = set(board.get_blank_spaces())
+        blocked = [[r, c] for c in range(board.width)
+                   for r in range(board.height)
+                   if (r, c) not in blank and (r, c) not in held]
+        feed.publish({
+            "type": "start", "game": game_id,
+            "player_1": name_1, "player_2": name_2,
+            "width": board.width, "height": board.height,
+            "active": self._seat(board.active_player),
+            "locations": [None if loc is None else list(loc)
+                          for loc in locations],
+            "blocked": blocked,
+        })
+        self.plies = board.move_count
+
+    def _seat(self, player):
+        return 1 if player is self._players[0] else 2
+
+    def __call__(self, board, move, elapsed):
+        self.feed.publish({"type": "move", "game": self.game_id,
+                           "ply": board.move_count,
+                           "player": self._seat(board.active_player),
+                           "move": list(move), "elapsed": round(elapsed, 3)})
+        self.plies = board.move_count + 1
+
+    def finish(self, winner, termination):
+        """Publish the end of the game given the values returned by play()."""
+        seat = self._seat(winner)
+        self.feed.publish({"type": "end", "game": self.game_id,
+                           "winner": seat, "winner_name": self.names[seat - 1],
+                           "termination": termination, "plies": self.plies})
+
+
+class FeedIndex(object):
+    """Incremental index from game id to the byte offsets of its events.
+
+    Only the bytes appended since the last refresh are read, so a viewer
+    can page through or follow a large, growing feed without the server
+    loading it all into memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.games = []     # summaries in order of first appearance
+        self._by_id = {}
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                while True:
+                    offset = f.tell()
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break  # wait for the writer to finish the line
+                    self._offset = f.tell()
+                    event = json.loads(line.decode())
+                    self._add(event, offset)
+
+    def _add(self, event, offset):
+        game = self._by_id.get(event["game"])
+        if game is None:
+            game = {"game": event["game"], "offsets": [], "status": "live"}
+            self._by_id[event["game"]] = game
+            self.games.append(game)
+        game["offsets"].append(offset)
+        if event["type"] == "start":
+            game.update(player_1=event["player_1"], player_2=event["player_2"],
+                        width=event["width"], height=event["height"])
+        elif event["type"] == "end":
+            game.update(status=event["termination"],
+                        winner=event["winner_name"])
+
+    def page(self, start=0, count=20):
+        """Return summaries of games [start, start + count)."""
+        self.refresh()
+        return {"total": len(self.games),
+                "games": [{k: v for k, v in game.items() if k != "offsets"}
+                          for game in self.games[start:start + count]]}
+
+    def events(self, game_id):
+        """Return the events of one game by seeking to their offsets."""
+        self.refresh()
+        game = self._by_id.get(game_id)
+        if game is None:
+            return None
+        out = []
+        with open(self.path, "rb") as f:
+            for offset in list(game["offsets"]):
+                f.seek(offset)
+                out.append(json.loads(f.readline().decode()))
+        return out
+
+    def tail(self, since, limit=1000):
+        """Return up to `limit` complete events written after byte offset
+        `since` with the offset to resume from, or only the current end
+        offset if `since` is negative.
+        """
+        self.refresh()
+        end = self._offset
+        if since < 0 or since >= end:
+            return {"offset": end, "events": []}
+        events = []
+        with open(self.path, "rb") as f:
+            f.seek(since)
+            while f.tell() < end and len(events) < limit:
+                events.append(json.loads(f.readline().decode()))
+            return {"offset": f.tell(), "events": events}
+
+
+class FeedRequestHandler(SimpleHTTPRequestHandler):
+    """Serve the viewer files plus a JSON API under /feed/:
+
+        /feed/games?start=0&count=20   page of game summaries
+        /feed/game?id=812-1            every event of one game
+        /feed/tail?since=0             events appended after a byte offset
+                                       (since=-1 returns just the end offset)
+    """
+
+    def __init__(self, *args, index=None, **kwargs):
+        self.index = index
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.startswith("/feed/"):
+            return super().do_GET()
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            if url.path == "/feed/games":
+                body = self.index.page(int(query.get("start", 0)),
+                                       int(query.get("count", 20)))
+            elif url.path == "/feed/game":
+                body = self.index.events(query.get("id"))
+            elif url.path == "/feed/tail":
+                body = self.index.tail(int(query.get("since", 0)))
+            else:
+                body = None
+        except ValueError:
+            return self.send_error(400)
+        if body is None:
+            return self.send_error(404)
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(path, host="127.0.0.1", port=8000):
+    """Serve the viewer and the feed file at `path` until interrupted."""
+    handler = partial(FeedRequestHandler, index=FeedIndex(path),
+                      directory=VIEWER_DIR)
+    server = ThreadingHTTPServer((host, port), handler)
+    print("Viewer at http://{}:{}/display.html".format(host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Serve the isoviz viewer for a game feed file.")
+    parser.add_argument("path", help="newline-delimited JSON feed file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    serve(args.path, args.host, args.port)
@@ -8,11 +8,135 @@ remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
 import random
+import struct
 import timeit
-from copy import copy
+from collections import namedtuple
+from functools import lru_cache
+from itertools import compress
 
 TIME_LIMIT_MILLIS = 150
 
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+
+# Maps the digits of a binary string to 0/1 bytes for itertools.compress
+_BIT_BYTES = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def popcount(mask):
+    """Return the number of set bits in a non-negative integer bitmask."""
+    return bin(mask).count("1")
+
+
+class KnightGraph(object):
+    """Precomputed bitmask tables for knight moves on a fixed board geometry.
+
+    Cells are numbered in the same column-major order used by the board
+    state (i.e., index = row + column * height), and bit `i` of a mask is set
+    when cell `i` is a member of the set.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns on the board.
+
+    height : int
+        The number of rows on the board.
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.full = (1 << self.size) - 1
+        self._format = "0{}b".format(self.size)
+
+        # Each direction is stored as a mask of the source cells whose
+        # destination stays on the board and the index offset to shift by,
+        # so a whole set of cells can be advanced one knight move at a time
+        self.shifts = []
+        for dr, dc in DIRECTIONS:
+            src = 0
+            for c in range(max(0, -dc), min(width, width - dc)):
+                for r in range(max(0, -dr), min(height, height - dr)):
+                    src |= 1 << (r + c * height)
+            self.shifts.append((src, dr + dc * height))
+
+        self.cells = [(idx % height, idx // height)
+                      for idx in range(width * height)]
+        self.moves = [self.neighbors(1 << idx) for idx in range(width * height)]
+        self.targets = [[(r + c * height, (r, c))
+                         for r, c in ((row + dr, col + dc)
+                                      for dr, dc in DIRECTIONS)
+                         if 0 <= r < height and 0 <= c < width]
+                        for row, col in self.cells]
+
+    def flags(self, mask):
+        """Return a bytes object with one 0/1 entry per cell index holding
+        the corresponding bit of the mask.
+
+        Converting a mask in a single call keeps whole-board scans linear in
+        the number of cells, where testing bits one at a time would cost
+        time proportional to the mask length for every cell.
+        """
+        digits = format(mask, self._format)[::-1]
+        return digits.encode("ascii").translate(_BIT_BYTES)
+
+    def neighbors(self, cells):
+        """Return the mask of all cells one knight move away from any cell
+        in the input mask.
+        """
+        out = 0
+        for src, shift in self.shifts:
+            sub = cells & src
+            if sub:
+                out |= sub << shift if shift > 0 else sub >> -shift
+        return out
+
+
+@lru_cache(maxsize=None)
+def knight_graph(width, height):
+    """Return the shared `KnightGraph` for the specified board geometry."""
+    return KnightGraph(width, height)
+
+
+# Binary position record: width, height, initiative, move count, player 1
+# location, player 2 location (NO_LOCATION if unmoved), followed by the
+# occupancy bitmask as ceil(width * height / 8) little-endian bytes
+RECORD_HEADER = struct.Struct("<BBBHHH")
+NO_LOCATION = 0xFFFF
+
+FEN_BLOCKED = "x"
+FEN_PLAYERS = "ab"
+
+
+def record_size(width, height):
+    """Return the length in bytes of a binary record for the geometry."""
+    return RECORD_HEADER.size + (width * height + 7) // 8
+
+
+def validate_position(width, height, turn, locs, blocked):
+    """Raise ValueError unless the decoded fields describe a position that
+    can be reached in a game: a non-empty board, player 1 or 2 to move, and
+    player locations on distinct blocked cells of the board.
+    """
+    if not width or not height:
+        raise ValueError("Invalid board size {}x{}.".format(width, height))
+    if turn not in (0, 1):
+        raise ValueError("Invalid player to move: {}.".format(turn))
+    for loc in locs:
+        if loc is None:
+            continue
+        if loc >= width * height or not (blocked >> loc) & 1:
+            raise ValueError("Invalid player location: {}.".format(loc))
+    if locs[0] is not None and locs[0] == locs[1]:
+        raise ValueError("Both players at location {}.".format(locs[0]))
+
+
+# Immutable game metadata shared by a board and every copy made from it
+BoardSpec = namedtuple("BoardSpec",
+                       ["width", "height", "player_1", "player_2", "graph"])
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -37,37 +161,83 @@ class Board(object):
     BLANK = 0
     NOT_MOVED = None
 
+    # Sent in place of a move by play_async() when a player did not answer
+    # within the time limit
+    __TIMED_OUT = object()
+
+    # The game state is an occupancy bitmask (bit `row + col * height` is set
+    # once a cell has been visited), a (player 1, player 2) tuple of location
+    # indices, and the initiative (0 for player 1, 1 for player 2). Geometry
+    # and player references live in the shared BoardSpec.
+    __slots__ = ("_spec", "_blocked", "_locs", "_turn", "move_count")
+
     def __init__(self, player_1, player_2, width=7, height=7):
-        self.width = width
-        self.height = height
+        self._spec = BoardSpec(width, height, player_1, player_2,
+                               knight_graph(width, height))
+        self._blocked = 0
+        self._locs = (Board.NOT_MOVED, Board.NOT_MOVED)
+        self._turn = 0
         self.move_count = 0
-        self._player_1 = player_1
-        self._player_2 = player_2
-        self._active_player = player_1
-        self._inactive_player = player_2
-
-        # The last 3 entries of the board state includes initiative (0 for
-        # player 1, 1 for player 2) player 2 last move, and player 1 last move
-        self._board_state = [Board.BLANK] * (width * height + 3)
-        self._board_state[-1] = Board.NOT_MOVED
-        self._board_state[-2] = Board.NOT_MOVED
 
     def hash(self):
-        return str(self._board_state).__hash__()
+        return hash((self._blocked, self._locs, self._turn))
+
+    @property
+    def width(self):
+        """The number of columns on the board."""
+        return self._spec.width
+
+    @property
+    def height(self):
+        """The number of rows on the board."""
+        return self._spec.height
+
+    @property
+    def _player_1(self):
+        return self._spec.player_1
+
+    @property
+    def _player_2(self):
+        return self._spec.player_2
+
+    @property
+    def _active_player(self):
+        return self._spec[2 + self._turn]
+
+    @property
+    def _inactive_player(self):
+        return self._spec[3 - self._turn]
+
+    @property
+    def _board_state(self):
+        """List view of the game state in the legacy layout: one entry per
+        cell (0 for blank, 1 for blocked) followed by the initiative, player
+        2 last move, and player 1 last move.
+        """
+        state = list(self._spec.graph.flags(self._blocked))
+        state.extend([self._turn, self._locs[1], self._locs[0]])
+        return state
+
+    @_board_state.setter
+    def _board_state(self, state):
+        self._blocked = sum(1 << idx for idx, value in enumerate(state[:-3])
+                            if value != Board.BLANK)
+        self._turn = state[-3]
+        self._locs = (state[-1], state[-2])
 
     @property
     def active_player(self):
         """The object registered as the player holding initiative in the
         current game state.
         """
-        return self._active_player
+        return self._spec[2 + self._turn]
 
     @property
     def inactive_player(self):
         """The object registered as the player in waiting for the current
         game state.
         """
-        return self._inactive_player
+        return self._spec[3 - self._turn]
 
     def get_opponent(self, player):
         """Return the opponent of the supplied player.
@@ -84,21 +254,175 @@ class Board(object):
         object
             The opponent of the input player object.
         """
-        if player == self._active_player:
-            return self._inactive_player
-        elif player == self._inactive_player:
-            return self._active_player
+        if player == self.active_player:
+            return self.inactive_player
+        elif player == self.inactive_player:
+            return self.active_player
         raise RuntimeError("`player` must be an object registered as a player in the current game.")
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
+        # Every field is immutable, so the copy shares them and skips __init__
+        new_board = object.__new__(self.__class__)
+        new_board._spec = self._spec
+        new_board._blocked = self._blocked
+        new_board._locs = self._locs
+        new_board._turn = self._turn
         new_board.move_count = self.move_count
-        new_board._active_player = self._active_player
-        new_board._inactive_player = self._inactive_player
-        new_board._board_state = copy(self._board_state)
         return new_board
 
+    @classmethod
+    def from_bytes(cls, data, player_1, player_2):
+        """Construct a board from a binary record produced by to_bytes().
+
+        Parameters
+        ----------
+        data : bytes-like
+            A buffer starting with a binary position record; trailing bytes
+            are ignored.
+
+        player_1 : object
+            The object to register as the first player.
+
+        player_2 : object
+            The object to register as the second player.
+
+        Returns
+        -------
+        isolation.Board
+            A new board holding the encoded position.
+        """
+        try:
+            width, height, turn, move_count, loc_1, loc_2 = \
+                RECORD_HEADER.unpack_from(data)
+        except struct.error:
+            raise ValueError("Truncated board record.")
+        end = record_size(width, height)
+        if len(data) < end:
+            raise ValueError("Truncated board record.")
+        blocked = int.from_bytes(data[RECORD_HEADER.size:end], "little")
+        locs = (None if loc_1 == NO_LOCATION else loc_1,
+                None if loc_2 == NO_LOCATION else loc_2)
+        validate_position(width, height, turn, locs, blocked)
+        board = cls(player_1, player_2, width=width, height=height)
+        board._blocked = blocked
+        board._locs = locs
+        board._turn = turn
+        board.move_count = move_count
+        return board
+
+    def to_bytes(self):
+        """Return a compact binary record of the position covering geometry,
+        occupancy, player locations, initiative and move count. Player
+        objects are not encoded.
+        """
+        width, height = self._spec.width, self._spec.height
+        loc_1, loc_2 = self._locs
+        header = RECORD_HEADER.pack(
+            width, height, self._turn, self.move_count,
+            NO_LOCATION if loc_1 is None else loc_1,
+            NO_LOCATION if loc_2 is None else loc_2)
+        nbytes = record_size(width, height) - RECORD_HEADER.size
+        return header + self._blocked.to_bytes(nbytes, "little")
+
+    @classmethod
+    def from_fen(cls, text, player_1, player_2):
+        """Construct a board from the text encoding produced by to_fen().
+
+        Parameters
+        ----------
+        text : str
+            A position string such as "7/7/2x4/3a3/7/4b2/7 a 2".
+
+        player_1 : object
+            The object to register as the first player.
+
+        player_2 : object
+            The object to register as the second player.
+
+        Returns
+        -------
+        isolation.Board
+            A new board holding the encoded position.
+        """
+        try:
+            rows, side, move_count = text.split()
+            move_count = int(move_count)
+            turn = FEN_PLAYERS.index(side)
+        except ValueError:
+            raise ValueError("Invalid position string: {!r}".format(text))
+
+        rows = rows.split("/")
+        height = len(rows)
+        blocked = 0
+        locs = [Board.NOT_MOVED, Board.NOT_MOVED]
+        width = None
+        for r, row in enumerate(rows):
+            c = 0
+            run = ""
+            for char in row + " ":
+                if char.isdigit():
+                    run += char
+                    continue
+                if run:
+                    c += int(run)
+                    run = ""
+                if char == " ":
+                    break
+                if char != FEN_BLOCKED and char not in FEN_PLAYERS:
+                    raise ValueError("Invalid position string: {!r}".format(text))
+                idx = r + c * height
+                blocked |= 1 << idx
+                if char in FEN_PLAYERS:
+                    if locs[FEN_PLAYERS.index(char)] is not Board.NOT_MOVED:
+                        raise ValueError("Duplicate player {!r} in position "
+                                         "string: {!r}".format(char, text))
+                    locs[FEN_PLAYERS.index(char)] = idx
+                c += 1
+            if width is None:
+                width = c
+            elif c != width:
+                raise ValueError("Ragged rows in position string: {!r}".format(text))
+        if not width:
+            raise ValueError("Empty position string: {!r}".format(text))
+
+        board = cls(player_1, player_2, width=width, height=height)
+        board._blocked = blocked
+        board._locs = tuple(locs)
+        board._turn = turn
+        board.move_count = move_count
+        return board
+
+    def to_fen(self):
+        """Return a one-line text encoding of the position, similar to chess
+        FEN notation: rows from top to bottom separated by "/", where digits
+        count consecutive blank cells, "x" marks a blocked cell and "a"/"b"
+        mark the cells held by player 1 and 2. The rows are followed by the
+        player to move ("a" or "b") and the move count.
+        """
+        width, height = self._spec.width, self._spec.height
+        blocked = self._blocked
+        marks = {loc: FEN_PLAYERS[i] for i, loc in enumerate(self._locs)
+                 if loc is not None}
+        rows = []
+        for r in range(height):
+            row = ""
+            run = 0
+            for c in range(width):
+                idx = r + c * height
+                if not (blocked >> idx) & 1:
+                    run += 1
+                    continue
+                if run:
+                    row += str(run)
+                    run = 0
+                row += marks.get(idx, FEN_BLOCKED)
+            if run:
+                row += str(run)
+            rows.append(row)
+        return "{} {} {}".format("/".join(rows), FEN_PLAYERS[self._turn],
+                                 self.move_count)
+
     def forecast_move(self, move):
         """Return a deep copy of the current game with an input move applied to
         advance the game one ply.
@@ -132,15 +456,16 @@ class Board(object):
         bool
             Returns True if the move is legal, False otherwise
         """
-        idx = move[0] + move[1] * self.height
-        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
-                self._board_state[idx] == Board.BLANK)
+        height = self._spec.height
+        return (0 <= move[0] < height and 0 <= move[1] < self._spec.width and
+                not (self._blocked >> (move[0] + move[1] * height)) & 1)
 
     def get_blank_spaces(self):
         """Return a list of the locations that are still available on the board.
         """
-        return [(i, j) for j in range(self.width) for i in range(self.height)
-                if self._board_state[i + j * self.height] == Board.BLANK]
+        graph = self._spec.graph
+        return list(compress(graph.cells,
+                             graph.flags(graph.full & ~self._blocked)))
 
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
@@ -156,20 +481,10 @@ class Board(object):
             The coordinate pair (row, column) of the input player, or None
             if the player has not moved.
         """
-        if player == self._player_1:
-            if self._board_state[-1] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-1]
-        elif player == self._player_2:
-            if self._board_state[-2] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-2]
-        else:
-            raise RuntimeError(
-                "Invalid player in get_player_location: {}".format(player))
-        w = idx // self.height
-        h = idx % self.height
-        return (h, w)
+        idx = self.__get_location_index(player)
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._spec.graph.cells[idx]
 
     def get_legal_moves(self, player=None):
         """Return the list of all legal moves for the specified player.
@@ -188,7 +503,56 @@ class Board(object):
         """
         if player is None:
             player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+        return self.__get_moves(self.__get_location_index(player))
+
+    def get_second_order_mobility(self, player=None):
+        """Count the distinct blank cells the specified player could reach in
+        exactly two moves if the opponent did not move in between.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the count for the active player on the board.
+
+        Returns
+        -------
+        int
+            The number of blank cells reachable in two knight moves through
+            a blank intermediate cell.
+        """
+        if player is None:
+            player = self.active_player
+        graph = self._spec.graph
+        free = graph.full & ~self._blocked
+        first = self.__get_moves_mask(player)
+        return popcount(graph.neighbors(first) & free)
+
+    def get_reachable_area(self, player=None):
+        """Count the blank cells the specified player could eventually reach
+        by any sequence of moves if the opponent did not move (i.e., a flood
+        fill of the knight graph restricted to blank cells).
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the area for the active player on the board.
+
+        Returns
+        -------
+        int
+            The number of blank cells connected to the player's location.
+        """
+        if player is None:
+            player = self.active_player
+        graph = self._spec.graph
+        free = graph.full & ~self._blocked
+        region = frontier = self.__get_moves_mask(player)
+        while frontier:
+            frontier = graph.neighbors(frontier) & free & ~region
+            region |= frontier
+        return popcount(region)
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -199,21 +563,24 @@ class Board(object):
             A coordinate pair (row, column) indicating the next position for
             the active player on the board.
         """
-        idx = move[0] + move[1] * self.height
-        last_move_idx = int(self.active_player == self._player_2) + 1
-        self._board_state[-last_move_idx] = idx
-        self._board_state[idx] = 1
-        self._board_state[-3] ^= 1
-        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        idx = move[0] + move[1] * self._spec.height
+        if self._turn:
+            self._locs = (self._locs[0], idx)
+        else:
+            self._locs = (idx, self._locs[1])
+        self._blocked |= 1 << idx
+        self._turn ^= 1
         self.move_count += 1
 
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return (player == self.inactive_player and
+                not self.__get_moves_mask(self.active_player))
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return (player == self.active_player and
+                not self.__get_moves_mask(self.active_player))
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,28 +604,42 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if not self.__get_moves_mask(self.active_player):
 
-            if player == self._inactive_player:
+            if player == self.inactive_player:
                 return float("inf")
 
-            if player == self._active_player:
+            if player == self.active_player:
                 return float("-inf")
 
         return 0.
 
-    def __get_moves(self, loc):
+    def __get_location_index(self, player):
+        """Return the cell index of the player, or NOT_MOVED."""
+        if player == self._spec.player_1:
+            return self._locs[0]
+        elif player == self._spec.player_2:
+            return self._locs[1]
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def __get_moves_mask(self, player):
+        """Return the bitmask of cells that are legal moves for the player."""
+        idx = self.__get_location_index(player)
+        if idx == Board.NOT_MOVED:
+            return self._spec.graph.full & ~self._blocked
+        return self._spec.graph.moves[idx] & ~self._blocked
+
+    def __get_moves(self, idx):
         """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        knight in chess) from the cell index `idx`.
         """
-        if loc == Board.NOT_MOVED:
+        if idx == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
+        blocked = self._blocked
+        valid_moves = [move for target, move in self._spec.graph.targets[idx]
+                       if not (blocked >> target) & 1]
         random.shuffle(valid_moves)
         return valid_moves
 
@@ -271,39 +652,44 @@ class Board(object):
         the location of each player and indicating which cells have been
         blocked, and which remain open.
         """
-        p1_loc = self._board_state[-1]
-        p2_loc = self._board_state[-2]
+        width, height = self._spec.width, self._spec.height
+        marks = [' -'[flag] for flag in self._spec.graph.flags(self._blocked)]
+        for loc, symbol in zip(self._locs, symbols):
+            if loc is not None:
+                marks[loc] = symbol
 
-        col_margin = len(str(self.height - 1)) + 1
+        col_margin = len(str(height - 1)) + 1
         prefix = "{:<" + "{}".format(col_margin) + "}"
         offset = " " * (col_margin + 3)
-        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
-        for i in range(self.height):
-            out += prefix.format(i) + ' | '
-            for j in range(self.width):
-                idx = i + j * self.height
-                if not self._board_state[idx]:
-                    out += ' '
-                elif p1_loc == idx:
-                    out += symbols[0]
-                elif p2_loc == idx:
-                    out += symbols[1]
-                else:
-                    out += '-'
-                out += ' | '
-            out += '\n\r'
-
-        return out
+        lines = [offset + '   '.join(map(str, range(width)))]
+        for i in range(height):
+            lines.append(prefix.format(i) + ' | ' +
+                         ' | '.join(marks[i::height]) + ' | ')
+        return '\n\r'.join(lines) + '\n\r'
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def play(self, time_limit=TIME_LIMIT_MILLIS, on_move=None, profiler=None):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
         Parameters
         ----------
-        time_limit : numeric (optional)
+        time_limit : numeric or None (optional)
             The maximum number of milliseconds to allow before timeout
-            during each turn.
+            during each turn. If None, the wall clock is not enforced and
+            the players' time_left() always returns infinity; use this with
+            node- or depth-limited players for games that do not depend on
+            machine speed (seed the `random` module, which orders legal
+            moves, to replay identical games).
+
+        on_move : callable (optional)
+            Called as on_move(board, move, elapsed) after each legal move is
+            chosen but before it is applied (so board.active_player is the
+            player who moved), where elapsed is the number of milliseconds
+            the player took.
+
+        profiler : isolation.profiling.Profiler (optional)
+            If given, each call of a player's get_move() is timed by the
+            profiler (see isolation.profiling).
 
         Returns
         ----------
@@ -312,6 +698,85 @@ class Board(object):
             move history, and a string indicating the reason for losing
             (e.g., timeout or invalid move).
         """
+        turns = self.__turns(time_limit, on_move)
+        player, game_copy, time_left = next(turns)
+        while True:
+            if profiler is None:
+                move = player.get_move(game_copy, time_left)
+            else:
+                move = profiler.call_agent(player, game_copy, time_left)
+            try:
+                player, game_copy, time_left = turns.send(move)
+            except StopIteration as result:
+                return result.value
+
+    async def play_async(self, time_limit=TIME_LIMIT_MILLIS, on_move=None,
+                         profiler=None):
+        """Execute a match like play(), but as a coroutine, so that one
+        event loop can drive many games whose players wait on I/O (e.g.,
+        agents behind a socket).
+
+        A player's get_move(game, time_left) may return an awaitable (i.e.,
+        be an `async def` method), which is awaited with the time left in
+        the turn as an asyncio timeout; a player that has not answered by
+        then is cancelled and loses on time. Players whose get_move returns
+        a move directly are called as in play() and block the event loop
+        while they search.
+
+        Parameters
+        ----------
+        time_limit : numeric or None (optional)
+            The maximum number of milliseconds to allow before timeout
+            during each turn, or None for no limit.
+
+        on_move : callable (optional)
+            Called as on_move(board, move, elapsed) after each legal move,
+            as in play().
+
+        profiler : isolation.profiling.Profiler (optional)
+            If given, each call of a player's get_move() is timed by the
+            profiler, as in play(). An awaitable answer is only timed until
+            get_move() returns it, since the profiler's call stack cannot
+            follow the event loop as it switches between games.
+
+        Returns
+        ----------
+        (player, list<[(int, int),]>, str)
+            The winning player, the complete game move history, and the
+            reason for losing, as returned by play().
+        """
+        import asyncio
+        import inspect
+
+        turns = self.__turns(time_limit, on_move)
+        player, game_copy, time_left = next(turns)
+        while True:
+            if profiler is None:
+                move = player.get_move(game_copy, time_left)
+            else:
+                move = profiler.call_agent(player, game_copy, time_left)
+            if inspect.isawaitable(move):
+                timeout = None
+                if time_limit is not None:
+                    timeout = max(0., time_left()) / 1000.
+                try:
+                    move = await asyncio.wait_for(move, timeout)
+                except asyncio.TimeoutError:
+                    move = Board.__TIMED_OUT
+            try:
+                player, game_copy, time_left = turns.send(move)
+            except StopIteration as result:
+                return result.value
+
+    def __turns(self, time_limit, on_move):
+        """Run the turns of a match for play() and play_async(), which only
+        differ in how they call the players.
+
+        The generator yields (player, game_copy, time_left) for every turn,
+        is sent the move that player.get_move(game_copy, time_left) chose
+        (or __TIMED_OUT for an answer that never came), and returns
+        (winner, move history, termination) as play() does.
+        """
         move_history = []
 
         time_millis = lambda: 1000 * timeit.default_timer()
@@ -322,21 +787,41 @@ class Board(object):
             game_copy = self.copy()
 
             move_start = time_millis()
-            time_left = lambda : time_limit - (time_millis() - move_start)
-            curr_move = self._active_player.get_move(game_copy, time_left)
+            if time_limit is None:
+                time_left = lambda : float("inf")
+            else:
+                time_left = lambda : time_limit - (time_millis() - move_start)
+            curr_move = yield self.active_player, game_copy, time_left
+            if curr_move is Board.__TIMED_OUT:
+                return self.inactive_player, move_history, "timeout"
             move_end = time_left()
+            elapsed = time_millis() - move_start
 
             if curr_move is None:
                 curr_move = Board.NOT_MOVED
 
-            if move_end < 0:
-                return self._inactive_player, move_history, "timeout"
-
-            if curr_move not in legal_player_moves:
-                if len(legal_player_moves) > 0:
-                    return self._inactive_player, move_history, "forfeit"
-                return self._inactive_player, move_history, "illegal move"
+            termination = self.__judge_move(curr_move, move_end,
+                                            legal_player_moves)
+            if termination is not None:
+                return self.inactive_player, move_history, termination
 
             move_history.append(list(curr_move))
 
+            if on_move is not None:
+                on_move(self, curr_move, elapsed)
+
             self.apply_move(curr_move)
+
+    @staticmethod
+    def __judge_move(move, move_end, legal_moves):
+        """Return the reason a move loses the game, or None if it is legal
+        and was made in time.
+        """
+        if move_end < 0:
+            return "timeout"
+
+        if move not in legal_moves:
+            if len(legal_moves) > 0:
+                return "forfeit"
+            return "illegal move"
+        return None
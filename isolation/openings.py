@@ -0,0 +1,143 @@
+"""
+Opening suites: fixed sets of balanced starting positions, so that every
+agent in a tournament faces the same openings instead of fresh random ones.
+
+Random openings add variance that only more games can average out: a
+lopsided opening decides the game whatever the agents do. A suite holds
+every distinct opening of a given length once per symmetry class (the
+rotations and reflections of the board give equivalent games), ranked by
+how even a shallow search finds them, and tournaments replay each one
+twice with the colors swapped.
+
+Suites are stored one opening per line as JSON, so they can be curated by
+hand:
+
+    {"width": 7, "height": 7, "moves": [[3, 2], [4, 4]], "score": 0.0}
+
+where "score" is the search value for the player to move after the
+opening. Generate a suite with
+
+    python -m isolation.openings openings.jsonl --count 40 --depth 3
+"""
+import json
+import random
+
+from collections import namedtuple
+
+from .isolation import Board
+from .tablebase import symmetries
+
+Opening = namedtuple("Opening", ["width", "height", "moves", "score"])
+
+
+def canonical_key(board, perms):
+    """Return a key shared by exactly the positions equivalent to `board`
+    under the cell permutations `perms`.
+    """
+    loc_1, loc_2 = board._locs
+    cells = [idx for idx in range(board.width * board.height)
+             if (board._blocked >> idx) & 1]
+    return min((tuple(sorted(perm[idx] for idx in cells)),
+                -1 if loc_1 is None else perm[loc_1],
+                -1 if loc_2 is None else perm[loc_2]) for perm in perms)
+
+
+def distinct_openings(width=7, height=7, plies=2):
+    """Return the move lists of every position reachable in `plies` moves,
+    one per symmetry class, in a fixed order.
+    """
+    perms = symmetries(width, height)
+    level = [((), Board("Player1", "Player2", width, height))]
+    for _ in range(plies):
+        seen = {}
+        for moves, board in level:
+            for move in sorted(board.get_legal_moves()):
+                child = board.forecast_move(move)
+                key = canonical_key(child, perms)
+                if key not in seen:
+                    seen[key] = (moves + (move,), child)
+        level = [seen[key] for key in sorted(seen)]
+    return [moves for moves, board in level if board.get_legal_moves()]
+
+
+def mobility(board):
+    """The difference in legal moves between the player to move and the
+    waiting player.
+    """
+    return float(len(board.get_legal_moves()) -
+                 len(board.get_legal_moves(board.inactive_player)))
+
+
+def evaluate(board, depth, score_fn=mobility, alpha=float("-inf"),
+             beta=float("inf")):
+    """Return the alpha-beta search value of `board` for the player to
+    move, scoring the positions at `depth` plies with score_fn(board).
+    """
+    moves = board.get_legal_moves()
+    if not moves:
+        return float("-inf")
+    if depth <= 0:
+        return score_fn(board)
+    for move in sorted(moves):
+        value = -evaluate(board.forecast_move(move), depth - 1, score_fn,
+                          -beta, -alpha)
+        if value > alpha:
+            alpha = value
+            if alpha >= beta:
+                break
+    return alpha
+
+
+def generate_suite(count, width=7, height=7, plies=2, depth=3,
+                   score_fn=mobility, seed=0):
+    """Return up to `count` Openings of `plies` moves, one per symmetry
+    class, most balanced (search value closest to zero) first; ties are
+    broken by a shuffle seeded with `seed`.
+    """
+    rng = random.Random(seed)
+    scored = []
+    for moves in distinct_openings(width, height, plies):
+        board = Board("Player1", "Player2", width, height)
+        for move in moves:
+            board.apply_move(move)
+        score = evaluate(board, depth, score_fn) or 0.  # no -0.0
+        scored.append((abs(score), rng.random(),
+                       Opening(width, height, [list(m) for m in moves],
+                               score)))
+    scored.sort(key=lambda item: item[:2])
+    return [opening for _, _, opening in scored[:count]]
+
+
+def save_suite(path, openings):
+    with open(path, "w") as f:
+        for opening in openings:
+            f.write(json.dumps(opening._asdict()) + "\n")
+
+
+def load_suite(path):
+    """Read the Openings of a suite file, skipping blank lines."""
+    with open(path) as f:
+        return [Opening(**json.loads(line)) for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Generate a suite of balanced, symmetry-distinct "
+                    "openings.")
+    parser.add_argument("path", help="output suite file (JSON lines)")
+    parser.add_argument("--count", type=int, default=40)
+    parser.add_argument("--plies", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=3,
+                        help="search depth of the balance evaluation")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    suite = generate_suite(args.count, args.width, args.height, args.plies,
+                           args.depth, seed=args.seed)
+    save_suite(args.path, suite)
+    print("{} openings, scores {:+.1f} to {:+.1f}".format(
+        len(suite), min(o.score for o in suite), max(o.score for o in suite)))
@@ -0,0 +1,189 @@
+"""
+Perft: count the leaf nodes of the game tree to a fixed depth, as a check
+that a Board backend generates exactly the moves of the reference rules and
+as a raw move-generation benchmark.
+
+A backend is any class with the constructor and public interface of
+`isolation.Board`. Positions are described by their geometry and the moves
+played from the empty board, so every backend rebuilds them by replaying
+the moves through its own apply_move(). The seeded positions always
+include the empty board (neither player has moved, so every blank cell is
+a legal move) and the board after one ply (only player 1 has moved), which
+are the special cases of the move generator.
+
+`compare()` walks two backends through the same tree in lockstep and
+reports the first move sequence after which their legal moves or their
+`_board_state` lists (blocked cells, initiative bit and both locations)
+differ, which pinpoints a bug that a mismatched leaf count only reveals.
+
+    python -m isolation.perft --depth 3 --positions 6
+    python -m isolation.perft --backend mypackage.fastboard:Board
+"""
+import importlib
+import random
+import timeit
+
+from collections import namedtuple
+
+from . import reference
+from .isolation import Board
+
+# Board classes checked by default; the reference comes first
+BACKENDS = {"reference": reference.Board, "bitboard": Board}
+
+# Board sizes of the seeded positions, as (width, height)
+SIZES = ((7, 7), (5, 5), (6, 4))
+
+# A position: the board geometry and the moves played from the empty board
+Position = namedtuple("Position", ["width", "height", "moves"])
+
+
+def load_backend(spec):
+    """Return the Board class named by "module:Class" or a BACKENDS key."""
+    if spec in BACKENDS:
+        return BACKENDS[spec]
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name or "Board")
+
+
+def build(backend, position):
+    """Return a `backend` board with the position's moves applied."""
+    board = backend("Player1", "Player2", position.width, position.height)
+    for move in position.moves:
+        board.apply_move(move)
+    return board
+
+
+def positions(count, seed=0, sizes=SIZES):
+    """Return `count` positions: the empty board and the board after one
+    ply on each size, then boards after random plies with moves left.
+    """
+    rng = random.Random(seed)
+    result = []
+    for width, height in sizes:
+        result.append(Position(width, height, ()))
+        result.append(Position(width, height, ((height // 2, width // 2),)))
+    while len(result) < count:
+        width, height = rng.choice(sizes)
+        board = Board("Player1", "Player2", width, height)
+        moves = []
+        for _ in range(rng.randint(2, width * height // 3)):
+            legal = board.get_legal_moves()
+            if not legal:
+                break
+            moves.append(rng.choice(sorted(legal)))
+            board.apply_move(moves[-1])
+        if board.get_legal_moves():
+            result.append(Position(width, height, tuple(moves)))
+    return result[:count]
+
+
+def perft(board, depth):
+    """Return the number of positions reached after exactly `depth` plies;
+    games that end earlier do not count.
+    """
+    moves = board.get_legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    return sum(perft(board.forecast_move(move), depth - 1) for move in moves)
+
+
+def divide(board, depth):
+    """Return {move: perft count below it} for each legal move."""
+    return {move: perft(board.forecast_move(move), depth - 1)
+            for move in board.get_legal_moves()}
+
+
+def compare(board, other, depth, line=()):
+    """Walk two boards built by build() through the same tree and return
+    (moves played, description) at the first difference, or None.
+    """
+    state, other_state = board._board_state, other._board_state
+    if state != other_state:
+        return line, "_board_state {} != {}".format(state, other_state)
+    moves = sorted(board.get_legal_moves())
+    other_moves = sorted(other.get_legal_moves())
+    if moves != other_moves:
+        return line, "legal moves {} != {}".format(moves, other_moves)
+    for player in ("Player1", "Player2"):
+        loc = board.get_player_location(player)
+        other_loc = other.get_player_location(player)
+        if loc != other_loc:
+            return line, "location {} != {}".format(loc, other_loc)
+    if depth <= 0:
+        return None
+    for move in moves:
+        found = compare(board.forecast_move(move), other.forecast_move(move),
+                        depth - 1, line + (move,))
+        if found:
+            return found
+    return None
+
+
+def run(backend, cases, depth):
+    """Return (leaf counts, seconds) of `backend` over the positions."""
+    counts = []
+    start = timeit.default_timer()
+    for position in cases:
+        counts.append(perft(build(backend, position), depth))
+    return counts, timeit.default_timer() - start
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Count leaf nodes to a fixed depth for each backend.")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--positions", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", action="append", default=[],
+                        metavar="MODULE:CLASS",
+                        help="also check this Board class (repeatable)")
+    parser.add_argument("--compare-depth", type=int, default=2,
+                        help="depth of the lockstep state comparison")
+    args = parser.parse_args()
+
+    backends = dict(BACKENDS)
+    for spec in args.backend:
+        backends[spec] = load_backend(spec)
+    cases = positions(args.positions, args.seed)
+
+    results = {name: run(cls, cases, args.depth)
+               for name, cls in backends.items()}
+    expected = results["reference"][0]
+    failed = False
+    print("{:<4}{:<8}{:>6}  {}".format("#", "size", "plies", "  ".join(
+        "{:>12}".format(name[:12]) for name in backends)))
+    for i, position in enumerate(cases):
+        print("{:<4}{:<8}{:>6}  {}".format(
+            i, "{}x{}".format(position.width, position.height),
+            len(position.moves), "  ".join(
+                "{:>12}".format(results[name][0][i]) for name in backends)))
+
+    print("\n{:<16}{:>14}{:>10}{:>14}".format("backend", "nodes", "secs",
+                                             "nodes/sec"))
+    for name, (counts, secs) in results.items():
+        mark = ""
+        if counts != expected:
+            mark, failed = "  MISMATCH", True
+        print("{:<16}{:>14}{:>10.2f}{:>14,.0f}{}".format(
+            name[:15], sum(counts), secs, sum(counts) / max(secs, 1e-9), mark))
+
+    for name, cls in backends.items():
+        if cls is reference.Board:
+            continue
+        for i, position in enumerate(cases):
+            found = compare(build(reference.Board, position),
+                            build(cls, position), args.compare_depth)
+            if found:
+                failed = True
+                print("{} differs in position {} after {}: {}".format(
+                    name, i, list(found[0]), found[1]))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main())
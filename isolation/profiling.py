@@ -0,0 +1,239 @@
+"""
+Opt-in profiling of games: where does the time go between move generation,
+heuristics, board copies and the agents themselves?
+
+While a `Profiler` is active (as a context manager) the public Board
+primitives are replaced by timed wrappers, and every agent passed to
+`Board.play(profiler=...)` is timed per call of get_move() together with
+its score function. Timings are kept per call path, so each primitive is
+attributed to the agent whose search called it:
+
+    profiler = Profiler()
+    with profiler:
+        game.play(profiler=profiler)
+    print(profiler.report())
+    profiler.write_collapsed("game.folded")   # input for flamegraph.pl
+
+Paths are rooted at the agent's name (see Profiler.name()), or "(game)"
+for the calls made by Board.play itself. The collapsed-stack output holds
+the self time of each path in microseconds.
+
+Pass `sample_interval` to also run a sampling profiler that records the
+Python stack of the profiled thread at that interval (in seconds); those
+samples are written with `write_collapsed(path, samples=True)` and cover
+the agents' own code, which the timers do not see.
+
+The timers are installed on the Board class itself, not on particular
+boards or players, so while a profiler is active every board in the
+process is timed, and every call is charged to the profiler. A profiler
+records the thread that entered it; games must not be played concurrently
+in other threads while it is active.
+
+Timing every primitive is expensive: in benchmarks/profiling_overhead.py
+games between node-limited alpha-beta agents run 2 to 3 times slower
+with the timers. With `timers=False` only each get_move() call is timed
+and nothing is patched, which together with the sampler costs a few
+percent and can be left on in long-running tournaments.
+"""
+import os
+import sys
+import threading
+import timeit
+
+from collections import defaultdict
+from functools import wraps
+
+from .isolation import Board
+
+# Board methods replaced by timed wrappers while a profiler is active
+BOARD_PRIMITIVES = (
+    "apply_move", "copy", "forecast_move", "get_blank_spaces",
+    "get_legal_moves", "get_opponent", "get_player_location",
+    "get_reachable_area", "get_second_order_mobility", "is_loser",
+    "is_winner", "move_is_legal", "utility",
+)
+
+GAME_ROOT = "(game)"
+
+_clock = timeit.default_timer
+
+
+class Profiler(object):
+    """Counters and timers for board primitives and agent calls.
+
+    Parameters
+    ----------
+    sample_interval : float (optional)
+        If set, also sample the Python stack of the profiled thread every
+        `sample_interval` seconds.
+
+    timers : bool (optional)
+        If False, the board primitives and score functions are not timed,
+        only the agents' get_move() calls.
+
+    Attributes
+    ----------
+    stats : dict
+        Maps each call path (a tuple of names) to [calls, total seconds,
+        self seconds].
+
+    samples : dict
+        Maps collapsed Python stacks to their sample counts.
+    """
+
+    def __init__(self, sample_interval=None, timers=True):
+        self.sample_interval = sample_interval
+        self.timers = timers
+        self.stats = defaultdict(lambda: [0, 0., 0.])
+        self.samples = defaultdict(int)
+        self._names = {}
+        self._stack = []        # [path, start, child seconds] per open call
+        self._saved = {}
+        self._wrapped_scores = []
+        self._wrapper_codes = set()
+        self._thread = None
+        self._sampler = None
+        self._stop = threading.Event()
+
+    def name(self, player, label):
+        """Set the label under which a player's calls are reported;
+        otherwise the player's class name is used.
+        """
+        self._names[id(player)] = label
+
+    def _label(self, player):
+        return self._names.get(id(player), type(player).__name__)
+
+    def _enter(self, name):
+        parent = self._stack[-1][0] if self._stack else (GAME_ROOT,)
+        self._stack.append([parent + (name,), _clock(), 0.])
+
+    def _exit(self):
+        path, start, children = self._stack.pop()
+        elapsed = _clock() - start
+        entry = self.stats[path]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += elapsed - children
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def _timed(self, name, fn):
+        enter, exit = self._enter, self._exit
+
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            enter(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                exit()
+
+        self._wrapper_codes.add(timed.__code__)
+        return timed
+
+    def call_agent(self, player, game, time_left):
+        """Call player.get_move(game, time_left), timing it and the calls
+        it makes under the player's label; used by Board.play().
+        """
+        score = getattr(player, "score", None)
+        if self.timers and callable(score) and \
+                getattr(score, "__code__", None) not in self._wrapper_codes \
+                and "score" in getattr(player, "__dict__", ()):
+            name = "score:" + getattr(score, "__name__", "score")
+            player.score = self._timed(name, score)
+            self._wrapped_scores.append((player, score))
+
+        # agent calls start a new root, even when nested in a game call
+        outer, self._stack = self._stack, [[(self._label(player),), 0., 0.]]
+        try:
+            self._enter("get_move")
+            try:
+                return player.get_move(game, time_left)
+            finally:
+                self._exit()
+        finally:
+            self._stack = outer
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._thread)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                if code not in self._wrapper_codes:
+                    names.append("{}:{}".format(
+                        os.path.basename(code.co_filename)[:-3], code.co_name))
+                frame = frame.f_back
+            stack = self._stack
+            root = stack[0][0][0] if stack else GAME_ROOT
+            self.samples[";".join([root] + names[::-1])] += 1
+
+    def __enter__(self):
+        for name in BOARD_PRIMITIVES if self.timers else ():
+            method = getattr(Board, name)
+            self._saved[name] = method
+            setattr(Board, name, self._timed(name, method))
+        self._thread = threading.get_ident()
+        if self.sample_interval:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_loop,
+                                             daemon=True)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        for name, method in self._saved.items():
+            setattr(Board, name, method)
+        self._saved.clear()
+        for player, score in self._wrapped_scores:
+            player.score = score
+        self._wrapped_scores = []
+
+    def breakdown(self):
+        """Return {agent: {function: (calls, inclusive s, self s)}}, where
+        inclusive time is not counted twice for recursive calls.
+        """
+        table = defaultdict(lambda: defaultdict(lambda: [0, 0., 0.]))
+        for path, (calls, total, own) in self.stats.items():
+            entry = table[path[0]][path[-1]]
+            entry[0] += calls
+            entry[2] += own
+            if path[-1] not in path[1:-1]:
+                entry[1] += total
+        return {agent: {fn: tuple(v) for fn, v in fns.items()}
+                for agent, fns in table.items()}
+
+    def report(self):
+        """Return the breakdown as a text table, slowest functions first."""
+        lines = ["{:<16}{:<28}{:>10}{:>12}{:>12}{:>11}".format(
+            "agent", "function", "calls", "incl (ms)", "self (ms)", "us/call")]
+        for agent, fns in sorted(self.breakdown().items()):
+            for fn, (calls, total, own) in sorted(
+                    fns.items(), key=lambda item: -item[1][2]):
+                lines.append(
+                    "{:<16}{:<28}{:>10}{:>12.1f}{:>12.1f}{:>11.2f}".format(
+                        agent[:15], fn[:27], calls, 1000 * total, 1000 * own,
+                        1e6 * total / calls))
+        return "\n".join(lines)
+
+    def collapsed(self, samples=False):
+        """Return lines in the collapsed-stack format of flamegraph.pl:
+        self microseconds per timed path, or counts per sampled stack.
+        """
+        if samples:
+            return ["{} {}".format(stack, count)
+                    for stack, count in sorted(self.samples.items())]
+        return ["{} {}".format(";".join(path), int(round(1e6 * own)))
+                for path, (_, _, own) in sorted(self.stats.items())]
+
+    def write_collapsed(self, path, samples=False):
+        with open(path, "w") as f:
+            for line in self.collapsed(samples):
+                f.write(line + "\n")
@@ -0,0 +1,234 @@
+"""
+Store game results in an indexed SQLite database for later analysis.
+
+A `ResultsStore` records games through the same `on_move` hook as a
+MoveFeed, but keeps one row per game and one row per move instead of a
+stream of events:
+
+    store = ResultsStore("results.db")
+    recorder = store.record(game, "AB_Improved", "Random")
+    winner, history, termination = game.play(on_move=recorder)
+    recorder.finish(winner, termination)
+    store.close()
+
+Finished games are buffered and written `batch_size` at a time in a single
+transaction, so recording costs almost nothing per game; close() (or
+flush()) writes the rest. The schema is:
+
+    games(id, run, player_1, player_2, width, height, start_ply,
+          opening_1, opening_2, winner, winner_seat, termination, plies)
+    moves(game_id, ply, seat, row, col, elapsed, nodes, depth)
+    agent_games     -- a view with one row per game and agent: game_id,
+                       run, agent, opponent, seat, won, termination,
+                       plies, opening_1, opening_2
+
+`opening_1` and `opening_2` are the locations ("row,col") of players 1 and
+2 when the game was recorded, i.e., the opening moves of games that start
+after one random move each; `start_ply` is the number of moves already
+played. `elapsed` is in milliseconds, and `nodes` and `depth` are the
+`nodes` and `completed_depth` attributes of the player after the move,
+where it has them. Games are indexed by agent pair (in either seat),
+opening and termination, so questions such as
+
+    SELECT avg(termination = 'timeout' AND NOT won) FROM agent_games
+    WHERE agent = 'AB_Custom_2' AND opening_1 = '3,3'
+
+are answered without scanning every game. Run
+`python -m isolation.results results.db [SQL]` for a per-agent summary
+or the rows of a query.
+"""
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    run TEXT,
+    player_1 TEXT NOT NULL,
+    player_2 TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    start_ply INTEGER NOT NULL,
+    opening_1 TEXT,
+    opening_2 TEXT,
+    winner TEXT NOT NULL,
+    winner_seat INTEGER NOT NULL,
+    termination TEXT NOT NULL,
+    plies INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS moves (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    ply INTEGER NOT NULL,
+    seat INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    elapsed REAL NOT NULL,
+    nodes INTEGER,
+    depth INTEGER,
+    PRIMARY KEY (game_id, ply)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS games_pair ON games (player_1, player_2);
+CREATE INDEX IF NOT EXISTS games_pair_2 ON games (player_2, player_1);
+CREATE INDEX IF NOT EXISTS games_opening ON games (opening_1, opening_2);
+CREATE INDEX IF NOT EXISTS games_termination ON games (termination);
+CREATE VIEW IF NOT EXISTS agent_games AS
+    SELECT id AS game_id, run, player_1 AS agent, player_2 AS opponent,
+           1 AS seat, winner_seat = 1 AS won, termination, plies,
+           opening_1, opening_2 FROM games
+    UNION ALL
+    SELECT id, run, player_2, player_1, 2, winner_seat = 2, termination,
+           plies, opening_1, opening_2 FROM games;
+"""
+
+SUMMARY = """
+SELECT agent, count(*), avg(won), avg(termination = 'timeout' AND NOT won),
+       avg(termination = 'forfeit' AND NOT won), avg(plies)
+FROM agent_games GROUP BY agent ORDER BY avg(won) DESC
+"""
+
+
+def _cell(loc):
+    return None if loc is None else "{},{}".format(*loc)
+
+
+class ResultsStore(object):
+    """Write game and move rows to a SQLite database in batches.
+
+    Parameters
+    ----------
+    path : str
+        The database file; created with the schema if it does not exist.
+
+    run : str (optional)
+        A label stored with every game, by default the local time at which
+        the store was opened.
+
+    batch_size : int (optional)
+        The number of finished games written per transaction.
+    """
+
+    def __init__(self, path, run=None, batch_size=100):
+        self.path = path
+        self.run = run or time.strftime("%Y-%m-%d %H:%M:%S")
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._pending = []
+
+    def record(self, board, name_1="Player1", name_2="Player2"):
+        """Return a GameRecorder for a game starting from the current
+        position of `board`, to pass as `Board.play(on_move=...)`.
+        """
+        return GameRecorder(self, board, name_1, name_2)
+
+    def add(self, game, moves):
+        """Queue one game row (a dict of the games columns except id and
+        run) and its move rows (tuples of ply, seat, row, col, elapsed,
+        nodes, depth); full batches are written immediately.
+        """
+        self._pending.append((game, moves))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write every queued game in one transaction."""
+        if not self._pending:
+            return
+        with self._conn:
+            for game, moves in self._pending:
+                cursor = self._conn.execute(
+                    "INSERT INTO games (run, player_1, player_2, width, "
+                    "height, start_ply, opening_1, opening_2, winner, "
+                    "winner_seat, termination, plies) VALUES (?, ?, ?, ?, ?, "
+                    "?, ?, ?, ?, ?, ?, ?)",
+                    (self.run, game["player_1"], game["player_2"],
+                     game["width"], game["height"], game["start_ply"],
+                     game["opening_1"], game["opening_2"], game["winner"],
+                     game["winner_seat"], game["termination"],
+                     game["plies"]))
+                game_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(game_id,) + move for move in moves])
+        self._pending = []
+
+    def query(self, sql, params=()):
+        """Flush queued games, then return the rows of a query."""
+        self.flush()
+        return self._conn.execute(sql, params).fetchall()
+
+    def summary(self):
+        """Return (agent, games, win rate, timeout rate, forfeit rate,
+        mean plies) rows, strongest agent first.
+        """
+        return self.query(SUMMARY)
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameRecorder(object):
+    """Collect the moves of one game for a ResultsStore; see
+    ResultsStore.record().
+    """
+
+    def __init__(self, store, board, name_1, name_2):
+        self.store = store
+        self.names = (name_1, name_2)
+        self._players = (board._player_1, board._player_2)
+        self.game = {
+            "player_1": name_1, "player_2": name_2,
+            "width": board.width, "height": board.height,
+            "start_ply": board.move_count,
+            "opening_1": _cell(board.get_player_location(self._players[0])),
+            "opening_2": _cell(board.get_player_location(self._players[1])),
+        }
+        self.moves = []
+        self.plies = board.move_count
+
+    def __call__(self, board, move, elapsed):
+        player = board.active_player
+        seat = 1 if player is self._players[0] else 2
+        self.moves.append((board.move_count, seat, move[0], move[1],
+                           round(elapsed, 3), getattr(player, "nodes", None),
+                           getattr(player, "completed_depth", None)))
+        self.plies = board.move_count + 1
+
+    def finish(self, winner, termination):
+        """Queue the game given the values returned by play()."""
+        seat = 1 if winner is self._players[0] else 2
+        self.game.update(winner=self.names[seat - 1], winner_seat=seat,
+                         termination=termination, plies=self.plies)
+        self.store.add(self.game, self.moves)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Summarize or query a game results database.")
+    parser.add_argument("path", help="SQLite results database")
+    parser.add_argument("sql", nargs="?", help="a query to run instead of "
+                                               "the per-agent summary")
+    args = parser.parse_args()
+
+    with ResultsStore(args.path) as store:
+        if args.sql:
+            for row in store.query(args.sql):
+                print("\t".join(str(value) for value in row))
+        else:
+            print("{:<14}{:>8}{:>8}{:>10}{:>10}{:>8}".format(
+                "agent", "games", "won", "timeouts", "forfeits", "plies"))
+            for agent, games, won, timeouts, forfeits, plies in \
+                    store.summary():
+                print("{:<14}{:>8}{:>7.1f}%{:>9.1f}%{:>9.1f}%{:>8.1f}".format(
+                    agent, games, 100 * won, 100 * timeouts, 100 * forfeits,
+                    plies))
@@ -0,0 +1,182 @@
+"""
+Run a player in a persistent worker process so that a runaway agent can be
+preempted at its move deadline instead of stalling the game.
+
+`ProcessPlayer` wraps a player factory and can be registered on a `Board`
+like any other player. Each call to `get_move()` sends the position to the
+worker as a compact binary record (see `Board.to_bytes()`) together with the
+remaining time, then waits no longer than the deadline for the reply. If the
+worker has not answered by then it is killed and replaced, and `get_move()`
+returns after the timer has expired so that `Board.play()` records the loss
+as a "timeout". The worker, and the agent instance inside it, are reused
+for every move of every game until the player is closed.
+
+Example:
+
+    from functools import partial
+    from game_agent import AlphaBetaPlayer
+    from isolation import Board
+    from isolation.sandbox import ProcessPlayer
+
+    with ProcessPlayer(partial(AlphaBetaPlayer, search_depth=5)) as p1, \\
+            ProcessPlayer(AlphaBetaPlayer) as p2:
+        winner, history, termination = Board(p1, p2).play()
+"""
+import multiprocessing
+import timeit
+import traceback
+
+from .isolation import Board, RECORD_HEADER
+
+TERMINATE_GRACE_SECONDS = 0.05
+
+
+class _Opponent(object):
+    """Stand-in for the player on the other side of the board, which only
+    exists in the parent process.
+    """
+    def get_move(self, game, time_left):
+        raise RuntimeError("The opponent cannot move inside a sandbox worker.")
+
+
+def _worker_main(conn, factory):
+    """Serve move requests from the parent process until told to stop."""
+    agent = factory()
+    opponent = _Opponent()
+    time_millis = lambda: 1000 * timeit.default_timer()
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        data, budget = request
+        move_start = time_millis()
+        time_left = lambda: budget - (time_millis() - move_start)
+        turn = RECORD_HEADER.unpack_from(data)[2]
+        players = (opponent, agent) if turn else (agent, opponent)
+        try:
+            game = Board.from_bytes(data, *players)
+            move = agent.get_move(game, time_left)
+            conn.send(("move", None if move is None else tuple(move)))
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+
+
+class ProcessPlayer(object):
+    """Player that forwards every move request to an agent constructed by
+    `factory` inside a persistent worker process.
+
+    Parameters
+    ----------
+    factory : callable
+        A picklable zero-argument callable (e.g., a player class or a
+        functools.partial) that returns the agent to run in the worker.
+
+    context : multiprocessing context (optional)
+        The context used to start workers; defaults to the platform default.
+
+    Attributes
+    ----------
+    timeouts : int
+        The number of times the worker was preempted at the deadline.
+
+    last_error : str or None
+        The traceback of the most recent exception raised by the agent. A
+        move request that raised is answered with (-1, -1), which forfeits
+        the game.
+    """
+
+    def __init__(self, factory, context=None):
+        self.factory = factory
+        self.context = context or multiprocessing.get_context()
+        self.timeouts = 0
+        self.last_error = None
+        self._process = None
+        self._conn = None
+
+    def _start(self):
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(target=_worker_main,
+                                       args=(child_conn, self.factory),
+                                       daemon=True)
+        process.start()
+        child_conn.close()
+        self._process, self._conn = process, parent_conn
+
+    def _kill(self):
+        if self._process is None:
+            return
+        self._conn.close()
+        self._process.terminate()
+        self._process.join(TERMINATE_GRACE_SECONDS)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._process = self._conn = None
+
+    def get_move(self, game, time_left):
+        """Ask the worker for a move, returning no later than the deadline.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn.
+
+        Returns
+        -------
+        (int, int) or None
+            The worker's move, (-1, -1) if the agent raised an exception or
+            the worker died, or None if the worker was preempted at the
+            deadline.
+        """
+        if self._process is None:
+            self._start()
+
+        try:
+            self._conn.send((game.to_bytes(), time_left()))
+            while True:
+                remaining = time_left()
+                if remaining < 0:
+                    break
+                if self._conn.poll(remaining / 1000.):
+                    status, value = self._conn.recv()
+                    if status == "move":
+                        return value
+                    self.last_error = value
+                    return (-1, -1)
+        except (EOFError, OSError):
+            self.last_error = "Sandbox worker exited unexpectedly."
+            self._kill()
+            self._start()
+            return (-1, -1)
+
+        # Deadline passed: preempt the worker and have a fresh one ready
+        # before the next request so the restart is not charged to a move
+        self.timeouts += 1
+        self._kill()
+        self._start()
+        return Board.NOT_MOVED
+
+    def close(self):
+        """Stop the worker process."""
+        if self._process is not None:
+            try:
+                self._conn.send(None)
+            except (OSError, ValueError):
+                pass
+            self._process.join(TERMINATE_GRACE_SECONDS)
+            self._kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
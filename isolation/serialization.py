@@ -0,0 +1,166 @@
+"""
+Bulk readers and writers for files of binary position records as produced
+by `Board.to_bytes()`. A position file is simply the concatenation of its
+records, so files can be appended to, split, or streamed between processes
+without any framing.
+
+NumPy is only required by `load_arrays()`, and is imported on first use.
+"""
+from .isolation import (Board, RECORD_HEADER, NO_LOCATION, record_size,
+                        validate_position)
+
+
+def write_positions(path, boards, mode="wb"):
+    """Write the positions of an iterable of boards to a file.
+
+    Parameters
+    ----------
+    path : str
+        Destination file name.
+
+    boards : iterable<isolation.Board>
+        The positions to store.
+
+    mode : str (optional)
+        File mode; use "ab" to append to an existing position file.
+
+    Returns
+    -------
+    int
+        The number of records written.
+    """
+    count = 0
+    with open(path, mode) as f:
+        for board in boards:
+            f.write(board.to_bytes())
+            count += 1
+    return count
+
+
+def iter_boards(data, player_1, player_2):
+    """Decode every record in a buffer, yielding one board per record.
+
+    Runs of records that share a geometry are decoded by copying a template
+    board, which skips Board.__init__ for all but the first record of the
+    run. Raises ValueError for truncated or invalid records.
+
+    Parameters
+    ----------
+    data : bytes-like
+        The concatenated binary records.
+
+    player_1 : object
+        The object to register as the first player on every board.
+
+    player_2 : object
+        The object to register as the second player on every board.
+    """
+    view = memoryview(data)
+    offset = 0
+    header_size = RECORD_HEADER.size
+    geometry = None
+    while offset < len(view):
+        if offset + header_size > len(view):
+            raise ValueError("Truncated board record at offset {}.".format(offset))
+        width, height, turn, move_count, loc_1, loc_2 = \
+            RECORD_HEADER.unpack_from(view, offset)
+        if not width or not height:
+            raise ValueError("Invalid board size {}x{} at offset {}.".format(
+                width, height, offset))
+        if geometry != (width, height):
+            geometry = (width, height)
+            size = record_size(width, height)
+            template = Board(player_1, player_2, width=width, height=height)
+        if offset + size > len(view):
+            raise ValueError("Truncated board record at offset {}.".format(offset))
+        blocked = int.from_bytes(view[offset + header_size:offset + size],
+                                 "little")
+        locs = (None if loc_1 == NO_LOCATION else loc_1,
+                None if loc_2 == NO_LOCATION else loc_2)
+        validate_position(width, height, turn, locs, blocked)
+        board = template.copy()
+        board._blocked = blocked
+        board._locs = locs
+        board._turn = turn
+        board.move_count = move_count
+        offset += size
+        yield board
+
+
+def load_boards(path, player_1, player_2):
+    """Read a position file into a list of boards.
+
+    Parameters
+    ----------
+    path : str
+        A file of binary position records.
+
+    player_1 : object
+        The object to register as the first player on every board.
+
+    player_2 : object
+        The object to register as the second player on every board.
+
+    Returns
+    -------
+    list<isolation.Board>
+        One board per record, in file order.
+    """
+    with open(path, "rb") as f:
+        return list(iter_boards(f.read(), player_1, player_2))
+
+
+def load_arrays(path):
+    """Decode a position file of a single board geometry into NumPy arrays
+    without constructing any Board objects.
+
+    Parameters
+    ----------
+    path : str
+        A file of binary position records that all share one geometry.
+
+    Returns
+    -------
+    dict
+        "occupancy": bool array of shape (N, height, width), True for
+            blocked cells;
+        "locations": int array of shape (N, 2, 2) holding the (row, column)
+            of player 1 and player 2, or (-1, -1) for an unmoved player;
+        "turn": uint8 array of shape (N,), 0 when player 1 is to move;
+        "move_count": uint16 array of shape (N,).
+    """
+    import numpy as np
+
+    raw = np.fromfile(path, dtype=np.uint8)
+    if not raw.size:
+        raise ValueError("Empty position file: {}".format(path))
+    width, height = int(raw[0]), int(raw[1])
+    size = record_size(width, height)
+    if raw.size % size:
+        raise ValueError("Position file does not hold records of a single "
+                         "{}x{} geometry: {}".format(width, height, path))
+    records = raw.reshape(-1, size)
+    if (records[:, 0] != width).any() or (records[:, 1] != height).any():
+        raise ValueError("Position file mixes board geometries: {}".format(path))
+
+    header = records[:, :RECORD_HEADER.size].copy().view(np.dtype([
+        ("width", "u1"), ("height", "u1"), ("turn", "u1"),
+        ("move_count", "<u2"), ("loc_1", "<u2"), ("loc_2", "<u2")]))[:, 0]
+
+    # Cell index i is stored in bit (i % 8) of byte (i // 8), and cells are
+    # numbered in column-major order, so unpack then transpose to (row, col)
+    bits = np.unpackbits(records[:, RECORD_HEADER.size:], axis=1,
+                         bitorder="little")[:, :width * height]
+    occupancy = bits.reshape(-1, width, height).transpose(0, 2, 1).astype(bool)
+
+    locs = np.stack([header["loc_1"], header["loc_2"]], axis=1).astype(np.int32)
+    moved = locs != NO_LOCATION
+    locations = np.where(moved[..., None],
+                         np.stack([locs % height, locs // height], axis=-1),
+                         -1)
+    return {
+        "occupancy": occupancy,
+        "locations": locations,
+        "turn": header["turn"].copy(),
+        "move_count": header["move_count"].astype(np.uint16),
+    }
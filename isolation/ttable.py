@@ -0,0 +1,352 @@
+"""
+Fixed-size transposition tables that can be shared between processes or
+kept on disk between runs.
+
+Entries are packed into a flat buffer of 24-byte records, grouped in
+buckets of `WAYS` consecutive slots. `EntryTable` implements lookups and
+replacement over any writable buffer; `SharedTranspositionTable` places one
+in `multiprocessing.shared_memory` so that every search process on a host
+can attach to it by name, and `DiskTranspositionTable` memory-maps one
+from a file so that search results survive from one run to the next.
+
+The table is lock-free: each record stores its position key XORed with a
+checksum of its payload, so a record torn by two processes writing at the
+same time simply fails to match on the next probe and is treated as a miss.
+"""
+import atexit
+import inspect
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from collections import namedtuple
+from hashlib import blake2b
+
+EXACT, LOWER, UPPER = 1, 2, 3
+NO_MOVE = 0xFFFF
+WAYS = 4
+
+KEY_MASK = (1 << 64) - 1
+
+# key ^ checksum, value, depth, flag, (padding), move index, age
+ENTRY = struct.Struct("<QdhBxHH")
+FLAG_OFFSET = 18
+
+# magic, capacity (entries), ways, age of the current run
+HEADER = struct.Struct("<8sQIH2x")
+MAGIC = b"ISOTT003"
+
+_DOUBLE = struct.Struct("<d")
+_QWORD = struct.Struct("<Q")
+
+# board size, player locations, side to move and salt hashed by
+# position_key
+_KEY_FIELDS = struct.Struct("<HHiiBQ")
+
+Entry = namedtuple("Entry", ["value", "depth", "flag", "move", "age"])
+
+
+def position_key(board, salt=0):
+    """Return a 64-bit key for the position on a board: the first 8 bytes
+    of a BLAKE2b digest of the board size, blocked cells, player
+    locations, side to move and salt. The key is the same in every process
+    and interpreter version, so tables can be shared between processes and
+    kept on disk.
+
+    Parameters
+    ----------
+    board : isolation.Board
+        The position to key.
+
+    salt : int (optional)
+        Mixed into the key to keep separate namespaces (e.g., different
+        evaluation functions) apart in the same table.
+    """
+    loc_1, loc_2 = board._locs
+    data = _KEY_FIELDS.pack(board.width, board.height,
+                            -1 if loc_1 is None else loc_1,
+                            -1 if loc_2 is None else loc_2, board._turn,
+                            salt & KEY_MASK) + \
+        board._blocked.to_bytes((board._blocked.bit_length() + 7) // 8,
+                                "little")
+    return _QWORD.unpack(blake2b(data, digest_size=8).digest())[0]
+
+
+def name_salt(name):
+    """Return a salt derived from a string that is stable across processes."""
+    return zlib.crc32(name.encode("utf-8"))
+
+
+def function_salt(fn):
+    """Return a salt identifying a score function by its name, code and
+    bound arguments, so that cached values from a function that has since
+    been edited (or from a partial with other weights) are never reused.
+    Wrappers made with functools.wraps (e.g., the profiler's timers) are
+    looked through, so they do not change the salt.
+    """
+    fn = inspect.unwrap(fn)
+    if hasattr(fn, "func"):  # functools.partial
+        return name_salt(repr((function_salt(fn.func), fn.args,
+                               sorted(fn.keywords.items()))))
+    code = getattr(fn, "__code__", None)
+    body = b"" if code is None else code.co_code + repr(code.co_consts).encode()
+    name = getattr(fn, "__qualname__", type(fn).__name__)
+    return zlib.crc32(body, name_salt(name))
+
+
+def _checksum(value, depth, flag, move, age):
+    bits = _QWORD.unpack(_DOUBLE.pack(value))[0]
+    return bits ^ ((depth & 0xFFFF) << 48) ^ (flag << 40) ^ (move << 16) ^ age
+
+
+class EntryTable(object):
+    """Set-associative table of fixed-size search entries over a buffer.
+
+    Parameters
+    ----------
+    buffer : writable buffer
+        Memory holding `capacity` entries starting at `offset`.
+
+    capacity : int
+        The number of entries; rounded down to a multiple of WAYS.
+
+    offset : int (optional)
+        Byte offset of the first entry in the buffer.
+
+    Attributes
+    ----------
+    probes, hits, stores : int
+        Counters for the calls made through this object (i.e., for the
+        current process).
+    """
+
+    def __init__(self, buffer, capacity, offset=0):
+        self.buffer = buffer
+        self.offset = offset
+        self.buckets = max(1, capacity // WAYS)
+        self.capacity = self.buckets * WAYS
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    @staticmethod
+    def size_for(capacity):
+        """Return the number of bytes needed for `capacity` entries."""
+        return max(WAYS, capacity - capacity % WAYS) * ENTRY.size
+
+    def _slots(self, key):
+        start = self.offset + (key % self.buckets) * WAYS * ENTRY.size
+        return range(start, start + WAYS * ENTRY.size, ENTRY.size)
+
+    def _read(self, pos, key):
+        stored, value, depth, flag, move, age = ENTRY.unpack_from(self.buffer, pos)
+        if flag and stored ^ _checksum(value, depth, flag, move, age) == key:
+            return Entry(value, depth, flag, move, age)
+        return None
+
+    def probe(self, key):
+        """Return the Entry stored for a key, or None."""
+        self.probes += 1
+        for pos in self._slots(key):
+            entry = self._read(pos, key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+        return None
+
+    def touch(self, key, age):
+        """Refresh the age stamp of a stored key; returns False if absent."""
+        for pos in self._slots(key):
+            entry = self._read(pos, key)
+            if entry is not None:
+                self._write(pos, key, entry._replace(age=age))
+                return True
+        return False
+
+    def store(self, key, value, depth, flag, move=NO_MOVE, age=0,
+              prefer="depth"):
+        """Store an entry, replacing the same key if present, else an empty
+        slot, else the least valuable entry of the bucket.
+
+        Parameters
+        ----------
+        prefer : str (optional)
+            "depth" replaces the shallowest entry (ties broken by age), while
+            "age" replaces the least recently stored or touched entry, with
+            ages compared modulo 2**16 relative to `age`.
+        """
+        self.stores += 1
+        victim, victim_rank = None, None
+        for pos in self._slots(key):
+            stored, v, d, f, m, a = ENTRY.unpack_from(self.buffer, pos)
+            if not f:
+                victim, victim_rank = pos, (-1, -1)
+                break
+            if stored ^ _checksum(v, d, f, m, a) == key:
+                if depth < d:
+                    # keep the deeper result for this position
+                    self._write(pos, key, Entry(v, d, f, m, age))
+                    return
+                victim = pos
+                break
+            stale = (age - a) & 0xFFFF
+            rank = (d, -stale) if prefer == "depth" else (-stale, d)
+            if victim_rank is None or rank < victim_rank:
+                victim, victim_rank = pos, rank
+        self._write(victim, key, Entry(value, depth, flag, move, age))
+
+    def _write(self, pos, key, entry):
+        value, depth, flag, move, age = entry
+        ENTRY.pack_into(self.buffer, pos,
+                        key ^ _checksum(value, depth, flag, move, age),
+                        value, depth, flag, move, age)
+
+    def occupancy(self):
+        """Return the fraction of slots holding an entry."""
+        start = self.offset + FLAG_OFFSET
+        used = sum(1 for i in range(self.capacity)
+                   if self.buffer[start + i * ENTRY.size])
+        return used / self.capacity
+
+    def stats(self):
+        """Return this process's probe counters as a dict."""
+        return {"probes": self.probes, "hits": self.hits,
+                "stores": self.stores,
+                "hit_rate": self.hits / self.probes if self.probes else 0.}
+
+
+class SharedTranspositionTable(EntryTable):
+    """A transposition table in a named shared memory block.
+
+    Create the table once, then attach to it from other processes with
+    `SharedTranspositionTable.attach(name)`; tables passed to worker
+    processes as arguments reattach automatically when unpickled.
+
+    Parameters
+    ----------
+    capacity : int (optional)
+        The number of entries (24 bytes each).
+
+    name : str (optional)
+        The shared memory block name; chosen by the system if None.
+    """
+
+    def __init__(self, capacity=1 << 20, name=None, _shm=None):
+        from multiprocessing import shared_memory
+
+        if _shm is None:
+            size = HEADER.size + EntryTable.size_for(capacity)
+            _shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            _shm.buf[:size] = bytes(size)
+            HEADER.pack_into(_shm.buf, 0, MAGIC,
+                             EntryTable.size_for(capacity) // ENTRY.size,
+                             WAYS, 0)
+            self._owner = True
+        else:
+            self._owner = False
+        magic, capacity, ways, _ = HEADER.unpack_from(_shm.buf, 0)
+        if magic != MAGIC or ways != WAYS:
+            raise ValueError("Shared memory block {!r} is not a transposition "
+                             "table.".format(_shm.name))
+        self._shm = _shm
+        super().__init__(_shm.buf, capacity, offset=HEADER.size)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a table created by another process."""
+        from multiprocessing import shared_memory
+
+        if sys.version_info >= (3, 13):
+            # only the creator unlinks the block
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(_shm=shm)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __reduce__(self):
+        return (SharedTranspositionTable.attach, (self.name,))
+
+    def close(self):
+        """Detach from the table, and destroy it if this object created it."""
+        self.buffer = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class DiskTranspositionTable(EntryTable):
+    """A transposition table memory-mapped from a file, so that results
+    found in one run are available to the next.
+
+    The file is created on first use and keeps its size afterwards, which
+    bounds the cache. Each opening of the file starts a new age; entries
+    found or stored during a run take its age, and a full bucket evicts its
+    entry unused for the most runs. Changes are flushed to disk by close(),
+    which also runs at interpreter exit.
+
+    Parameters
+    ----------
+    path : str
+        The cache file.
+
+    capacity : int (optional)
+        The number of entries (24 bytes each) of a new file; an existing
+        file keeps the capacity it was created with.
+    """
+
+    def __init__(self, path, capacity=1 << 20):
+        self.path = path
+        size = HEADER.size + EntryTable.size_for(capacity)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, size)
+                os.pwrite(fd, HEADER.pack(MAGIC, EntryTable.size_for(capacity)
+                                          // ENTRY.size, WAYS, 0), 0)
+            self._map = mmap.mmap(fd, 0)
+        finally:
+            os.close(fd)
+        magic, capacity, ways, age = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or ways != WAYS or \
+                len(self._map) != HEADER.size + capacity * ENTRY.size:
+            self._map.close()
+            raise ValueError("{!r} is not a transposition table "
+                             "file.".format(path))
+        self.age = (age + 1) & 0xFFFF
+        HEADER.pack_into(self._map, 0, MAGIC, capacity, ways, self.age)
+        super().__init__(self._map, capacity, offset=HEADER.size)
+        atexit.register(self.close)
+
+    def probe(self, key):
+        entry = super().probe(key)
+        if entry is not None and entry.age != self.age:
+            self.touch(key, self.age)
+        return entry
+
+    def store(self, key, value, depth, flag, move=NO_MOVE, age=None,
+              prefer="age"):
+        super().store(key, value, depth, flag, move,
+                      self.age if age is None else age, prefer)
+
+    def __reduce__(self):
+        return (DiskTranspositionTable, (self.path,))
+
+    def flush(self):
+        """Write the changes made so far back to the file."""
+        if self.buffer is not None:
+            self._map.flush()
+
+    def close(self):
+        """Flush and unmap the file; the table cannot be used afterwards."""
+        if self.buffer is None:
+            return
+        self.flush()
+        self.buffer = None
+        self._map.close()
+        atexit.unregister(self.close)
@@ -0,0 +1,243 @@
+"""
+Play thousands of independent Isolation games at once with NumPy.
+
+`BatchSimulator` keeps every game as rows of NumPy arrays (blocked cells,
+player locations, side to move) and advances all unfinished games by one
+ply per step under a simple policy for each seat:
+
+    "random"  a uniformly random legal move (like sample_players.RandomPlayer)
+    "greedy"  the move leaving the mover the most legal moves (like
+              sample_players.GreedyPlayer, with ties broken at random
+              instead of by move order)
+
+It is meant for baseline statistics and rollouts, where the scalar Board
+spends most of its time creating objects rather than playing:
+
+    sim = BatchSimulator(10000, policies=("greedy", "random"), seed=0)
+    result = sim.run(sample_rate=0.05)
+    print(result["wins"] / 10000.)
+
+Cells are numbered column-major (index = row + column * height) as in
+isolation.Board, and sampled positions use the array layout returned by
+isolation.serialization.load_arrays(). This module requires NumPy.
+"""
+import numpy as np
+
+from .isolation import knight_graph
+
+POLICIES = ("random", "greedy")
+
+
+class BatchSimulator(object):
+    """A batch of Isolation games advanced in lockstep.
+
+    Parameters
+    ----------
+    count : int
+        The number of games, all starting from the empty board.
+
+    width, height : int (optional)
+        The board geometry shared by every game.
+
+    policies : (str, str) (optional)
+        The policy of player 1 and of player 2; see POLICIES.
+
+    seed : int (optional)
+        Seed for the simulator's random generator.
+
+    Attributes
+    ----------
+    blocked : bool array of shape (count, width * height + 1)
+        Blocked cells of each game by cell index; the extra last column is
+        always True and stands for moves off the board.
+
+    locations : int array of shape (count, 2)
+        Cell index of player 1 and player 2, or -1 before their first move.
+
+    turn : int array of shape (count,)
+        0 when player 1 is to move.
+
+    move_count : int array of shape (count,)
+
+    winner : int array of shape (count,)
+        0 or 1 for the seat that won a finished game, -1 while it is on.
+    """
+
+    def __init__(self, count, width=7, height=7, policies=("random", "random"),
+                 seed=None):
+        for policy in policies:
+            if policy not in POLICIES:
+                raise ValueError("Unknown policy: {!r}".format(policy))
+        self.width = width
+        self.height = height
+        self.policies = tuple(policies)
+        self.rng = np.random.default_rng(seed)
+
+        size = width * height
+        graph = knight_graph(width, height)
+        # moves[i] holds the targets of a knight on cell i, padded with the
+        # off-board cell `size`, which also has no moves of its own
+        self.moves = np.full((size + 1, 8), size, dtype=np.intp)
+        for idx in range(size):
+            targets = [t for t, _ in graph.targets[idx]]
+            self.moves[idx, :len(targets)] = targets
+
+        self.blocked = np.zeros((count, size + 1), dtype=bool)
+        self.blocked[:, size] = True
+        self.locations = np.full((count, 2), -1, dtype=np.intp)
+        self.turn = np.zeros(count, dtype=np.intp)
+        self.move_count = np.zeros(count, dtype=np.intp)
+        self.winner = np.full(count, -1, dtype=np.intp)
+
+    @classmethod
+    def from_positions(cls, arrays, policies=("random", "random"), seed=None):
+        """Create a batch that continues from positions in the layout of
+        isolation.serialization.load_arrays() (e.g., for rollouts).
+        """
+        count, height, width = arrays["occupancy"].shape
+        sim = cls(count, width, height, policies, seed)
+        # (N, height, width) -> column-major cell index
+        sim.blocked[:, :-1] = arrays["occupancy"].transpose(0, 2, 1).reshape(
+            count, -1)
+        rows, cols = arrays["locations"][..., 0], arrays["locations"][..., 1]
+        sim.locations[:] = np.where(rows >= 0, rows + cols * height, -1)
+        sim.turn[:] = arrays["turn"]
+        sim.move_count[:] = arrays["move_count"]
+        return sim
+
+    @property
+    def active(self):
+        """Boolean mask of the games that are not finished."""
+        return self.winner < 0
+
+    def step(self):
+        """Play one ply in every unfinished game, ending the games whose
+        side to move has no legal move, and return the number of games
+        still in progress.
+        """
+        games = np.flatnonzero(self.active)
+        if not games.size:
+            return 0
+        here = self.locations[games, self.turn[games]]
+        opening = here < 0
+        seat_policy = np.array(self.policies)[self.turn[games]]
+        for policy in POLICIES:
+            for first in (False, True):
+                subset = games[(seat_policy == policy) & (opening == first)]
+                if subset.size:
+                    self._move(subset, policy, first)
+        return int(self.active.sum())
+
+    def _move(self, games, policy, first):
+        seat = self.turn[games]
+        if first:
+            # an unmoved player may move to any blank cell
+            targets = np.broadcast_to(np.arange(self.blocked.shape[1] - 1),
+                                      (games.size, self.blocked.shape[1] - 1))
+        else:
+            targets = self.moves[self.locations[games, seat]]
+        legal = ~self.blocked[games[:, None], targets]
+
+        if policy == "greedy":
+            # moving to a cell never blocks a knight move from that cell, so
+            # the mobility after the move is the open targets of the cell
+            open_after = ~self.blocked[games[:, None, None], self.moves[targets]]
+            score = open_after.sum(axis=2) + self.rng.random(targets.shape)
+        else:
+            score = self.rng.random(targets.shape)
+        score[~legal] = -1.
+
+        stuck = ~legal.any(axis=1)
+        self.winner[games[stuck]] = 1 - seat[stuck]
+
+        moving = ~stuck
+        games, seat = games[moving], seat[moving]
+        choice = targets[moving, score[moving].argmax(axis=1)]
+        self.locations[games, seat] = choice
+        self.blocked[games, choice] = True
+        self.turn[games] = 1 - seat
+        self.move_count[games] += 1
+
+    def positions(self, games=None):
+        """Return positions of the selected games (all by default) as a dict
+        of arrays in the layout of isolation.serialization.load_arrays().
+        """
+        if games is None:
+            games = np.arange(self.blocked.shape[0])
+        count = len(games)
+        occupancy = self.blocked[games, :-1].reshape(
+            count, self.width, self.height).transpose(0, 2, 1)
+        locs = self.locations[games]
+        locations = np.where((locs >= 0)[..., None],
+                             np.stack([locs % self.height, locs // self.height],
+                                      axis=-1), -1)
+        return {
+            "occupancy": occupancy.copy(),
+            "locations": locations,
+            "turn": self.turn[games].astype(np.uint8),
+            "move_count": self.move_count[games].astype(np.uint16),
+        }
+
+    def run(self, sample_rate=0.):
+        """Play every game to the end.
+
+        Parameters
+        ----------
+        sample_rate : float (optional)
+            Before each ply, every unfinished game's position is kept as a
+            sample with this probability.
+
+        Returns
+        -------
+        dict
+            "wins": int array [player 1 wins, player 2 wins];
+            "winner": int array of the winning seat (0 or 1) of each game;
+            "plies": int array of the number of moves made in each game;
+            "samples": the sampled positions in the layout of positions().
+        """
+        samples = []
+        while True:
+            if sample_rate > 0:
+                active = np.flatnonzero(self.active)
+                picked = active[self.rng.random(active.size) < sample_rate]
+                if picked.size:
+                    samples.append(self.positions(picked))
+            if not self.step():
+                break
+        if samples:
+            samples = {key: np.concatenate([s[key] for s in samples])
+                       for key in samples[0]}
+        else:
+            samples = self.positions(np.arange(0))
+        return {
+            "wins": np.bincount(self.winner, minlength=2),
+            "winner": self.winner.copy(),
+            "plies": self.move_count.copy(),
+            "samples": samples,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import timeit
+
+    parser = argparse.ArgumentParser(
+        description="Play a batch of games between two simple policies.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--size", type=int, nargs=2, default=[7, 7],
+                        metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--policies", nargs=2, default=["greedy", "random"],
+                        choices=POLICIES)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    start = timeit.default_timer()
+    sim = BatchSimulator(args.games, args.size[0], args.size[1],
+                         args.policies, args.seed)
+    result = sim.run()
+    elapsed = timeit.default_timer() - start
+    print("player 1 ({}) won {:.1%}, player 2 ({}) won {:.1%}".format(
+        args.policies[0], result["wins"][0] / args.games,
+        args.policies[1], result["wins"][1] / args.games))
+    print("{:.1f} plies per game, {:,.0f} games/sec".format(
+        result["plies"].mean(), args.games / elapsed))
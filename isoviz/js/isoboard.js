@@ -0,0 +1,111 @@
+/*
+ * isoboard.js
+ *
+ * Minimal renderer for Isolation boards of any size. Squares reuse the
+ * chessboard.js stylesheet, so games look the same as the original 7x7
+ * viewer. Cells are addressed by [row, column] exactly as in isolation.Board.
+ *
+ *   var board = IsoBoard('board');
+ *   board.reset(7, 7, {locations: [[3, 3], null], blocked: []});
+ *   board.move(2, [1, 2]);
+ *   board.finalize(1);
+ */
+;(function() {
+'use strict';
+
+var CSS = {
+  board: 'board-b72b1',
+  clearfix: 'clearfix-7da63',
+  piece: 'piece-417db',
+  row: 'row-5277c',
+  square: 'square-55d63',
+  white: 'white-1e1d7',
+  black: 'black-3c85d'
+};
+
+var PIECES = {1: 'img/chesspieces/wikipedia/wN.png',
+              2: 'img/chesspieces/wikipedia/bN.png'};
+
+window['IsoBoard'] = function(containerId) {
+  var container = document.getElementById(containerId);
+  var cells = [];
+  var locations = {1: null, 2: null};
+  var squareSize = 0;
+
+  function cell(loc) {
+    return cells[loc[0]][loc[1]];
+  }
+
+  function draw(loc, player) {
+    var el = cell(loc);
+    el.innerHTML = '<img class="' + CSS.piece + '" src="' + PIECES[player] +
+      '" style="width: ' + squareSize + 'px; height: ' + squareSize + 'px">';
+  }
+
+  var widget = {};
+
+  // Build an empty width x height board and place the starting position
+  widget.reset = function(width, height, start) {
+    var containerWidth = container.clientWidth || 600;
+    squareSize = Math.floor((containerWidth - 1) / Math.max(width, height));
+    locations = {1: null, 2: null};
+    cells = [];
+
+    var html = '<div class="' + CSS.board + '" style="width: ' +
+      (squareSize * width) + 'px">';
+    for (var r = 0; r < height; r++) {
+      html += '<div class="' + CSS.row + '">';
+      for (var c = 0; c < width; c++) {
+        var color = (r + c) % 2 === 0 ? CSS.white : CSS.black;
+        html += '<div class="' + CSS.square + ' ' + color + '" ' +
+          'style="width: ' + squareSize + 'px; height: ' + squareSize +
+          'px" data-cell="' + r + ',' + c + '"></div>';
+      }
+      html += '<div class="' + CSS.clearfix + '"></div></div>';
+    }
+    html += '</div>';
+    container.innerHTML = html;
+
+    for (r = 0; r < height; r++) {
+      cells.push([]);
+    }
+    var squares = container.getElementsByClassName(CSS.square);
+    for (var i = 0; i < squares.length; i++) {
+      var rc = squares[i].getAttribute('data-cell').split(',');
+      cells[parseInt(rc[0], 10)][parseInt(rc[1], 10)] = squares[i];
+    }
+
+    start = start || {};
+    (start.blocked || []).forEach(function(loc) {
+      cell(loc).classList.add('blocked');
+    });
+    (start.locations || []).forEach(function(loc, i) {
+      if (loc) {
+        locations[i + 1] = loc;
+        draw(loc, i + 1);
+      }
+    });
+  };
+
+  // Move a player (1 or 2) to a cell, blocking the cell it leaves
+  widget.move = function(player, loc) {
+    var prev = locations[player];
+    if (prev) {
+      cell(prev).innerHTML = '';
+      cell(prev).classList.add('blocked');
+    }
+    locations[player] = loc;
+    draw(loc, player);
+  };
+
+  // Mark the final squares of the winning (1 or 2) and losing players
+  widget.finalize = function(winner) {
+    var loser = winner === 1 ? 2 : 1;
+    if (locations[winner]) cell(locations[winner]).classList.add('win');
+    if (locations[loser]) cell(locations[loser]).classList.add('lose');
+  };
+
+  return widget;
+};
+
+})();
@@ -0,0 +1,303 @@
+"""Rate any set of registered agents by self-play in an open-ended league.
+
+Unlike tournament.py, which plays a fixed grid of matches and reports raw
+win rates, the league keeps scheduling game pairs (the same random opening
+played twice with the colors swapped) among the selected agents, runs them
+on a process pool, and refits Bradley-Terry ratings on the Elo scale after
+every batch. Each new batch goes to the pairings whose rating difference is
+least certain, and the league stops once every agent's 95% confidence
+interval is narrower than the target.
+
+Every finished game is appended to a JSON-lines results file, so a league
+can be interrupted and resumed later from the same file.
+
+With `--shared-tt ENTRIES`, every worker attaches to one transposition
+table in shared memory, so the alpha-beta agents reuse positions already
+searched in other games (typically the common openings); per-process hit
+rates and the table occupancy are reported after every batch.
+
+Example:
+
+    python league.py --agents Random Greedy AB_Improved AB_Custom \\
+        --results league.jsonl --target-ci 50
+"""
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+
+from collections import namedtuple
+
+from isolation import Board
+from isolation.ttable import SharedTranspositionTable
+from tournament import AGENTS, TIME_LIMIT
+
+GameJob = namedtuple("GameJob", ["player_1", "player_2", "opening",
+                                 "time_limit", "width", "height"])
+
+Rating = namedtuple("Rating", ["name", "elo", "ci", "games", "wins"])
+
+ELO_SCALE = 400. / math.log(10)  # Elo points per unit of log-strength
+Z_95 = 1.96
+
+# Agents are constructed once per seat in each worker process and reused for
+# every game, so an agent can play against another instance of itself
+_agent_cache = {}
+
+# The shared transposition table this worker process is attached to, if any
+_ttable = None
+
+
+def _attach_table(table):
+    global _ttable
+    _ttable = table
+
+
+def _get_agent(name, seat):
+    if (name, seat) not in _agent_cache:
+        agent = AGENTS[name]()
+        if _ttable is not None and hasattr(agent, "ttable"):
+            agent.ttable = _ttable
+        _agent_cache[(name, seat)] = agent
+    return _agent_cache[(name, seat)]
+
+
+def random_opening(width=7, height=7, plies=2):
+    """Return a list of `plies` random legal opening moves."""
+    game = Board("player_1", "player_2", width=width, height=height)
+    opening = []
+    for _ in range(plies):
+        move = random.choice(game.get_legal_moves())
+        game.apply_move(move)
+        opening.append(move)
+    return opening
+
+
+def play_game(job):
+    """Play one game described by a GameJob and return its result record."""
+    player_1 = _get_agent(job.player_1, 0)
+    player_2 = _get_agent(job.player_2, 1)
+    game = Board(player_1, player_2, width=job.width, height=job.height)
+    for move in job.opening:
+        game.apply_move(tuple(move))
+    winner, history, termination = game.play(time_limit=job.time_limit)
+    record = {
+        "player_1": job.player_1,
+        "player_2": job.player_2,
+        "opening": [list(move) for move in job.opening],
+        "winner": job.player_1 if winner is player_1 else job.player_2,
+        "termination": termination,
+        "moves": len(history),
+    }
+    if _ttable is not None:
+        record["ttable"] = dict(_ttable.stats(), pid=os.getpid())
+    return record
+
+
+def load_results(path):
+    """Read the game records stored in a league results file."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def fit_ratings(results, names, prior=1., iterations=200, tol=1e-6):
+    """Fit Bradley-Terry strengths to a list of game records.
+
+    Strengths are found with the minorization-maximization algorithm of
+    Hunter (2004). Each agent also plays `prior` virtual wins and losses
+    against a reference opponent of average strength so that unbeaten or
+    winless agents still receive finite ratings.
+
+    Parameters
+    ----------
+    results : list<dict>
+        Game records with "player_1", "player_2" and "winner" fields.
+
+    names : list<str>
+        The agents to rate; records involving other agents are ignored.
+
+    Returns
+    -------
+    list<Rating>
+        One rating per agent with its Elo (mean zero), the half-width of a
+        95% confidence interval, and the games played and won.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+    wins = [prior] * n
+    games = [[0] * n for _ in range(n)]
+    played = [0] * n
+    won = [0] * n
+    for record in results:
+        i = index.get(record["player_1"])
+        j = index.get(record["player_2"])
+        if i is None or j is None or i == j:
+            continue
+        games[i][j] += 1
+        games[j][i] += 1
+        played[i] += 1
+        played[j] += 1
+        k = index[record["winner"]]
+        wins[k] += 1
+        won[k] += 1
+
+    gamma = [1.] * n
+    for _ in range(iterations):
+        new = []
+        for i in range(n):
+            denom = 2 * prior / (gamma[i] + 1.)
+            denom += sum(games[i][j] / (gamma[i] + gamma[j])
+                         for j in range(n) if games[i][j])
+            new.append(wins[i] / denom)
+        # Normalize to a geometric mean of one to keep the scale fixed
+        norm = math.exp(sum(math.log(g) for g in new) / n)
+        new = [g / norm for g in new]
+        delta = max(abs(math.log(a / b)) for a, b in zip(new, gamma))
+        gamma = new
+        if delta < tol:
+            break
+
+    ratings = []
+    for i, name in enumerate(names):
+        info = 2 * prior * gamma[i] / (gamma[i] + 1.) ** 2
+        info += sum(games[i][j] * gamma[i] * gamma[j] /
+                    (gamma[i] + gamma[j]) ** 2 for j in range(n) if games[i][j])
+        ci = Z_95 * ELO_SCALE / math.sqrt(info)
+        ratings.append(Rating(name, ELO_SCALE * math.log(gamma[i]), ci,
+                              played[i], won[i]))
+    return ratings
+
+
+def schedule_pairings(ratings, count):
+    """Choose `count` pairings, favoring the pairs whose rating difference
+    has the widest confidence interval.
+
+    The uncertainty of a pair is the combined interval of both ratings,
+    weighted by the Bernoulli variance of the predicted game result so that
+    near-even pairings (which carry the most information) are preferred.
+    """
+    candidates = []
+    for a in range(len(ratings)):
+        for b in range(a + 1, len(ratings)):
+            ra, rb = ratings[a], ratings[b]
+            expected = 1. / (1. + 10 ** ((rb.elo - ra.elo) / 400.))
+            spread = math.sqrt(ra.ci ** 2 + rb.ci ** 2)
+            weight = spread * math.sqrt(expected * (1. - expected))
+            candidates.append((weight, random.random(), ra.name, rb.name))
+    candidates.sort(reverse=True)
+    return [(a, b) for _, _, a, b in
+            itertools.islice(itertools.cycle(candidates), count)]
+
+
+def print_ratings(ratings, total_games):
+    print("\n{:^13}{:>8}{:>9}{:>8}{:>8}".format(
+        "Agent", "Elo", "+/-95%", "Games", "Score"))
+    for r in sorted(ratings, key=lambda r: -r.elo):
+        score = "{:.1f}%".format(100. * r.wins / r.games) if r.games else "-"
+        print("{:^13}{:>8.0f}{:>9.0f}{:>8}{:>8}".format(
+            r.name, r.elo, r.ci, r.games, score))
+    print("{} games played".format(total_games))
+
+
+def print_table_stats(records, table):
+    """Print the latest table counters reported by each worker process."""
+    latest = {}
+    for record in records:
+        if "ttable" in record:
+            latest[record["ttable"]["pid"]] = record["ttable"]
+    for pid, stats in sorted(latest.items()):
+        print("  worker {:>7}: {:>9} probes, {:5.1f}% hits".format(
+            pid, stats["probes"], 100. * stats["hit_rate"]))
+    print("  shared table occupancy: {:.1f}% of {} entries".format(
+        100. * table.occupancy(), table.capacity))
+
+
+def run_league(names, results_path=None, processes=None, target_ci=50.,
+               max_games=2000, time_limit=TIME_LIMIT, width=7, height=7,
+               tt_entries=0):
+    """Play scheduled game pairs among the named agents until every rating
+    is known to within `target_ci` Elo (95% confidence) or `max_games`
+    games have been played, including games loaded from `results_path`.
+
+    If `tt_entries` is positive, the workers share a transposition table
+    of that many entries for the duration of the league.
+
+    Returns
+    -------
+    list<Rating>
+        The final ratings of the named agents.
+    """
+    unknown = [name for name in names if name not in AGENTS]
+    if unknown:
+        raise ValueError("Unregistered agents: {}".format(", ".join(unknown)))
+    if len(names) < 2:
+        raise ValueError("A league needs at least two agents.")
+
+    results = load_results(results_path)
+    ratings = fit_ratings(results, names)
+    processes = processes or multiprocessing.cpu_count()
+    batch_pairs = max(1, processes)
+
+    table = SharedTranspositionTable(tt_entries) if tt_entries > 0 else None
+    pool = multiprocessing.Pool(processes, _attach_table, (table,))
+    try:
+        while len(results) < max_games and \
+                max(r.ci for r in ratings) > target_ci:
+            jobs = []
+            for a, b in schedule_pairings(ratings, batch_pairs):
+                opening = random_opening(width, height)
+                jobs.append(GameJob(a, b, opening, time_limit, width, height))
+                jobs.append(GameJob(b, a, opening, time_limit, width, height))
+
+            batch = pool.map(play_game, jobs)
+            results.extend(batch)
+            if results_path:
+                with open(results_path, "a") as f:
+                    for record in batch:
+                        f.write(json.dumps(record) + "\n")
+
+            ratings = fit_ratings(results, names)
+            print_ratings(ratings, len(results))
+            if table is not None:
+                print_table_stats(batch, table)
+    finally:
+        pool.close()
+        pool.join()
+        if table is not None:
+            table.close()
+    return ratings
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--agents", nargs="+", default=list(AGENTS),
+                        choices=list(AGENTS), help="registered agents to rate")
+    parser.add_argument("--results", default=None,
+                        help="JSON-lines file to resume from and append to")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--target-ci", type=float, default=50.,
+                        help="stop when every 95%% interval is within this "
+                             "many Elo points")
+    parser.add_argument("--max-games", type=int, default=2000)
+    parser.add_argument("--time-limit", type=int, default=TIME_LIMIT,
+                        help="milliseconds per move")
+    parser.add_argument("--shared-tt", type=int, default=0, metavar="ENTRIES",
+                        help="share a transposition table of this many "
+                             "entries (24 bytes each) between the workers")
+    args = parser.parse_args()
+
+    ratings = run_league(args.agents, args.results, args.processes,
+                         args.target_ci, args.max_games, args.time_limit,
+                         tt_entries=args.shared_tt)
+    print_ratings(ratings, sum(r.games for r in ratings) // 2)
+
+
+if __name__ == "__main__":
+    main()
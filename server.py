@@ -0,0 +1,417 @@
+"""Serve agent-vs-agent matches from a pool of warm worker processes.
+
+The server listens on a localhost TCP socket and speaks newline-delimited
+JSON. Each request line is an object with an "op" field:
+
+    {"op": "match", "player_1": "AB_Improved", "player_2": "Random",
+     "time_limit": 150, "width": 7, "height": 7, "opening": [[3, 3]]}
+
+        Queue a match between two registered agents (see tournament.AGENTS).
+        Every field except the player names is optional. The time limit
+        must be a positive number of milliseconds up to the server's
+        maximum, each board dimension at most MAX_SIZE, and every opening
+        move legal. A request that breaks these rules gets an "error"
+        reply; otherwise the server replies
+        with a "queued" message, one "move" message per ply as the game is
+        played, and a final "result" message:
+
+        {"type": "queued", "id": 12, "queue_depth": 3}
+        {"type": "move", "id": 12, "ply": 0, "player": 1, "move": [2, 4],
+         "elapsed": 103.2}
+        {"type": "result", "id": 12, "winner": "AB_Improved",
+         "termination": "forfeit", "moves": [[3, 3], [2, 4], ...]}
+
+        If the match queue is full the request is rejected immediately with
+        {"type": "error", "error": "busy"}, so clients can back off instead
+        of piling up work.
+
+    {"op": "metrics"}
+
+        Report queue depth, worker utilization and request counters.
+
+Requests on one connection are handled in order; open several connections
+to run matches concurrently. Moves wait in a bounded backlog for clients
+that read slowly; a client whose backlog overflows is disconnected, and
+the match still runs to its end on the worker. Worker processes
+construct each agent once and reuse it for every match, so matches pay no
+import or warm-up cost.
+
+Example:
+
+    python server.py --port 8765 --workers 4 --max-queue 64
+"""
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import multiprocessing
+import traceback
+
+from isolation import Board
+from tournament import AGENTS, TIME_LIMIT
+
+DEFAULT_PORT = 8765
+MAX_TIME_LIMIT = 10000  # default longest move time a client may request
+MAX_SIZE = 15  # longest board side a client may request
+
+# Put in a client's message backlog in place of the messages it could not
+# keep up with
+_LAGGING = {"type": "lagging"}
+
+
+def _worker_main(conn, preload):
+    """Play matches sent by the server, streaming each move back."""
+    agents = {}
+
+    def get_agent(name, seat):
+        if (name, seat) not in agents:
+            agents[(name, seat)] = AGENTS[name]()
+        return agents[(name, seat)]
+
+    for name in preload:
+        get_agent(name, 0)
+        get_agent(name, 1)
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        try:
+            player_1 = get_agent(job["player_1"], 0)
+            player_2 = get_agent(job["player_2"], 1)
+            game = Board(player_1, player_2, width=job["width"],
+                         height=job["height"])
+            for move in job["opening"]:
+                game.apply_move(tuple(move))
+
+            def on_move(board, move, elapsed):
+                conn.send({"type": "move", "ply": board.move_count,
+                           "player": 1 if board.active_player is player_1 else 2,
+                           "move": list(move), "elapsed": round(elapsed, 3)})
+
+            winner, history, termination = game.play(
+                time_limit=job["time_limit"], on_move=on_move)
+            conn.send({"type": "result",
+                       "winner": job["player_1"] if winner is player_1
+                       else job["player_2"],
+                       "termination": termination,
+                       "moves": [list(m) for m in job["opening"]] + history})
+        except Exception:
+            conn.send({"type": "error", "error": traceback.format_exc()})
+
+
+class _Worker(object):
+    """A worker process and the parent end of its pipe."""
+
+    def __init__(self, context, preload):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main,
+                                       args=(child_conn, preload), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+
+class MatchServer(object):
+    """Accept match requests over a localhost socket and run them on a pool
+    of warm worker processes.
+
+    Parameters
+    ----------
+    workers : int (optional)
+        The number of worker processes (default: one per core).
+
+    max_queue : int (optional)
+        The number of matches allowed to wait for a worker before new
+        requests are rejected as busy.
+
+    preload : list<str> (optional)
+        Registered agent names to construct in every worker at startup.
+
+    max_backlog : int (optional)
+        The number of messages of a match allowed to wait for a client
+        that reads slowly before the client is disconnected.
+
+    max_time_limit : numeric (optional)
+        The longest time limit per move (in milliseconds) a match may
+        request, which bounds how long one match can hold a worker.
+    """
+
+    def __init__(self, workers=None, max_queue=64, preload=(),
+                 max_backlog=256, max_time_limit=MAX_TIME_LIMIT):
+        self.num_workers = workers or multiprocessing.cpu_count()
+        self.max_queue = max_queue
+        self.max_backlog = max_backlog
+        self.max_time_limit = max_time_limit
+        self.preload = list(preload)
+        self.metrics = {"accepted": 0, "rejected": 0, "completed": 0,
+                        "failed": 0, "moves": 0, "connections": 0,
+                        "dropped": 0}
+        self._ids = itertools.count(1)
+        self._context = multiprocessing.get_context()
+        self._queue = None
+        self._busy = 0
+        self._tasks = []
+        self._workers = []
+        self._executor = None
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Start the workers and begin listening; returns the bound port."""
+        self._queue = asyncio.Queue(self.max_queue)
+        self._executor = concurrent.futures.ThreadPoolExecutor(self.num_workers)
+        for _ in range(self.num_workers):
+            worker = _Worker(self._context, self.preload)
+            self._workers.append(worker)
+            self._tasks.append(asyncio.ensure_future(self._dispatch(worker)))
+        self._server = await asyncio.start_server(self._handle_client,
+                                                  host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting connections and shut down the workers."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        for worker in self._workers:
+            worker.conn.close()
+            worker.process.terminate()
+            worker.process.join()
+        self._executor.shutdown(wait=False)
+
+    def snapshot(self):
+        """Return the current metrics as a dict."""
+        stats = dict(self.metrics)
+        stats.update(queue_depth=self._queue.qsize(),
+                     max_queue=self.max_queue,
+                     busy_workers=self._busy,
+                     workers=self.num_workers)
+        return stats
+
+    async def _dispatch(self, worker):
+        """Feed queued matches to one worker, relaying its messages."""
+        loop = asyncio.get_event_loop()
+        while True:
+            job, stream, writer = await self._queue.get()
+            self._busy += 1
+            lagging = False
+            try:
+                worker.conn.send(job)
+                while True:
+                    message = await loop.run_in_executor(self._executor,
+                                                         worker.conn.recv)
+                    message["id"] = job["id"]
+                    if message["type"] == "move":
+                        self.metrics["moves"] += 1
+                    elif message["type"] == "result":
+                        self.metrics["completed"] += 1
+                    else:
+                        self.metrics["failed"] += 1
+                    # the worker keeps playing for a client that fell
+                    # behind, but its messages are discarded
+                    lagging = lagging or \
+                        not self._deliver(stream, writer, message)
+                    if message["type"] != "move":
+                        break
+            except (EOFError, OSError):
+                self.metrics["failed"] += 1
+                if not lagging:
+                    self._deliver(stream, writer,
+                                  {"type": "error", "id": job["id"],
+                                   "error": "worker exited"})
+                worker.process.join()
+                replacement = _Worker(self._context, self.preload)
+                worker.conn, worker.process = replacement.conn, replacement.process
+            finally:
+                self._busy -= 1
+
+    def _deliver(self, stream, writer, message):
+        """Add a message to a client's backlog. If the backlog is full, the
+        client is disconnected without flushing what is buffered for it
+        (which also ends a send stalled on it), the backlog is replaced by
+        the _LAGGING marker, and False is returned.
+        """
+        try:
+            stream.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.metrics["dropped"] += 1
+            writer.transport.abort()
+            while not stream.empty():
+                stream.get_nowait()
+            stream.put_nowait(_LAGGING)
+            return False
+
+    async def _handle_client(self, reader, writer):
+        self.metrics["connections"] += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line.decode())
+                    op = request.get("op")
+                except (ValueError, AttributeError):
+                    request, op = None, None
+
+                if op == "metrics":
+                    await self._send(writer, dict(type="metrics",
+                                                  **self.snapshot()))
+                elif op == "match":
+                    await self._run_match(request, writer)
+                else:
+                    await self._send(writer, {"type": "error",
+                                              "error": "unknown request"})
+        except ConnectionError:
+            pass
+        finally:
+            self.metrics["connections"] -= 1
+            writer.close()
+
+    def _parse_match(self, request):
+        """Return the job for a match request, or raise ValueError if the
+        request names unknown agents or has invalid settings.
+        """
+        names = [request.get("player_1"), request.get("player_2")]
+        unknown = [name for name in names
+                   if not isinstance(name, str) or name not in AGENTS]
+        if unknown:
+            raise ValueError("unregistered agents: {}".format(unknown))
+
+        time_limit = request.get("time_limit", TIME_LIMIT)
+        if not _is_number(time_limit) or \
+                not 0 < time_limit <= self.max_time_limit:
+            raise ValueError("time_limit must be in (0, {}] ms".format(
+                self.max_time_limit))
+        width, height = request.get("width", 7), request.get("height", 7)
+        if not all(_is_number(n) and int(n) == n and 0 < n <= MAX_SIZE
+                   for n in (width, height)):
+            raise ValueError("width and height must be in [1, {}]".format(
+                MAX_SIZE))
+        width, height = int(width), int(height)
+
+        # replay the opening on a scratch board, so that workers only ever
+        # play positions reachable in a game
+        opening = request.get("opening", [])
+        if not isinstance(opening, list):
+            raise ValueError("opening must be a list of moves")
+        game = Board("Player1", "Player2", width=width, height=height)
+        moves = []
+        for move in opening:
+            legal = game.get_legal_moves()
+            if not isinstance(move, list) or tuple(move) not in legal:
+                raise ValueError("illegal opening move: {}".format(move))
+            move = legal[legal.index(tuple(move))]
+            game.apply_move(move)
+            moves.append(list(move))
+
+        return {"id": next(self._ids),
+                "player_1": names[0], "player_2": names[1],
+                "time_limit": time_limit, "width": width, "height": height,
+                "opening": moves}
+
+    async def _run_match(self, request, writer):
+        try:
+            job = self._parse_match(request)
+        except ValueError as e:
+            await self._send(writer, {"type": "error", "error": str(e)})
+            return
+
+        stream = asyncio.Queue(self.max_backlog)
+        try:
+            self._queue.put_nowait((job, stream, writer))
+        except asyncio.QueueFull:
+            self.metrics["rejected"] += 1
+            await self._send(writer, {"type": "error", "error": "busy"})
+            return
+
+        self.metrics["accepted"] += 1
+        await self._send(writer, {"type": "queued", "id": job["id"],
+                                  "queue_depth": self._queue.qsize()})
+        while True:
+            message = await stream.get()
+            if message is _LAGGING:
+                raise ConnectionResetError("client fell behind")
+            await self._send(writer, message)
+            if message["type"] != "move":
+                break
+
+    @staticmethod
+    async def _send(writer, message):
+        writer.write((json.dumps(message) + "\n").encode())
+        await writer.drain()
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+async def request(host, port, message):
+    """Send one request to a running server and yield every reply message
+    until the request is finished (a convenience client for load tests).
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write((json.dumps(message) + "\n").encode())
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            reply = json.loads(line.decode())
+            yield reply
+            if reply["type"] not in ("queued", "move"):
+                break
+    finally:
+        writer.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--max-queue", type=int, default=64,
+                        help="matches allowed to wait before rejecting")
+    parser.add_argument("--max-backlog", type=int, default=256,
+                        help="messages a slow client may fall behind "
+                             "before it is disconnected")
+    parser.add_argument("--max-time-limit", type=float,
+                        default=MAX_TIME_LIMIT,
+                        help="longest move time (ms) a match may request")
+    parser.add_argument("--preload", nargs="*", default=list(AGENTS),
+                        choices=list(AGENTS),
+                        help="agents to construct when workers start")
+    args = parser.parse_args()
+
+    async def serve():
+        server = MatchServer(args.workers, args.max_queue, args.preload,
+                             args.max_backlog, args.max_time_limit)
+        port = await server.start(args.host, args.port)
+        print("Serving matches on {}:{}".format(args.host, port))
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Unit tests for the batch position analyzer."""
+
+import math
+import random
+import unittest
+
+import analyze
+import calibrate
+import isolation
+
+from sample_players import improved_score
+
+
+def minimax_value(game, player, depth):
+    """The plain minimax value of `game` for `player`."""
+    moves = game.get_legal_moves()
+    if not moves:
+        return game.utility(player)
+    if depth == 0:
+        return improved_score(game, player)
+    values = [minimax_value(game.forecast_move(m), player, depth - 1)
+              for m in moves]
+    return max(values) if game.active_player is player else min(values)
+
+
+def positions(count, seed=0):
+    random.seed(seed)  # the order of the legal moves
+    return [isolation.Board.from_bytes(data, 1, 2).to_fen()
+            for data in calibrate.sample_positions(count, seed)]
+
+
+class AnalyzeTest(unittest.TestCase):
+    """Check the analysis of single positions and of batches"""
+
+    def test_best_move_score_and_pv(self):
+        settings = analyze.Settings("AB_Improved", None, 3, None, None,
+                                    1 << 12)
+        fens = positions(5)
+        for result in analyze.run(fens, settings, processes=0):
+            game = isolation.Board.from_fen(result["fen"], "a", "b")
+            self.assertEqual(result["fen"], fens[result["id"]])
+            self.assertEqual(result["depth"], 3)
+            self.assertGreater(result["nodes"], 0)
+            self.assertEqual(tuple(result["pv"][0]), result["move"])
+            self.assertLessEqual(len(result["pv"]), 3)
+            # the line is playable from the position
+            for move in result["pv"]:
+                self.assertIn(tuple(move), game.get_legal_moves())
+                game.apply_move(tuple(move))
+
+    def test_score_is_the_minimax_value(self):
+        settings = analyze.Settings("AB_Improved", None, 3, None, None, 0)
+        fens = positions(12, seed=1)
+        for result in analyze.run(fens, settings, processes=0):
+            game = isolation.Board.from_fen(result["fen"], "a", "b")
+            value = minimax_value(game, game.active_player, 3)
+            if math.isinf(value):
+                self.assertEqual((result["score"], result["result"]),
+                                 (None, "win" if value > 0 else "loss"))
+            else:
+                self.assertEqual(result["score"], value)
+            self.assertEqual(result["pv"], [result["move"]])
+
+    def test_worker_processes_match_in_process_results(self):
+        settings = analyze.Settings("AB_Custom", "sample_players:center_score",
+                                    None, 2000, None, 1 << 12)
+        fens = positions(8, seed=2)
+        local = list(analyze.run(fens, settings, processes=0))
+        pooled = list(analyze.run(fens, settings, processes=2))
+        for result in local + pooled:
+            del result["ms"]
+        self.assertEqual(sorted(pooled, key=lambda r: r["id"]), local)
+
+    def test_unusual_lines(self):
+        lost = isolation.Board("a", "b", 3, 3)
+        for move in [(1, 1), (0, 0)]:
+            lost.apply_move(move)
+        settings = analyze.Settings("MM_Improved", None, 2, None, None, 0)
+        results = list(analyze.run(["not a position", lost.to_fen()],
+                                   settings, processes=0))
+        self.assertIn("error", results[0])
+        self.assertEqual((results[1]["move"], results[1]["result"]),
+                         (None, "loss"))
+        with self.assertRaises(ValueError):
+            analyze.make_searcher(settings._replace(agent="Random"))
+        with self.assertRaises(ValueError):
+            analyze.make_searcher(settings._replace(nodes=100,
+                                                    time_limit=50.))
+
+
+if __name__ == '__main__':
+    unittest.main()
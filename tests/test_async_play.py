@@ -0,0 +1,134 @@
+"""Unit tests for playing games as coroutines with Board.play_async()."""
+
+import asyncio
+import json
+import random
+import timeit
+import unittest
+
+import isolation
+
+from sample_players import GreedyPlayer, RandomPlayer
+
+
+class SleepyPlayer(object):
+    """An async agent that waits `delay` seconds, then plays randomly."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.cancelled = False
+
+    async def get_move(self, game, time_left):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        moves = game.get_legal_moves()
+        return random.choice(moves) if moves else (-1, -1)
+
+
+class RemotePlayer(object):
+    """An async agent that asks a stub agent server for each move."""
+
+    def __init__(self, port):
+        self.port = port
+
+    async def get_move(self, game, time_left):
+        reader, writer = await asyncio.open_connection("127.0.0.1",
+                                                       self.port)
+        try:
+            writer.write((json.dumps(game.get_legal_moves()) + "\n").encode())
+            reply = json.loads((await reader.readline()).decode())
+            return tuple(reply) if reply else (-1, -1)
+        finally:
+            writer.close()
+
+
+async def stub_agent(reader, writer):
+    # answer with the smallest legal move after a short think
+    legal = json.loads((await reader.readline()).decode())
+    await asyncio.sleep(0.002)
+    writer.write((json.dumps(min(legal) if legal else None) + "\n").encode())
+    await writer.drain()
+    writer.close()
+
+
+class PlayAsyncTest(unittest.TestCase):
+    """Check play_async against play() and with concurrent async agents"""
+
+    def test_matches_play_for_blocking_agents(self):
+        from isolation.profiling import Profiler
+
+        for seed in range(5):
+            games = []
+            for use_async in (False, True):
+                random.seed(seed)
+                players = (GreedyPlayer(), RandomPlayer())
+                game = isolation.Board(*players, width=5, height=5)
+                moves = []
+                on_move = lambda board, move, elapsed: moves.append(
+                    (board.move_count, move))
+                with Profiler(timers=False) as profiler:
+                    if use_async:
+                        winner, history, end = asyncio.run(game.play_async(
+                            None, on_move, profiler))
+                    else:
+                        winner, history, end = game.play(None, on_move,
+                                                         profiler)
+                calls = profiler.breakdown()["GreedyPlayer"]["get_move"][0]
+                games.append((players.index(winner), history, end, moves,
+                              calls))
+            self.assertEqual(games[0], games[1])
+
+    def test_many_games_share_one_loop(self):
+        async def scenario():
+            boards = [isolation.Board(SleepyPlayer(0.01), SleepyPlayer(0.01),
+                                      width=5, height=5) for _ in range(200)]
+            return await asyncio.gather(*(board.play_async(time_limit=1000)
+                                          for board in boards))
+
+        start = timeit.default_timer()
+        results = asyncio.run(scenario())
+        elapsed = timeit.default_timer() - start
+        plies = max(len(history) for _, history, _ in results)
+        # one game alone takes plies * 10 ms; 200 in sequence would take
+        # 200 times as long
+        self.assertLess(elapsed, 20 * 0.01 * plies)
+        self.assertTrue(all(end == "illegal move" for _, _, end in results))
+
+    def test_slow_agent_times_out_and_is_cancelled(self):
+        slow, fast = SleepyPlayer(1.), SleepyPlayer(0.)
+        game = isolation.Board(fast, slow)
+        start = timeit.default_timer()
+        winner, history, end = asyncio.run(game.play_async(time_limit=50))
+        self.assertLess(timeit.default_timer() - start, 0.5)
+        self.assertEqual((winner, len(history), end), (fast, 1, "timeout"))
+        self.assertTrue(slow.cancelled)
+
+    def test_remote_agents_behind_a_stub_server(self):
+        async def scenario():
+            server = await asyncio.start_server(stub_agent, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                boards = [isolation.Board(RemotePlayer(port),
+                                          RemotePlayer(port))
+                          for _ in range(50)]
+                for board in boards:
+                    board.apply_move((3, 3))
+                return await asyncio.gather(
+                    *(board.play_async(time_limit=5000) for board in boards))
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        results = asyncio.run(scenario())
+        histories = set(tuple(map(tuple, history))
+                        for _, history, _ in results)
+        # every game follows the same smallest-move line to its end
+        self.assertEqual(len(histories), 1)
+        self.assertEqual(set(end for _, _, end in results), {"illegal move"})
+
+
+if __name__ == '__main__':
+    unittest.main()
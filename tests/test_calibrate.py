@@ -0,0 +1,77 @@
+"""Unit tests for the timeout-margin calibration tool."""
+
+import time
+import unittest
+
+import calibrate
+import isolation
+
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+
+class SlowExitPlayer(object):
+    """Reads the clock until it drops below the threshold, then takes
+    `exit_delay` seconds to return, like a search that unwinds slowly.
+    """
+
+    def __init__(self, exit_delay, timeout=10.):
+        self.exit_delay = exit_delay
+        self.TIMER_THRESHOLD = timeout
+
+    def get_move(self, game, time_left):
+        while time_left() >= self.TIMER_THRESHOLD:
+            pass
+        time.sleep(self.exit_delay)
+        return game.get_legal_moves()[0]
+
+
+class CalibrateTest(unittest.TestCase):
+    """Check the latency measurements and threshold recommendations"""
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(calibrate.percentile(values, 50), 50)
+        self.assertEqual(calibrate.percentile(values, 99), 99)
+        self.assertEqual(calibrate.percentile(values, 1), 1)
+        self.assertEqual(calibrate.percentile([3.], 99), 3.)
+        self.assertIsNone(calibrate.percentile([], 50))
+
+    def test_exit_cost_is_measured(self):
+        player = SlowExitPlayer(0.005)
+        game = isolation.Board(player, "Opponent")
+        sample = calibrate.measure_move(player, game, 50)
+        self.assertTrue(sample.cut_off)
+        self.assertGreaterEqual(sample.exit_cost, 5.)
+        # the agent returned `spent` ms after the clock passed its threshold
+        self.assertAlmostEqual(sample.time_left, 10. - sample.spent)
+        self.assertAlmostEqual(sample.elapsed + sample.time_left, 50.)
+        self.assertGreaterEqual(calibrate.recommend([sample], safety=2.),
+                                2 * sample.exit_cost)
+
+    def test_search_agents_are_summarized(self):
+        positions = calibrate.sample_positions(4, seed=3)
+        player = AlphaBetaPlayer(score_fn=improved_score, timeout=2.)
+        samples = calibrate.measure(player, positions, time_limit=30)
+        self.assertEqual(len(samples), 4)
+        stats = calibrate.summarize(samples, threshold=2.)
+        self.assertEqual(stats["moves"], 4)
+        self.assertLessEqual(stats["used_p50"], stats["used_p99"])
+        self.assertEqual(stats["used_max"],
+                         max(sample.elapsed for sample in samples))
+        self.assertEqual(stats["cut_off"],
+                         sum(1 for sample in samples if sample.cut_off))
+        for sample in samples:
+            if sample.cut_off:
+                self.assertLess(sample.time_left, 2.)
+                self.assertAlmostEqual(sample.time_left + sample.spent, 2.)
+            else:
+                self.assertIsNone(sample.exit_cost)
+        # a player that never reads the clock is never cut off
+        stats = calibrate.calibrate(["Greedy"], positions, time_limit=30)
+        self.assertEqual(stats["agents"]["Greedy"]["cut_off"], 0)
+        self.assertIsNone(stats["agents"]["Greedy"]["recommended"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Unit tests for the distributed tournament coordinator."""
+
+import asyncio
+import json
+import unittest
+
+import cluster
+
+
+async def call(reader, writer, message):
+    writer.write((json.dumps(message) + "\n").encode())
+    await writer.drain()
+    return json.loads((await reader.readline()).decode())
+
+
+def jobs(count, width=5, height=5):
+    return [{"id": i, "player_1": "Greedy", "player_2": "Random",
+             "opening": [], "width": width, "height": height,
+             "time_limit": 150} for i in range(count)]
+
+
+class CoordinatorTest(unittest.TestCase):
+    """Play tournaments with local worker processes and simulated faults"""
+
+    def test_local_workers_play_every_job_once(self):
+        schedule = cluster.tournament_jobs(["Greedy"], ["Random", "Greedy"],
+                                           2)
+        results, stats = cluster.coordinate(schedule, port=0, workers=2,
+                                            chunk_size=3)
+        self.assertEqual(sorted(results), list(range(len(schedule))))
+        self.assertEqual(stats["chunks_sent"], 3)
+        self.assertEqual(stats["duplicates"], 0)
+        for job_id, record in results.items():
+            job = schedule[job_id]
+            self.assertEqual(record["opening"], job["opening"])
+            self.assertIn(record["winner"],
+                          (job["player_1"], job["player_2"]))
+        table = cluster.summarize(results, ["Greedy"], ["Random", "Greedy"])
+        self.assertEqual(table["Greedy"]["Random"][1], 4)
+
+    def test_lost_worker_chunk_is_reissued(self):
+
+        async def scenario():
+            coordinator = cluster.Coordinator(jobs(4), chunk_size=2)
+            port = await coordinator.start(port=0)
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1",
+                                                               port)
+                await call(reader, writer, {"op": "hello", "worker": "lost"})
+                chunk = await call(reader, writer, {"op": "pull"})
+                writer.close()
+                await asyncio.sleep(0.1)
+                played = await asyncio.get_event_loop().run_in_executor(
+                    None, cluster.run_worker, "127.0.0.1", port)
+                await coordinator.wait()
+            finally:
+                await coordinator.close()
+            return chunk, played, coordinator.snapshot()
+
+        chunk, played, stats = asyncio.run(scenario())
+        self.assertEqual(len(chunk["jobs"]), 2)
+        self.assertEqual(played, 4)
+        self.assertEqual(stats["completed"], 4)
+        self.assertEqual((stats["reissued"], stats["lost_workers"]), (1, 1))
+
+    def test_expired_lease_results_are_deduplicated(self):
+
+        async def scenario():
+            coordinator = cluster.Coordinator(jobs(3), chunk_size=3,
+                                              lease_timeout=0.05)
+            port = await coordinator.start(port=0)
+            try:
+                slow = await asyncio.open_connection("127.0.0.1", port)
+                fast = await asyncio.open_connection("127.0.0.1", port)
+                first = await call(*slow, {"op": "pull"})
+                waiting = await call(*fast, {"op": "pull"})
+                await asyncio.sleep(0.1)
+                second = await call(*fast, {"op": "pull"})
+                rows = [[job["id"], 2, "forfeit", 5]
+                        for job in second["jobs"]]
+                await call(*fast, {"op": "results", "chunk": 0,
+                                   "results": rows})
+                late = [[job["id"], 1, "timeout", 9]
+                        for job in first["jobs"]]
+                await call(*slow, {"op": "results", "chunk": 0,
+                                   "results": late})
+                done = await call(*slow, {"op": "pull"})
+                results = await coordinator.wait()
+            finally:
+                await coordinator.close()
+            return first, waiting, second, done, results, \
+                coordinator.snapshot()
+
+        first, waiting, second, done, results, stats = asyncio.run(scenario())
+        self.assertEqual(waiting["type"], "wait")
+        self.assertEqual(first["jobs"], second["jobs"])
+        self.assertEqual(done["type"], "done")
+        self.assertEqual(stats["reissued"], 1)
+        self.assertEqual(stats["duplicates"], 3)
+        for record in results.values():
+            self.assertEqual((record["winner"], record["termination"]),
+                             ("Random", "forfeit"))
+
+    def test_malformed_results_are_rejected(self):
+
+        async def scenario():
+            coordinator = cluster.Coordinator(jobs(2), chunk_size=2)
+            port = await coordinator.start(port=0)
+            try:
+                worker = await asyncio.open_connection("127.0.0.1", port)
+                chunk = await call(*worker, {"op": "pull"})
+                bad = await call(*worker, {"op": "results", "chunk": [0],
+                                           "results": "none"})
+                rows = [[0, 3, "forfeit", 5], [1, 1, "timeout"],
+                        [[1], 1, "timeout", 4], [7, 1, "timeout", 4],
+                        [1, 2, "forfeit", 6]]
+                partial = await call(*worker, {"op": "results",
+                                               "chunk": chunk["chunk"],
+                                               "results": rows})
+                # the game with only invalid rows is handed out again
+                again = await call(*worker, {"op": "pull"})
+                status = await call(*worker, {"op": "status"})
+            finally:
+                await coordinator.close()
+            return bad, partial, again, status, coordinator.results
+
+        bad, partial, again, status, results = asyncio.run(scenario())
+        self.assertEqual(bad["type"], "error")
+        self.assertEqual(partial, {"type": "ok", "rejected": 4})
+        self.assertEqual([job["id"] for job in again["jobs"]], [0])
+        self.assertEqual((status["rejected"], status["reissued"]), (5, 1))
+        self.assertEqual(list(results), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Unit tests for the move feed and its index."""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from functools import partial
+from http.server import ThreadingHTTPServer
+from urllib.request import urlopen
+
+import isolation
+
+from isolation.feed import MoveFeed, FeedIndex, FeedRequestHandler
+from sample_players import GreedyPlayer, RandomPlayer
+
+
+class MoveFeedTest(unittest.TestCase):
+    """Record games to a feed and read them back"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".ndjson")
+        os.close(fd)
+        self.players = (GreedyPlayer(), RandomPlayer())
+        with MoveFeed(self.path) as feed:
+            self.histories = []
+            for i in range(3):
+                game = isolation.Board(*self.players, width=5 + i, height=6)
+                game.apply_move((0, 0))
+                recorder = feed.record(game, "Greedy", "Random")
+                winner, history, termination = game.play(on_move=recorder)
+                recorder.finish(winner, termination)
+                self.histories.append((history, winner))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_index_pages_and_replays_games(self):
+        index = FeedIndex(self.path)
+        page = index.page(1, 5)
+        self.assertEqual(page["total"], 3)
+        self.assertEqual(len(page["games"]), 2)
+        summary = page["games"][0]
+        self.assertEqual((summary["width"], summary["height"]), (6, 6))
+
+        events = index.events(summary["game"])
+        start, moves, end = events[0], events[1:-1], events[-1]
+        history, winner = self.histories[1]
+        self.assertEqual(start["locations"], [[0, 0], None])
+        self.assertEqual(start["active"], 2)
+        self.assertEqual([e["move"] for e in moves], history)
+        self.assertEqual([e["player"] for e in moves[:2]], [2, 1])
+        self.assertEqual(end["winner"],
+                         1 if winner is self.players[0] else 2)
+        self.assertEqual(end["plies"], 1 + len(history))
+
+    def test_tail_resumes_from_offset(self):
+        index = FeedIndex(self.path)
+        first = index.tail(0, limit=4)
+        self.assertEqual(len(first["events"]), 4)
+        rest = index.tail(first["offset"])
+        with open(self.path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(first["events"] + rest["events"], lines)
+        self.assertEqual(index.tail(-1), {"offset": rest["offset"],
+                                          "events": []})
+
+    def test_http_api(self):
+        handler = partial(FeedRequestHandler, index=FeedIndex(self.path),
+                          directory=os.path.dirname(self.path))
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = "http://127.0.0.1:{}/feed/games?count=1".format(
+                server.server_address[1])
+            data = json.loads(urlopen(url).read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(data["total"], 3)
+        self.assertEqual(data["games"][0]["player_1"], "Greedy")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,12 +3,14 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import random
 import unittest
 
 import isolation
 import game_agent
 
 from importlib import reload
+from sample_players import improved_score
 
 
 class IsolationTest(unittest.TestCase):
@@ -25,5 +27,99 @@ class IsolationTest(unittest.TestCase):
         self.fail("Hello, World!")
 
 
+class SearchBudgetTest(unittest.TestCase):
+    """Check the node and depth budgets of the search agents"""
+
+    def play(self, seed):
+        random.seed(seed)
+        player1 = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                             node_limit=500)
+        player2 = game_agent.MinimaxPlayer(search_depth=2,
+                                           score_fn=improved_score,
+                                           node_limit=2000)
+        game = isolation.Board(player1, player2, width=5, height=5)
+        winner, history, termination = game.play(time_limit=None)
+        return winner is player1, history, termination
+
+    def test_node_budget_games_are_reproducible(self):
+        self.assertEqual(self.play(11), self.play(11))
+
+    def test_node_budget_is_respected(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                            node_limit=300)
+        game = isolation.Board(player, "Player2")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        move = player.get_move(game, lambda: float("-inf"))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertLessEqual(player.nodes, 301)
+        self.assertGreater(player.completed_depth, 0)
+
+    def test_alphabeta_matches_minimax_value(self):
+        forever = lambda: float("inf")
+        for depth in (1, 2, 3):
+            alphabeta = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                                   depth_limit=depth)
+            ab_move = alphabeta.get_move(opening(alphabeta), forever)
+            minimax = game_agent.MinimaxPlayer(search_depth=depth,
+                                               score_fn=improved_score)
+            game = opening(minimax)
+            mm_move = minimax.get_move(game, forever)
+            # both moves must have the same minimax value for player 1
+            values = [minimax._min_value(game.forecast_move(move), depth - 1)
+                      for move in (ab_move, mm_move)]
+            self.assertEqual(values[0], values[1])
+
+
+class SelectiveSearchTest(unittest.TestCase):
+    """Check late move reductions and futility pruning"""
+
+    def search(self, depth=5, **options):
+        random.seed(5)
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                            depth_limit=depth, **options)
+        game = opening(player)
+        move = player.get_move(game, lambda: float("inf"))
+        self.assertIn(move, game.get_legal_moves())
+        return player
+
+    def test_disabled_by_default(self):
+        player = self.search()
+        self.assertEqual(set(player.search_stats.values()), {0})
+
+    def test_late_move_reductions(self):
+        plain = self.search()
+        reduced = self.search(late_move_reduction=True)
+        stats = reduced.search_stats
+        self.assertGreater(stats["reductions"], 0)
+        self.assertLessEqual(stats["re_searches"], stats["reductions"])
+        self.assertLess(reduced.nodes, plain.nodes)
+
+    def test_futility_pruning(self):
+        stats = self.search(futility_margin=0.).search_stats
+        self.assertGreater(stats["futility_prunes"], 0)
+        self.assertGreaterEqual(stats["futility_nodes"],
+                                stats["futility_prunes"])
+
+    def test_wide_futility_margin_keeps_values(self):
+        forever = lambda: float("inf")
+        plain = game_agent.AlphaBetaPlayer(score_fn=improved_score)
+        wide = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                          futility_margin=1000.)
+        for player in (plain, wide):
+            player.time_left = forever
+        values = [player._max_value(opening(player), 4, float("-inf"),
+                                    float("inf")) for player in (plain, wide)]
+        self.assertEqual(values[0], values[1])
+        self.assertEqual(wide.search_stats["futility_prunes"], 0)
+
+
+def opening(player):
+    game = isolation.Board(player, "Player2")
+    game.apply_move((2, 3))
+    game.apply_move((4, 4))
+    return game
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,205 @@
+"""Unit tests for the isolation.Board game model."""
+
+import os
+import random
+import tempfile
+import unittest
+
+import isolation
+
+from isolation.isolation import DIRECTIONS, RECORD_HEADER
+from isolation import serialization
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def random_game(width=7, height=7, plies=10, seed=0):
+    random.seed(seed)
+    game = isolation.Board("Player1", "Player2", width=width, height=height)
+    for _ in range(plies):
+        moves = game.get_legal_moves()
+        if not moves:
+            break
+        game.apply_move(random.choice(moves))
+    return game
+
+
+def knight_moves(loc, blank):
+    r, c = loc
+    return {(r + dr, c + dc) for dr, dc in DIRECTIONS} & blank
+
+
+class MobilityFeaturesTest(unittest.TestCase):
+    """Compare the bitmask mobility features with a direct set search"""
+
+    def test_second_order_mobility(self):
+        for seed in range(20):
+            game = random_game(width=7, height=5, plies=seed % 12, seed=seed)
+            blank = set(game.get_blank_spaces())
+            for player in (game.active_player, game.inactive_player):
+                first = set(game.get_legal_moves(player))
+                second = set()
+                for move in first:
+                    second |= knight_moves(move, blank)
+                self.assertEqual(game.get_second_order_mobility(player),
+                                 len(second))
+
+    def test_reachable_area(self):
+        for seed in range(20):
+            game = random_game(width=6, height=8, plies=10 + seed, seed=seed)
+            blank = set(game.get_blank_spaces())
+            for player in (game.active_player, game.inactive_player):
+                region = set(game.get_legal_moves(player))
+                frontier = set(region)
+                while frontier:
+                    step = set()
+                    for loc in frontier:
+                        step |= knight_moves(loc, blank)
+                    frontier = step - region
+                    region |= frontier
+                self.assertEqual(game.get_reachable_area(player), len(region))
+
+    def test_unmoved_player_reaches_every_blank_cell(self):
+        game = isolation.Board("Player1", "Player2")
+        self.assertEqual(game.get_reachable_area(), 49)
+        game.apply_move((3, 3))
+        self.assertEqual(game.get_reachable_area(), 48)
+        self.assertEqual(game.get_reachable_area("Player1"), 48)
+        self.assertEqual(game.get_second_order_mobility("Player2"), 48)
+
+
+class CompactBoardTest(unittest.TestCase):
+    """Check copies share metadata but never game state"""
+
+    def test_copy_is_independent(self):
+        game = random_game(plies=4)
+        clone = game.copy()
+        self.assertIs(clone._spec, game._spec)
+        self.assertFalse(hasattr(clone, "__dict__"))
+        move = clone.get_legal_moves()[0]
+        clone.apply_move(move)
+        self.assertNotEqual(clone.hash(), game.hash())
+        self.assertEqual(clone.move_count, game.move_count + 1)
+        self.assertTrue(game.move_is_legal(move))
+
+    def test_legacy_board_state_round_trip(self):
+        game = random_game(width=5, height=6, plies=7)
+        state = game._board_state
+        self.assertEqual(len(state), 5 * 6 + 3)
+        self.assertEqual(state[-3], game.move_count % 2)
+        restored = isolation.Board("Player1", "Player2", width=5, height=6)
+        restored._board_state = state
+        self.assertEqual(restored.to_string(), game.to_string())
+        self.assertEqual(restored.hash(), game.hash())
+        self.assertIs(restored.active_player, game.active_player)
+
+
+class LargeBoardTest(unittest.TestCase):
+    """Exercise whole-board scans on boards well beyond 7x7"""
+
+    def test_blank_spaces_and_rendering(self):
+        game = random_game(width=31, height=27, plies=40, seed=3)
+        blank = game.get_blank_spaces()
+        self.assertEqual(len(blank), 31 * 27 - game.move_count)
+        self.assertEqual(blank, sorted(blank, key=lambda rc: (rc[1], rc[0])))
+        for loc in blank[:50]:
+            self.assertTrue(game.move_is_legal(loc))
+        lines = game.to_string().split("\n\r")
+        self.assertEqual(len(lines), 27 + 2)
+        marked = "".join(lines[1:]).count("-")
+        self.assertEqual(marked, game.move_count - 2)
+
+
+class SerializationTest(unittest.TestCase):
+    """Round-trip positions through the binary and text encodings"""
+
+    def setUp(self):
+        self.games = [random_game(width=5 + i % 3, height=6, plies=i, seed=i)
+                      for i in range(12)]
+
+    def assertSamePosition(self, a, b):
+        self.assertEqual((a.width, a.height), (b.width, b.height))
+        self.assertEqual(a.to_string(), b.to_string())
+        self.assertEqual(a.hash(), b.hash())
+        self.assertEqual(a.move_count, b.move_count)
+        self.assertIs(a.active_player, b.active_player)
+
+    def test_bytes_round_trip(self):
+        for game in self.games:
+            clone = isolation.Board.from_bytes(game.to_bytes(), "Player1", "Player2")
+            self.assertSamePosition(clone, game)
+        data = self.games[-1].to_bytes()
+        for size in (0, 3, len(data) - 1):
+            with self.assertRaises(ValueError):
+                isolation.Board.from_bytes(data[:size], "Player1", "Player2")
+        # a truncated header or body after a complete record
+        for size in (3, len(data) - 1):
+            with self.assertRaises(ValueError):
+                list(serialization.iter_boards(data + data[:size],
+                                               "Player1", "Player2"))
+
+    def test_invalid_records_are_rejected(self):
+        game = isolation.Board("Player1", "Player2")
+        game.apply_move((2, 3))
+        game.apply_move((4, 4))
+        header = list(RECORD_HEADER.unpack_from(game.to_bytes()))
+        body = game.to_bytes()[RECORD_HEADER.size:]
+        blank = 1  # cell (1, 0) was never visited
+        for field, value in [(2, 2), (4, 200), (5, 49), (4, blank),
+                             (4, header[5]), (0, 0)]:
+            fields = list(header)
+            fields[field] = value
+            data = RECORD_HEADER.pack(*fields) + body
+            with self.assertRaises(ValueError):
+                isolation.Board.from_bytes(data, "Player1", "Player2")
+            with self.assertRaises(ValueError):
+                list(serialization.iter_boards(game.to_bytes() + data,
+                                               "Player1", "Player2"))
+        for text in ["0/0 a 0", "7/7 c 0", "/ a 0"]:
+            with self.assertRaises(ValueError):
+                isolation.Board.from_fen(text, "Player1", "Player2")
+
+    def test_fen_round_trip(self):
+        for game in self.games:
+            clone = isolation.Board.from_fen(game.to_fen(), "Player1", "Player2")
+            self.assertSamePosition(clone, game)
+        self.assertEqual(isolation.Board("Player1", "Player2").to_fen(),
+                         "7/7/7/7/7/7/7 a 0")
+        with self.assertRaises(ValueError):
+            isolation.Board.from_fen("7/6/7 a 0", "Player1", "Player2")
+        with self.assertRaises(ValueError):
+            isolation.Board.from_fen("a2/3/1a1 b 2", "Player1", "Player2")
+
+    def test_bulk_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "positions.bin")
+            serialization.write_positions(path, self.games)
+            boards = serialization.load_boards(path, "Player1", "Player2")
+        self.assertEqual(len(boards), len(self.games))
+        for board, game in zip(boards, self.games):
+            self.assertSamePosition(board, game)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_load_arrays(self):
+        games = [g for g in self.games if g.width == 5]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "positions.bin")
+            serialization.write_positions(path, games)
+            arrays = serialization.load_arrays(path)
+        for i, game in enumerate(games):
+            blank = set(game.get_blank_spaces())
+            for r in range(game.height):
+                for c in range(game.width):
+                    self.assertEqual(arrays["occupancy"][i, r, c],
+                                     (r, c) not in blank)
+            for p, player in enumerate(("Player1", "Player2")):
+                loc = game.get_player_location(player) or (-1, -1)
+                self.assertEqual(tuple(arrays["locations"][i, p]), loc)
+            self.assertEqual(arrays["move_count"][i], game.move_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Unit tests for the self-play league ratings."""
+
+import unittest
+
+import league
+
+
+def record(player_1, player_2, winner):
+    return {"player_1": player_1, "player_2": player_2, "winner": winner}
+
+
+class RatingsTest(unittest.TestCase):
+    """Check the Bradley-Terry fit and pairing scheduler"""
+
+    def test_even_results_rate_equally(self):
+        results = [record("A", "B", "A"), record("B", "A", "A"),
+                   record("A", "B", "B"), record("B", "A", "B")]
+        a, b = league.fit_ratings(results, ["A", "B"])
+        self.assertAlmostEqual(a.elo, 0., places=3)
+        self.assertAlmostEqual(b.elo, 0., places=3)
+        self.assertEqual((a.games, a.wins), (4, 2))
+
+    def test_more_games_narrow_the_interval(self):
+        few = [record("A", "B", "A")] * 3 + [record("A", "B", "B")]
+        many = few * 10
+        a_few, _ = league.fit_ratings(few, ["A", "B"])
+        a_many, _ = league.fit_ratings(many, ["A", "B"])
+        self.assertGreater(a_few.elo, 0)
+        self.assertGreater(a_many.elo, a_few.elo)
+        self.assertLess(a_many.ci, a_few.ci)
+
+    def test_schedule_prefers_uncertain_pairs(self):
+        results = [record("A", "B", "A"), record("A", "B", "B")] * 20
+        ratings = league.fit_ratings(results, ["A", "B", "C"])
+        pairs = league.schedule_pairings(ratings, 2)
+        self.assertEqual(len(pairs), 2)
+        for pair in pairs:
+            self.assertIn("C", pair)
+
+
+if __name__ == '__main__':
+    unittest.main()
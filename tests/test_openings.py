@@ -0,0 +1,87 @@
+"""Unit tests for opening suites."""
+
+import os
+import tempfile
+import unittest
+
+import isolation
+import tournament
+
+from isolation import openings
+from sample_players import GreedyPlayer
+
+
+class _Recorder(object):
+    """A sink that keeps the starting position of every game."""
+
+    def __init__(self):
+        self.starts = []
+
+    def record(self, board, name_1, name_2):
+        self.starts.append((name_1, name_2, board.to_fen()))
+        return self
+
+    def __call__(self, board, move, elapsed):
+        pass
+
+    def finish(self, winner, termination):
+        pass
+
+
+class OpeningSuiteTest(unittest.TestCase):
+    """Check symmetry deduplication, suite files and tournament replay"""
+
+    def test_first_moves_are_deduplicated(self):
+        # the 49 cells of a 7x7 board fall into 10 classes under its 8
+        # symmetries; a 5x4 board has 4 symmetries and 6 classes of cells
+        self.assertEqual(len(openings.distinct_openings(7, 7, 1)), 10)
+        self.assertEqual(len(openings.distinct_openings(5, 4, 1)), 6)
+
+    def test_distinct_openings_are_not_equivalent(self):
+        perms = isolation.tablebase.symmetries(5, 5)
+        keys = set()
+        for moves in openings.distinct_openings(5, 5, 2):
+            board = isolation.Board("Player1", "Player2", 5, 5)
+            for move in moves:
+                board.apply_move(move)
+            keys.add(openings.canonical_key(board, perms))
+            # a mirror image has the same key
+            mirror = isolation.Board("Player1", "Player2", 5, 5)
+            for r, c in moves:
+                mirror.apply_move((r, 4 - c))
+            self.assertIn(openings.canonical_key(mirror, perms), keys)
+        self.assertEqual(len(keys), len(openings.distinct_openings(5, 5, 2)))
+
+    def test_suite_round_trip(self):
+        suite = openings.generate_suite(12, 5, 5, seed=1)
+        self.assertEqual(len(suite), 12)
+        scores = [abs(opening.score) for opening in suite]
+        self.assertEqual(scores, sorted(scores))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "suite.jsonl")
+            openings.save_suite(path, suite)
+            self.assertEqual(openings.load_suite(path), suite)
+
+    def test_every_agent_faces_the_suite(self):
+        suite = openings.generate_suite(3, 5, 5)
+        test_agents = [tournament.Agent(GreedyPlayer(), "Greedy_1"),
+                       tournament.Agent(GreedyPlayer(), "Greedy_2")]
+        cpu_agent = tournament.Agent(GreedyPlayer(), "Greedy_cpu")
+        wins = {agent.player: 0 for agent in test_agents + [cpu_agent]}
+        recorder = _Recorder()
+        tournament.play_round(cpu_agent, test_agents, wins, 4,
+                              feed=recorder, openings=suite)
+
+        starts = [fen for _, _, fen in recorder.starts]
+        self.assertEqual(len(starts), 16)
+        for match in range(4):
+            board = isolation.Board("a", "b", 5, 5)
+            for move in suite[match % 3].moves:
+                board.apply_move(tuple(move))
+            # both test agents play both colors from the same opening
+            self.assertEqual(starts[4 * match:4 * match + 4],
+                             [board.to_fen()] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Unit tests for the perft move-generation validator."""
+
+import unittest
+
+import isolation
+
+from isolation import perft, reference
+
+
+class NoInitiativeBoard(isolation.Board):
+    """A broken backend that forgets to record the initiative bit."""
+
+    @property
+    def _board_state(self):
+        state = isolation.Board._board_state.fget(self)
+        state[-3] = 0
+        return state
+
+
+class PerftTest(unittest.TestCase):
+    """Check perft counts and the backend cross-check"""
+
+    def test_empty_board_counts(self):
+        board = isolation.Board("Player1", "Player2", 3, 3)
+        # any of 9 cells, then any of the 8 left; then player 1 has no
+        # moves from the center, and 2 knight moves from any other cell
+        # unless player 2 blocks one of them
+        self.assertEqual(perft.perft(board, 1), 9)
+        self.assertEqual(perft.perft(board, 2), 72)
+        self.assertEqual(perft.perft(board, 3), 8 * (6 * 2 + 2 * 1))
+
+    def test_divide_sums_to_perft(self):
+        board = perft.build(isolation.Board, perft.positions(1)[0])
+        split = perft.divide(board, 3)
+        self.assertEqual(len(split), 49)
+        self.assertEqual(sum(split.values()), perft.perft(board, 3))
+
+    def test_positions_cover_unmoved_players(self):
+        cases = perft.positions(10, seed=3)
+        self.assertEqual(len(cases), 10)
+        self.assertEqual([len(p.moves) for p in cases[:2]], [0, 1])
+        self.assertEqual(cases, perft.positions(10, seed=3))
+
+    def test_backends_agree(self):
+        for position in perft.positions(12, seed=1):
+            counts = [perft.perft(perft.build(cls, position), 3)
+                      for cls in perft.BACKENDS.values()]
+            self.assertEqual(len(set(counts)), 1, position)
+            self.assertIsNone(perft.compare(
+                perft.build(reference.Board, position),
+                perft.build(isolation.Board, position), 2))
+
+    def test_compare_finds_initiative_bug(self):
+        position = perft.positions(1)[0]
+        found = perft.compare(perft.build(reference.Board, position),
+                              perft.build(NoInitiativeBoard, position), 2)
+        self.assertIsNotNone(found)
+        self.assertEqual(len(found[0]), 1)
+        self.assertIn("_board_state", found[1])
+
+    def test_load_backend(self):
+        self.assertIs(perft.load_backend("reference"), reference.Board)
+        self.assertIs(perft.load_backend("isolation.isolation:Board"),
+                      isolation.Board)
+
+
+if __name__ == '__main__':
+    unittest.main()
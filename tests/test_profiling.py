@@ -0,0 +1,83 @@
+"""Unit tests for game profiling hooks."""
+
+import random
+import unittest
+
+import isolation
+import game_agent
+
+from isolation.profiling import Profiler, GAME_ROOT
+from sample_players import GreedyPlayer, improved_score
+
+
+class ProfilerTest(unittest.TestCase):
+    """Check the breakdown and output of a profiled game"""
+
+    def setUp(self):
+        random.seed(4)
+        self.player1 = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                                  depth_limit=2)
+        self.player2 = GreedyPlayer()
+        self.game = isolation.Board(self.player1, self.player2, 5, 5)
+        self.profiler = Profiler()
+        self.profiler.name(self.player1, "AB")
+
+    def test_calls_are_attributed_to_agents(self):
+        copy = isolation.Board.copy
+        with self.profiler:
+            self.assertIsNot(isolation.Board.copy, copy)
+            _, history, _ = self.game.play(time_limit=None,
+                                           profiler=self.profiler)
+        # the board and the agents are restored afterwards
+        self.assertIs(isolation.Board.copy, copy)
+        self.assertIs(self.player1.score, improved_score)
+
+        breakdown = self.profiler.breakdown()
+        self.assertEqual(set(breakdown), {"AB", "GreedyPlayer", GAME_ROOT})
+        calls = sum(fns["get_move"][0] for agent, fns in breakdown.items()
+                    if agent != GAME_ROOT)
+        self.assertEqual(calls, len(history) + 1)
+        self.assertIn("score:improved_score", breakdown["AB"])
+        self.assertIn("forecast_move", breakdown["GreedyPlayer"])
+        calls, total, own = breakdown["AB"]["forecast_move"]
+        self.assertGreater(total, own)  # includes copy() and apply_move()
+        self.assertIn("AB", self.profiler.report())
+
+    def test_collapsed_stacks(self):
+        with self.profiler:
+            self.game.play(time_limit=None, profiler=self.profiler)
+        lines = self.profiler.collapsed()
+        self.assertIn("AB;get_move;forecast_move;copy",
+                      [line.rsplit(" ", 1)[0] for line in lines])
+        for line in lines:
+            stack, value = line.rsplit(" ", 1)
+            self.assertGreaterEqual(int(value), 0)
+
+    def test_sampling(self):
+        profiler = Profiler(sample_interval=0.001)
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                            depth_limit=4)
+        game = isolation.Board(player, GreedyPlayer(), 7, 7)
+        with profiler:
+            game.play(time_limit=None, profiler=profiler)
+        self.assertTrue(profiler.samples)
+        self.assertTrue(any("game_agent:alphabeta" in stack
+                            for stack in profiler.samples))
+
+    def test_moves_only(self):
+        copy = isolation.Board.copy
+        profiler = Profiler(timers=False)
+        with profiler:
+            self.assertIs(isolation.Board.copy, copy)
+            _, history, _ = self.game.play(time_limit=None,
+                                           profiler=profiler)
+            self.assertIs(self.player1.score, improved_score)
+        breakdown = profiler.breakdown()
+        self.assertEqual(sum(fns["get_move"][0]
+                             for fns in breakdown.values()), len(history) + 1)
+        self.assertEqual(set(name for fns in breakdown.values()
+                             for name in fns), {"get_move"})
+
+
+if __name__ == '__main__':
+    unittest.main()
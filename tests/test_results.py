@@ -0,0 +1,94 @@
+"""Unit tests for the SQLite results store."""
+
+import os
+import random
+import tempfile
+import unittest
+
+import isolation
+import tournament
+
+from isolation.results import ResultsStore
+from sample_players import GreedyPlayer, RandomPlayer
+
+
+class ResultsStoreTest(unittest.TestCase):
+    """Record games to a results database and query them"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "results.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_games_and_moves_are_stored(self):
+        players = (GreedyPlayer(), RandomPlayer())
+        played = []
+        with ResultsStore(self.path, run="test", batch_size=2) as store:
+            for start in [(0, 0), (3, 3), (3, 3)]:
+                game = isolation.Board(*players)
+                game.apply_move(start)
+                recorder = store.record(game, "Greedy", "Random")
+                winner, history, termination = game.play(on_move=recorder)
+                recorder.finish(winner, termination)
+                played.append((winner, history, termination))
+
+        with ResultsStore(self.path) as store:
+            rows = store.query("SELECT id, run, opening_1, opening_2, "
+                               "start_ply, winner, termination, plies "
+                               "FROM games ORDER BY id")
+            self.assertEqual(len(rows), 3)
+            for row, (winner, history, termination) in zip(rows, played):
+                game_id, run, opening_1, opening_2, start, name, end, plies \
+                    = row
+                self.assertEqual((run, opening_2, start), ("test", None, 1))
+                self.assertEqual(name, "Greedy" if winner is players[0]
+                                 else "Random")
+                self.assertEqual((end, plies), (termination,
+                                                1 + len(history)))
+                moves = store.query("SELECT ply, seat, row, col FROM moves "
+                                    "WHERE game_id = ? ORDER BY ply",
+                                    (game_id,))
+                self.assertEqual([[r, c] for _, _, r, c in moves], history)
+                self.assertEqual([seat for _, seat, _, _ in moves][:2],
+                                 [2, 1])
+            centered = store.query("SELECT count(*) FROM agent_games WHERE "
+                                   "agent = 'Greedy' AND opening_1 = '3,3'")
+            self.assertEqual(centered, [(2,)])
+            summary = {row[0]: row[1:] for row in store.summary()}
+            self.assertEqual(summary["Greedy"][0], 3)
+            self.assertAlmostEqual(summary["Greedy"][1] +
+                                   summary["Random"][1], 1.)
+
+    def test_queries_use_the_indexes(self):
+        with ResultsStore(self.path) as store:
+            for sql in ["SELECT * FROM agent_games WHERE agent = 'A'",
+                        "SELECT * FROM games WHERE opening_1 = '3,3'",
+                        "SELECT * FROM games WHERE termination = 'timeout'"]:
+                plan = " ".join(str(row[-1]) for row in
+                                store.query("EXPLAIN QUERY PLAN " + sql))
+                self.assertIn("INDEX", plan)
+                self.assertNotRegex(plan, r"SCAN (TABLE )?games\b")
+
+    def test_tournament_records_search_stats(self):
+        random.seed(0)
+        test_agent = tournament.make_agent("AB_Improved")
+        cpu_agent = tournament.make_agent("Random")
+        wins = {test_agent.player: 0, cpu_agent.player: 0}
+        with ResultsStore(self.path) as store:
+            tournament.play_round(cpu_agent, [test_agent], wins, 1,
+                                  results=store)
+            rows = store.query(
+                "SELECT m.nodes, m.depth, m.elapsed FROM moves m JOIN games "
+                "g ON m.game_id = g.id WHERE (m.seat = 1) = (g.player_1 = "
+                "'AB_Improved')")
+        self.assertTrue(rows)
+        for nodes, depth, elapsed in rows:
+            self.assertGreater(nodes, 0)
+            self.assertGreaterEqual(depth, 0)
+            self.assertGreaterEqual(elapsed, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Unit tests for sandboxed out-of-process players."""
+
+import os
+import tempfile
+import time
+import timeit
+import unittest
+
+import isolation
+
+from isolation.sandbox import ProcessPlayer
+from sample_players import GreedyPlayer
+
+
+class StallingPlayer(object):
+    """Player that never returns on its own."""
+
+    def get_move(self, game, time_left):
+        while True:
+            time.sleep(1)
+
+
+class PidPlayer(GreedyPlayer):
+    """Greedy player that records the process it runs in."""
+
+    def get_move(self, game, time_left):
+        move = super().get_move(game, time_left)
+        with open(os.environ["SANDBOX_PID_LOG"], "a") as f:
+            f.write("{}\n".format(os.getpid()))
+        return move
+
+
+class ProcessPlayerTest(unittest.TestCase):
+    """Check worker reuse and deadline preemption"""
+
+    def test_runaway_agent_times_out_at_deadline(self):
+        with ProcessPlayer(StallingPlayer) as player_1, \
+                ProcessPlayer(GreedyPlayer) as player_2:
+            game = isolation.Board(player_1, player_2)
+            start = timeit.default_timer()
+            winner, history, termination = game.play(time_limit=100)
+            elapsed = timeit.default_timer() - start
+        self.assertEqual(termination, "timeout")
+        self.assertIs(winner, player_2)
+        self.assertEqual(history, [])
+        self.assertEqual(player_1.timeouts, 1)
+        self.assertLess(elapsed, 2.)
+
+    def test_worker_is_reused_across_games(self):
+        fd, log = tempfile.mkstemp()
+        os.close(fd)
+        os.environ["SANDBOX_PID_LOG"] = log
+        try:
+            with ProcessPlayer(PidPlayer) as player_1, \
+                    ProcessPlayer(GreedyPlayer) as player_2:
+                for _ in range(2):
+                    game = isolation.Board(player_1, player_2)
+                    _, history, termination = game.play(time_limit=1000)
+                    self.assertNotEqual(termination, "timeout")
+            with open(log) as f:
+                pids = set(f.read().split())
+        finally:
+            if os.path.exists(log):
+                os.remove(log)
+        self.assertEqual(len(pids), 1)
+        self.assertNotEqual(pids, {str(os.getpid())})
+
+
+if __name__ == '__main__':
+    unittest.main()
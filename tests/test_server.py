@@ -0,0 +1,116 @@
+"""Unit tests for the local match server."""
+
+import asyncio
+import unittest
+
+import server
+
+
+class MatchServerTest(unittest.TestCase):
+    """Run matches against a server with warm workers"""
+
+    def test_match_streams_moves(self):
+
+        async def scenario():
+            match_server = server.MatchServer(workers=2, max_queue=4,
+                                              preload=["Greedy"])
+            port = await match_server.start(port=0)
+            try:
+                request = {"op": "match", "player_1": "Greedy",
+                           "player_2": "Random", "opening": [[3, 3]]}
+                replies = [reply async for reply in
+                           server.request("127.0.0.1", port, request)]
+                metrics = [reply async for reply in
+                           server.request("127.0.0.1", port, {"op": "metrics"})]
+            finally:
+                await match_server.close()
+            return replies, metrics[0]
+
+        replies, metrics = asyncio.run(scenario())
+        self.assertEqual(replies[0]["type"], "queued")
+        result = replies[-1]
+        self.assertEqual(result["type"], "result")
+        self.assertIn(result["winner"], ("Greedy", "Random"))
+        moves = [reply["move"] for reply in replies if reply["type"] == "move"]
+        self.assertEqual([[3, 3]] + moves, result["moves"])
+        self.assertEqual([r["ply"] for r in replies if r["type"] == "move"],
+                         list(range(1, len(moves) + 1)))
+        self.assertEqual(metrics["completed"], 1)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["workers"], 2)
+
+    def test_unknown_agent_is_rejected(self):
+
+        async def scenario():
+            match_server = server.MatchServer(workers=1)
+            port = await match_server.start(port=0)
+            try:
+                request = {"op": "match", "player_1": "Nobody",
+                           "player_2": "Random"}
+                return [reply async for reply in
+                        server.request("127.0.0.1", port, request)]
+            finally:
+                await match_server.close()
+
+        replies = asyncio.run(scenario())
+        self.assertEqual(len(replies), 1)
+        self.assertEqual(replies[0]["type"], "error")
+
+    def test_invalid_match_settings_are_rejected(self):
+        match_server = server.MatchServer(workers=1, max_time_limit=1000)
+        base = {"op": "match", "player_1": "Greedy", "player_2": "Random"}
+        job = match_server._parse_match(dict(base, opening=[[3, 3], [1, 1]],
+                                             time_limit=1000))
+        self.assertEqual(job["opening"], [[3, 3], [1, 1]])
+        for fields in [{"player_1": ["Greedy"]}, {"time_limit": None},
+                       {"time_limit": 0}, {"time_limit": 1001},
+                       {"time_limit": float("nan")}, {"time_limit": True},
+                       {"width": server.MAX_SIZE + 1}, {"height": 0},
+                       {"width": 2.5}, {"opening": [[3, 3], [3, 3]]},
+                       {"opening": [[3, 3], [1, 1], [4, 4]]},
+                       {"opening": [[9, 0]]}, {"opening": [3, 3]},
+                       {"opening": "33"}]:
+            with self.assertRaises(ValueError, msg=fields):
+                match_server._parse_match(dict(base, **fields))
+
+    def test_slow_client_is_disconnected(self):
+
+        async def scenario():
+            match_server = server.MatchServer(workers=1, max_backlog=2)
+            sent = []
+
+            async def stalled_send(writer, message):
+                # a client that stops reading after the first reply: the
+                # send waits, like drain(), until the connection is lost
+                sent.append(message)
+                while len(sent) > 1:
+                    if writer.transport.is_closing():
+                        raise ConnectionResetError("Connection lost")
+                    await asyncio.sleep(0.01)
+                await server.MatchServer._send(writer, message)
+
+            match_server._send = stalled_send
+            port = await match_server.start(port=0)
+            try:
+                request = {"op": "match", "player_1": "Random",
+                           "player_2": "Random"}
+                replies = await asyncio.wait_for(self._collect(
+                    server.request("127.0.0.1", port, request)), 30)
+                while match_server.snapshot()["busy_workers"]:
+                    await asyncio.sleep(0.01)
+                return replies, match_server.snapshot()
+            finally:
+                await match_server.close()
+
+        replies, metrics = asyncio.run(scenario())
+        self.assertEqual([reply["type"] for reply in replies], ["queued"])
+        self.assertEqual(metrics["dropped"], 1)
+        self.assertEqual(metrics["completed"], 1)
+
+    @staticmethod
+    async def _collect(replies):
+        return [reply async for reply in replies]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Unit tests for the endgame tablebase."""
+
+import itertools
+import os
+import random
+import tempfile
+import unittest
+
+import isolation
+import game_agent
+
+from sample_players import improved_score
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from isolation.tablebase import Tablebase
+
+
+def solve(game):
+    """Plies left with best play, by exhaustive search."""
+    moves = game.get_legal_moves()
+    if not moves:
+        return 0
+    plies = [solve(game.forecast_move(move)) for move in moves]
+    wins = [p for p in plies if p % 2 == 0]
+    return 1 + (min(wins) if wins else max(plies))
+
+
+def random_position(rng, width, height, plies):
+    game = isolation.Board("Player1", "Player2", width=width, height=height)
+    for _ in range(plies):
+        moves = game.get_legal_moves()
+        if not moves:
+            break
+        game.apply_move(rng.choice(moves))
+    return game
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TablebaseTest(unittest.TestCase):
+    """Check tablebase values against exhaustive search"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = Tablebase.build(4, 4, 8)
+
+    def test_probes_match_search(self):
+        rng = random.Random(0)
+        checked = 0
+        while checked < 200:
+            game = random_position(rng, 4, 4, rng.randint(2, 12))
+            probe = self.table.probe(game)
+            if len(game.get_blank_spaces()) > 8:
+                self.assertIsNone(probe)
+                continue
+            plies = solve(game)
+            self.assertEqual(probe.distance, plies)
+            self.assertEqual(probe.win, plies % 2 == 1)
+            checked += 1
+
+    def test_unmoved_players_are_not_covered(self):
+        game = isolation.Board("Player1", "Player2", width=4, height=4)
+        self.assertIsNone(self.table.probe(game))
+        self.assertIsNone(self.table.probe(isolation.Board("a", "b", 5, 5)))
+
+    def test_large_boards_are_rejected(self):
+        # blank sets would overflow their 64-bit masks
+        with self.assertRaises(ValueError):
+            Tablebase.build(9, 8, 1)
+
+    def test_saved_table_matches(self):
+        rng = random.Random(1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "4x4.tb")
+            self.table.save(path)
+            saved = Tablebase.open(path)
+            self.assertEqual(len(saved), len(self.table))
+            for _ in range(100):
+                game = random_position(rng, 4, 4, rng.randint(8, 12))
+                self.assertEqual(saved.probe(game), self.table.probe(game))
+            del saved
+
+    def test_symmetric_sets_are_stored_once(self):
+        # 4x4 has 8 symmetries, so far fewer classes than subsets
+        subsets = sum(1 for n in range(9)
+                      for _ in itertools.combinations(range(16), n))
+        self.assertLess(len(self.table), subsets / 6)
+
+    def test_agent_wins_solved_positions(self):
+        rng = random.Random(2)
+        played = 0
+        while played < 10:
+            game = random_position(rng, 4, 4, 8)
+            probe = self.table.probe(game)
+            if probe is None or not probe.win:
+                continue
+            player = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                                tablebase=self.table)
+            opponent = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                                  tablebase=self.table)
+            board = isolation.Board.from_bytes(game.to_bytes(), player,
+                                               opponent)
+            if game.active_player == "Player2":
+                board = isolation.Board.from_bytes(game.to_bytes(), opponent,
+                                                   player)
+            winner, history, _ = board.play(time_limit=None)
+            self.assertIs(winner, player)
+            self.assertEqual(len(history), probe.distance)
+            played += 1
+
+
+if __name__ == '__main__':
+    unittest.main()
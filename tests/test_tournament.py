@@ -0,0 +1,87 @@
+"""Unit tests for the tournament sequential test and module loading."""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import unittest
+
+import tournament
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SequentialTestTest(unittest.TestCase):
+    """Check the SPRT bounds and early stopping"""
+
+    def setUp(self):
+        self.sprt = tournament.SPRT(p0=0.3, p1=0.7, alpha=0.05, beta=0.05)
+
+    def test_decisions(self):
+        llr = tournament.sprt_llr(4, 0, self.sprt)
+        self.assertEqual(tournament.sprt_decision(llr, self.sprt), "H1")
+        llr = tournament.sprt_llr(0, 4, self.sprt)
+        self.assertEqual(tournament.sprt_decision(llr, self.sprt), "H0")
+        llr = tournament.sprt_llr(5, 5, self.sprt)
+        self.assertIsNone(tournament.sprt_decision(llr, self.sprt))
+        self.assertAlmostEqual(tournament.sprt_confidence(llr), 0.5)
+
+    def test_lopsided_pairing_stops_early(self):
+        test_agent = tournament.make_agent("Greedy")
+        cpu_agent = tournament.Agent(_Resigner(), "Resigner")
+        wins = {test_agent.player: 0, cpu_agent.player: 0}
+        _, forfeits, verdicts = tournament.play_round(
+            cpu_agent, [test_agent], wins, 10, self.sprt)
+        verdict = verdicts[test_agent.player]
+        self.assertEqual(verdict.decision, "H1")
+        self.assertEqual(verdict.games, 4)
+        self.assertEqual(wins[test_agent.player], 4)
+        self.assertEqual(forfeits, 4)
+
+    def test_pairing_without_games_is_reported(self):
+        test_agent = tournament.make_agent("Greedy")
+        cpu_agent = tournament.Agent(_Resigner(), "Resigner")
+        wins = {test_agent.player: 0, cpu_agent.player: 0}
+        _, _, verdicts = tournament.play_round(
+            cpu_agent, [test_agent], wins, 0, self.sprt)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            tournament.print_verdicts([(cpu_agent, verdicts)], [test_agent], 0)
+        self.assertIn("after   0 games (LLR -, confidence -)", out.getvalue())
+
+
+class LazyImportTest(unittest.TestCase):
+    """Check that optional subsystems load only when used"""
+
+    def loaded(self, code):
+        out = subprocess.check_output(
+            [sys.executable, "-c", code + "; import sys; print(' '.join("
+             "sorted(sys.modules)))"], cwd=ROOT, universal_newlines=True)
+        return set(out.split())
+
+    def test_tournament_import_is_light(self):
+        modules = self.loaded("import tournament")
+        for heavy in ("isolation.feed", "http.server", "isolation.sandbox",
+                      "multiprocessing", "isolation.profiling", "numpy",
+                      "sqlite3"):
+            self.assertNotIn(heavy, modules)
+
+    def test_submodules_load_on_attribute_access(self):
+        modules = self.loaded("import isolation; isolation.feed.MoveFeed")
+        self.assertIn("isolation.feed", modules)
+        self.assertNotIn("isolation.sandbox", modules)
+        import isolation
+        with self.assertRaises(AttributeError):
+            isolation.no_such_module
+
+
+class _Resigner(object):
+    """Forfeit every game by returning an illegal move."""
+
+    def get_move(self, game, time_left):
+        return (-1, -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+"""Unit tests for the shared transposition table."""
+
+import multiprocessing
+import os
+import random
+import tempfile
+import unittest
+
+from functools import partial
+
+import isolation
+import game_agent
+
+from isolation.ttable import EntryTable, SharedTranspositionTable, \
+    DiskTranspositionTable, EXACT, LOWER, function_salt, position_key
+from sample_players import improved_score
+
+
+def _probe_in_child(table, key, queue):
+    entry = table.probe(key)
+    table.store(key + 1, 2.5, 3, LOWER)
+    queue.put(entry)
+
+
+class EntryTableTest(unittest.TestCase):
+    """Check storage, replacement and sharing of table entries"""
+
+    def test_store_and_probe(self):
+        table = EntryTable(bytearray(EntryTable.size_for(64)), 64)
+        table.store(12345, -1.5, 4, EXACT, 17)
+        entry = table.probe(12345)
+        self.assertEqual((entry.value, entry.depth, entry.flag, entry.move),
+                         (-1.5, 4, EXACT, 17))
+        self.assertIsNone(table.probe(54321))
+        self.assertEqual(table.stats()["hit_rate"], 0.5)
+
+    def test_deeper_entries_are_kept(self):
+        table = EntryTable(bytearray(EntryTable.size_for(4)), 4)
+        table.store(1, 1., 5, EXACT)
+        table.store(1, 2., 2, EXACT)
+        self.assertEqual(table.probe(1).value, 1.)
+        # a full bucket gives up its shallowest entry
+        for key, depth in ((2, 3), (3, 4), (4, 6), (5, 7)):
+            table.store(key, 0., depth, EXACT)
+        self.assertIsNone(table.probe(2))
+        self.assertIsNotNone(table.probe(1))
+        self.assertEqual(table.occupancy(), 1.)
+
+    def test_torn_entry_is_a_miss(self):
+        buffer = bytearray(EntryTable.size_for(4))
+        table = EntryTable(buffer, 4)
+        table.store(99, 3., 2, EXACT)
+        buffer[8] ^= 0xFF  # corrupt the stored value
+        self.assertIsNone(table.probe(99))
+
+    def test_position_key_is_stable(self):
+        game = isolation.Board("Player1", "Player2")
+        self.assertEqual(position_key(game), position_key(game.copy()))
+        moved = game.forecast_move((3, 3))
+        self.assertNotEqual(position_key(game), position_key(moved))
+        self.assertNotEqual(position_key(moved), position_key(moved, 1))
+        # positions on boards of different sizes never share a key
+        self.assertNotEqual(position_key(game),
+                            position_key(isolation.Board("Player1", "Player2",
+                                                         5, 5)))
+
+    def test_position_key_format_is_fixed(self):
+        # keys are stored in files, so they must not depend on the
+        # interpreter; these values were computed once and pinned
+        game = isolation.Board("Player1", "Player2")
+        game.apply_move((3, 3))
+        game.apply_move((0, 1))
+        self.assertEqual(position_key(game), 13554437198984896342)
+        self.assertEqual(position_key(game, 7), 7825792372751889548)
+        # hash() reduces ints mod 2**61 - 1, which made cells 61 apart
+        # collide on large boards
+        low = isolation.Board("Player1", "Player2", 9, 9)
+        high = low.copy()
+        low._blocked, high._blocked = 1 << 3, 1 << 64
+        self.assertNotEqual(position_key(low), position_key(high))
+
+    def test_function_salt_tracks_weights(self):
+        def weighted(game, player, weight=1.):
+            return weight
+
+        self.assertEqual(function_salt(partial(weighted, weight=2.)),
+                         function_salt(partial(weighted, weight=2.)))
+        self.assertNotEqual(function_salt(partial(weighted, weight=2.)),
+                            function_salt(partial(weighted, weight=3.)))
+        self.assertNotEqual(function_salt(weighted),
+                            function_salt(improved_score))
+
+    def test_function_salt_ignores_the_profiler(self):
+        from isolation.profiling import Profiler
+
+        def weighted(game, player, weight=1.):
+            return weight * improved_score(game, player)
+
+        for score_fn in [improved_score, partial(weighted, weight=2.),
+                         partial(weighted, weight=3.)]:
+            player = game_agent.AlphaBetaPlayer(score_fn=score_fn,
+                                                depth_limit=1)
+            player.ttable = EntryTable(bytearray(EntryTable.size_for(64)), 64)
+            game = isolation.Board(player, "Opponent")
+            player.get_move(game, lambda: 1e9)
+            salt = player._salt
+            with Profiler() as profiler:
+                profiler.call_agent(player, game, lambda: 1e9)
+                self.assertIsNot(player.score, score_fn)
+                self.assertEqual(player._salt, salt)
+            self.assertEqual(function_salt(profiler._timed("score", score_fn)),
+                             function_salt(score_fn))
+
+    def test_table_is_shared_between_processes(self):
+        table = SharedTranspositionTable(1024)
+        try:
+            table.store(42, 7., 3, EXACT, 5)
+            queue = multiprocessing.get_context("spawn").Queue()
+            child = multiprocessing.get_context("spawn").Process(
+                target=_probe_in_child, args=(table, 42, queue))
+            child.start()
+            entry = queue.get(timeout=30)
+            child.join()
+            self.assertEqual(entry.value, 7.)
+            self.assertEqual(table.probe(43).value, 2.5)
+            self.assertEqual(table.occupancy(), 2 / table.capacity)
+        finally:
+            table.close()
+
+
+class DiskTableTest(unittest.TestCase):
+    """Check that the disk cache persists and evicts stale entries"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".tt")
+        os.close(fd)
+        os.remove(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_entries_survive_reopening(self):
+        table = DiskTranspositionTable(self.path, 64)
+        table.store(7, 1.25, 3, EXACT, 9)
+        table.close()
+        table = DiskTranspositionTable(self.path, 1 << 20)
+        self.assertEqual(table.capacity, 64)  # existing files keep their size
+        self.assertEqual(table.probe(7).value, 1.25)
+        self.assertEqual(table.probe(7).age, table.age)
+        table.close()
+        self.assertEqual(os.path.getsize(self.path), 24 + 24 * 64)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for key in (1, 2, 3, 4):
+            table = DiskTranspositionTable(self.path, 4)
+            if key == 4:
+                table.probe(1)  # used in this run, so not evicted
+            table.store(key, 0., 10 - key, EXACT)
+            table.close()
+        table = DiskTranspositionTable(self.path, 4)
+        table.store(5, 0., 1, EXACT)
+        self.assertIsNotNone(table.probe(1))
+        self.assertIsNone(table.probe(2))
+        self.assertIsNotNone(table.probe(5))
+        table.close()
+
+
+class TranspositionSearchTest(unittest.TestCase):
+    """Check that searches with a table return the same values"""
+
+    def test_table_preserves_search_values(self):
+        forever = lambda: float("inf")
+        rng = random.Random(3)
+        random.seed(3)  # the order of the legal moves
+        table = EntryTable(bytearray(EntryTable.size_for(1 << 14)), 1 << 14)
+        for _ in range(5):
+            start = isolation.Board("Player1", "Player2", width=5, height=5)
+            for _ in range(2 * rng.randint(1, 3)):
+                start.apply_move(rng.choice(start.get_legal_moves()))
+            data = start.to_bytes()
+            plain = game_agent.AlphaBetaPlayer(score_fn=improved_score)
+            cached = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                                ttable=table)
+            plain_game = isolation.Board.from_bytes(data, plain, "Player2")
+            cached_game = isolation.Board.from_bytes(data, cached, "Player2")
+            for depth in (1, 2, 3, 4):
+                plain.time_left = forever
+                expected = plain._max_value(plain_game, depth, float("-inf"),
+                                            float("inf"))
+                # get_move() fills the table and keys it for this seat
+                cached.depth_limit = depth
+                cached.get_move(cached_game, forever)
+                self.assertEqual(cached._max_value(
+                    cached_game, depth, float("-inf"), float("inf")),
+                    expected)
+        self.assertGreater(table.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Unit tests for the SPSA heuristic tuner."""
+
+import os
+import random
+import tempfile
+import unittest
+
+from functools import partial
+
+import isolation
+import tuner
+
+from isolation.ttable import function_salt
+from sample_players import improved_score
+
+TARGET = (2., -1., 0.5)
+
+
+def distance(weights):
+    return sum((w - t) ** 2 for w, t in zip(weights, TARGET))
+
+
+def closer_wins(job):
+    """A stand-in for play_pair: the weights nearer to TARGET win."""
+    return 1. if distance(job.plus) < distance(job.minus) else -1.
+
+
+class TunerTest(unittest.TestCase):
+    """Check the SPSA updates, paired games and checkpoints"""
+
+    def test_default_weights_match_improved_score(self):
+        rng = random.Random(0)
+        for _ in range(20):
+            game = isolation.Board("Player1", "Player2")
+            for _ in range(rng.randint(2, 20)):
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                game.apply_move(rng.choice(moves))
+            for player in ("Player1", "Player2"):
+                self.assertEqual(tuner.linear_score(game, player),
+                                 improved_score(game, player))
+
+    def test_weights_change_the_table_salt(self):
+        a = partial(tuner.linear_score, weights=(1., -1., 0., 0.))
+        b = partial(tuner.linear_score, weights=(1., -1.5, 0., 0.))
+        self.assertNotEqual(function_salt(a), function_salt(b))
+
+    def test_spsa_approaches_the_optimum(self):
+        state = tuner.tune("tuner:linear_score", (0., 0., 0.), 300, pairs=1,
+                           processes=0, match=closer_wins, verbose=False)
+        self.assertLess(distance(state["weights"]), 0.1 * distance((0,) * 3))
+        self.assertEqual(len(state["history"]), 300)
+
+    def test_resumed_run_matches_uninterrupted_run(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "spsa.json")
+            tuner.tune(weights=(0., 0., 0.), iterations=5, pairs=1,
+                       checkpoint=path, processes=0, match=closer_wins,
+                       verbose=False)
+            resumed = tuner.tune(weights=(9., 9., 9.), iterations=12,
+                                 pairs=1, checkpoint=path, processes=0,
+                                 match=closer_wins, verbose=False)
+            with self.assertRaises(ValueError):
+                tuner.tune("game_agent:custom_score", checkpoint=path,
+                           processes=0, match=closer_wins, verbose=False)
+        straight = tuner.tune(weights=(0., 0., 0.), iterations=12, pairs=1,
+                              processes=0, match=closer_wins, verbose=False)
+        self.assertEqual(resumed["iteration"], 12)
+        self.assertEqual(resumed["weights"], straight["weights"])
+
+    def test_pair_scores_both_colors(self):
+        opening = tuner.random_opening(5, 5, random.Random(0))
+        job = tuner.PairJob("tuner:linear_score", tuner.DEFAULT_WEIGHTS,
+                            tuner.DEFAULT_WEIGHTS, opening, 50, 0, 5, 5)
+        self.assertIn(tuner.play_pair(job), (-1., 0., 1.))
+        # the node limit and seed make every game reproducible
+        self.assertEqual(tuner.play_pair(job), tuner.play_pair(job))
+
+
+if __name__ == '__main__':
+    unittest.main()
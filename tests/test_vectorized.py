@@ -0,0 +1,82 @@
+"""Unit tests for the batched NumPy game simulator."""
+
+import os
+import random
+import tempfile
+import unittest
+
+import isolation
+
+from isolation import serialization
+
+try:
+    import numpy
+    from isolation.vectorized import BatchSimulator
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class BatchSimulatorTest(unittest.TestCase):
+    """Check simulated games against the scalar Board"""
+
+    def replay(self, policies):
+        sim = BatchSimulator(100, 5, 6, policies, seed=1)
+        games = [isolation.Board("Player1", "Player2", width=5, height=6)
+                 for _ in range(100)]
+        while True:
+            turn, active = sim.turn.copy(), sim.active.copy()
+            remaining = sim.step()
+            for i in numpy.flatnonzero(active):
+                game = games[i]
+                if sim.winner[i] >= 0:
+                    # the side to move lost for lack of moves
+                    self.assertEqual(game.get_legal_moves(), [])
+                    self.assertEqual(sim.winner[i], 1 - turn[i])
+                    continue
+                idx = sim.locations[i, turn[i]]
+                move = (idx % game.height, idx // game.height)
+                self.assertIn(move, game.get_legal_moves())
+                game.apply_move(move)
+            if not remaining:
+                break
+        self.assertEqual(list(sim.move_count), [g.move_count for g in games])
+
+    def test_random_games_follow_the_rules(self):
+        self.replay(("random", "random"))
+
+    def test_greedy_games_follow_the_rules(self):
+        self.replay(("greedy", "random"))
+
+    def test_greedy_beats_random(self):
+        result = BatchSimulator(2000, policies=("greedy", "random"),
+                                seed=0).run()
+        self.assertEqual(result["wins"].sum(), 2000)
+        self.assertGreater(result["wins"][0], 1200)
+
+    def test_positions_round_trip(self):
+        rng = random.Random(0)
+        games = []
+        for plies in (0, 1, 4, 9):
+            game = isolation.Board("Player1", "Player2", width=5, height=5)
+            for _ in range(plies):
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            games.append(game)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "positions.bin")
+            serialization.write_positions(path, games)
+            arrays = serialization.load_arrays(path)
+        positions = BatchSimulator.from_positions(arrays).positions()
+        for key in arrays:
+            numpy.testing.assert_array_equal(positions[key], arrays[key])
+
+    def test_samples(self):
+        result = BatchSimulator(50, seed=2).run(sample_rate=1.)
+        samples = result["samples"]
+        # every ply of every game is sampled, including the final positions
+        self.assertEqual(len(samples["turn"]), (result["plies"] + 1).sum())
+        self.assertEqual(samples["occupancy"].shape[1:], (7, 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,15 +10,21 @@ The matches are fair because the board is initialized randomly for both
 players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
+
+Optionally, each pairing can be scored with a sequential probability ratio
+test (SPRT) so that lopsided pairings stop as soon as the result is settled
+instead of always playing every scheduled match.
 """
 import itertools
+import math
 import random
 import warnings
 
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+from functools import partial
 
 from isolation import Board
-from sample_players import (RandomPlayer, open_move_score,
+from sample_players import (RandomPlayer, GreedyPlayer, open_move_score,
                             improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
                         custom_score_2, custom_score_3)
@@ -26,6 +32,41 @@ from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
 
+# Run every agent in its own persistent worker process so that agents which
+# overrun the time limit are preempted instead of stalling the tournament
+SANDBOX_AGENTS = False
+
+# Set to a file name to publish every game move by move as newline-delimited
+# JSON; run `python -m isolation.feed <file>` to watch them in the viewer
+FEED_PATH = None
+
+# Set to an opening suite file (see isolation.openings) to start the games
+# of every round from the next opening of the suite instead of two random
+# moves, so that every agent faces the same openings; generate one with
+# `python -m isolation.openings <file>`
+OPENING_SUITE = None
+
+# Set to a file name to store every game, with per-move times and search
+# statistics, in an indexed SQLite database; run
+# `python -m isolation.results <file>` for a summary (see isolation.results)
+RESULTS_DB = None
+
+# Set to a file name to keep the alpha-beta agents' search results on disk
+# between runs, in a memory-mapped cache of at most EVAL_CACHE_ENTRIES
+# entries (24 bytes each). Delete the file to start from a cold cache.
+EVAL_CACHE = None
+EVAL_CACHE_ENTRIES = 1 << 20
+
+# Set to a file name to time every agent call and board primitive, print a
+# per-agent breakdown at the end and write the timings as collapsed stacks
+# for flamegraph.pl; with PROFILE_SAMPLE_INTERVAL (seconds) the Python
+# stack is also sampled and written to PROFILE_PATH + ".samples". Timing
+# every primitive slows games down 2-3x; set PROFILE_TIMERS = False to time
+# only the agents' moves (and sample), at a cost of a few percent
+PROFILE_PATH = None
+PROFILE_SAMPLE_INTERVAL = None
+PROFILE_TIMERS = True
+
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation
 function against a baseline agent using alpha-beta search and iterative
@@ -36,31 +77,141 @@ game_agent.py.
 
 Agent = namedtuple("Agent", ["player", "name"])
 
+# Sequential test of a test agent's win probability against one cpu agent:
+# H0 is p = p0 (the test agent is weaker) and H1 is p = p1 (it is stronger),
+# with alpha and beta the tolerated probabilities of wrongly accepting H1
+# and H0, respectively.
+SPRT = namedtuple("SPRT", ["p0", "p1", "alpha", "beta"])
+
+# Set to an SPRT tuple to stop every pairing once its result is settled
+# (NUM_MATCHES then caps the number of matches in each pairing), e.g.,
+# SEQUENTIAL_TEST = SPRT(p0=0.3, p1=0.7, alpha=0.05, beta=0.05)
+SEQUENTIAL_TEST = None
+
+Verdict = namedtuple("Verdict", ["games", "llr", "decision"])
+
+# Factories for every agent that can be entered in a tournament or league,
+# keyed by display name. Each call returns a fresh player instance.
+AGENTS = OrderedDict([
+    ("Random", RandomPlayer),
+    ("Greedy", GreedyPlayer),
+    ("MM_Open", partial(MinimaxPlayer, score_fn=open_move_score)),
+    ("MM_Center", partial(MinimaxPlayer, score_fn=center_score)),
+    ("MM_Improved", partial(MinimaxPlayer, score_fn=improved_score)),
+    ("AB_Open", partial(AlphaBetaPlayer, score_fn=open_move_score)),
+    ("AB_Center", partial(AlphaBetaPlayer, score_fn=center_score)),
+    ("AB_Improved", partial(AlphaBetaPlayer, score_fn=improved_score)),
+    ("AB_Custom", partial(AlphaBetaPlayer, score_fn=custom_score)),
+    ("AB_Custom_2", partial(AlphaBetaPlayer, score_fn=custom_score_2)),
+    ("AB_Custom_3", partial(AlphaBetaPlayer, score_fn=custom_score_3)),
+])
+
+
+def make_agent(name, sandbox=False, ttable=None):
+    """Construct the registered agent `name` as an Agent tuple, optionally
+    running it in a sandboxed worker process, and give it a transposition
+    table if it is a search agent that can use one.
+    """
+    factory = AGENTS[name]
+    if ttable is not None and \
+            issubclass(getattr(factory, "func", factory), AlphaBetaPlayer):
+        factory = partial(factory, ttable=ttable)
+    if sandbox:
+        from isolation.sandbox import ProcessPlayer
+        return Agent(ProcessPlayer(factory), name)
+    return Agent(factory(), name)
+
+
+def sprt_llr(wins, losses, sprt):
+    """Return the log-likelihood ratio of H1 against H0 for a win/loss
+    record under the hypotheses of an SPRT tuple.
+    """
+    return (wins * math.log(sprt.p1 / sprt.p0) +
+            losses * math.log((1. - sprt.p1) / (1. - sprt.p0)))
+
+
+def sprt_decision(llr, sprt):
+    """Return "H1" or "H0" once the log-likelihood ratio crosses the upper
+    or lower Wald bound of the test, and None while it is undecided.
+    """
+    if llr >= math.log((1. - sprt.beta) / sprt.alpha):
+        return "H1"
+    if llr <= math.log(sprt.beta / (1. - sprt.alpha)):
+        return "H0"
+    return None
+
+
+def sprt_confidence(llr):
+    """Return the posterior probability of the favored hypothesis assuming
+    both hypotheses were equally likely before the games were played.
+    """
+    return 1. / (1. + math.exp(-abs(llr)))
+
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+def play_round(cpu_agent, test_agents, win_counts, num_matches, sprt=None,
+               feed=None, profiler=None, results=None, openings=None):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+    If a list of Openings is given, match i starts from openings[i] (cycling
+    through the list) instead, so every round replays the same openings.
+
+    If an SPRT tuple is given, a test agent stops playing this cpu agent as
+    soon as its sequential test reaches a decision; at most `num_matches`
+    matches are still played by the remaining agents.
+
+    If a MoveFeed is given, every game is published to it as it is played,
+    if a ResultsStore is given, every game is stored in it, and if a
+    Profiler is given, every game is played under it.
+
+    Returns the number of timeouts, the number of forfeits, and a dict of
+    Verdict tuples (games played, log-likelihood ratio, decision) keyed by
+    test agent player; the ratio and decision are None without `sprt`.
     """
     timeout_count = 0
     forfeit_count = 0
-    for _ in range(num_matches):
-
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
-                    for agent in test_agents], [])
-
-        # initialize all games with a random move and response
-        for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
-            for game in games:
-                game.apply_move(move)
+    games_played = {agent.player: 0 for agent in test_agents}
+    verdicts = {agent.player: Verdict(0, None, None) for agent in test_agents}
+    active = list(test_agents)
+    for match in range(num_matches):
+        if not active:
+            break
+
+        matchups = sum([[(cpu_agent, agent), (agent, cpu_agent)]
+                        for agent in active], [])
+        opening = openings[match % len(openings)] if openings else None
+        size = (opening.width, opening.height) if opening else ()
+        games = [Board(first.player, second.player, *size)
+                 for first, second in matchups]
+
+        if opening is not None:
+            # start all games from the next opening of the suite
+            for move in opening.moves:
+                for game in games:
+                    game.apply_move(tuple(move))
+        else:
+            # initialize all games with a random move and response
+            for _ in range(2):
+                move = random.choice(games[0].get_legal_moves())
+                for game in games:
+                    game.apply_move(move)
 
         # play all games and tally the results
-        for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
+        for game, (first, second) in zip(games, matchups):
+            recorders = [sink.record(game, first.name, second.name)
+                         for sink in (feed, results) if sink is not None]
+            on_move = None
+            if recorders:
+                def on_move(board, move, elapsed, recorders=recorders):
+                    for recorder in recorders:
+                        recorder(board, move, elapsed)
+            winner, _, termination = game.play(time_limit=TIME_LIMIT,
+                                               on_move=on_move,
+                                               profiler=profiler)
+            for recorder in recorders:
+                recorder.finish(winner, termination)
             win_counts[winner] += 1
 
             if termination == "timeout":
@@ -68,7 +219,22 @@ def play_round(cpu_agent, test_agents, win_counts, num_matches):
             elif termination == "forfeit":
                 forfeit_count += 1
 
-    return timeout_count, forfeit_count
+        for agent in active:
+            games_played[agent.player] += 2
+            verdicts[agent.player] = Verdict(games_played[agent.player],
+                                             None, None)
+
+        if sprt is not None:
+            for agent in list(active):
+                played = games_played[agent.player]
+                wins = win_counts[agent.player]
+                llr = sprt_llr(wins, played - wins, sprt)
+                decision = sprt_decision(llr, sprt)
+                verdicts[agent.player] = Verdict(played, llr, decision)
+                if decision is not None:
+                    active.remove(agent)
+
+    return timeout_count, forfeit_count, verdicts
 
 
 def update(total_wins, wins):
@@ -77,12 +243,14 @@ def update(total_wins, wins):
     return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
+def play_matches(cpu_agents, test_agents, num_matches, sprt=None, feed=None,
+                 profiler=None, results=None, openings=None):
     """Play matches between the test agent and each cpu_agent individually. """
     total_wins = {agent.player: 0 for agent in test_agents}
+    total_games = {agent.player: 0 for agent in test_agents}
     total_timeouts = 0.
     total_forfeits = 0.
-    total_matches = 2 * num_matches * len(cpu_agents)
+    pairing_verdicts = []
 
     print("\n{:^9}{:^13}".format("Match #", "Opponent") + ''.join(['{:^13}'.format(x[1].name) for x in enumerate(test_agents)]))
     print("{:^9}{:^13} ".format("", "") +  ' '.join(['{:^5}| {:^5}'.format("Won", "Lost") for x in enumerate(test_agents)]))
@@ -93,12 +261,17 @@ def play_matches(cpu_agents, test_agents, num_matches):
 
         print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-        counts = play_round(agent, test_agents, wins, num_matches)
+        counts = play_round(agent, test_agents, wins, num_matches, sprt, feed,
+                            profiler, results, openings)
         total_timeouts += counts[0]
         total_forfeits += counts[1]
         total_wins = update(total_wins, wins)
-        _total = 2 * num_matches
-        round_totals = sum([[wins[agent.player], _total - wins[agent.player]]
+        verdicts = counts[2]
+        pairing_verdicts.append((agent, verdicts))
+        for player in total_games:
+            total_games[player] += verdicts[player].games
+        round_totals = sum([[wins[agent.player],
+                             verdicts[agent.player].games - wins[agent.player]]
                             for agent in test_agents], [])
         print(' ' + ' '.join([
             '{:^5}| {:^5}'.format(
@@ -110,47 +283,104 @@ def play_matches(cpu_agents, test_agents, num_matches):
     print('{:^9}{:^13}'.format("", "Win Rate:") +
         ''.join([
             '{:^13}'.format(
-                "{:.1f}%".format(100 * total_wins[x[1].player] / total_matches)
+                "{:.1f}%".format(100 * total_wins[x[1].player] /
+                                 max(1, total_games[x[1].player]))
             ) for x in enumerate(test_agents)
     ]))
 
+    if sprt is not None:
+        print_verdicts(pairing_verdicts, test_agents, num_matches)
+
     if total_timeouts:
         print(("\nThere were {} timeouts during the tournament -- make sure " +
                "your agent handles search timeout correctly, and consider " +
-               "increasing the timeout margin for your agent.\n").format(
+               "increasing the timeout margin for your agent (calibrate.py " +
+               "measures the margin it needs).\n").format(
             total_timeouts))
     if total_forfeits:
         print(("\nYour agents forfeited {} games while there were still " +
                "legal moves available to play.\n").format(total_forfeits))
 
 
+def print_verdicts(pairing_verdicts, test_agents, num_matches):
+    """Summarize the sequential test result of every pairing."""
+    outcomes = {"H1": "stronger", "H0": "weaker", None: "undecided"}
+    saved = 0
+    print("\nSequential test results (confidence assumes even prior odds):")
+    for cpu_agent, verdicts in pairing_verdicts:
+        for agent in test_agents:
+            verdict = verdicts[agent.player]
+            saved += 2 * num_matches - verdict.games
+            llr = confidence = "-"  # no games were played
+            if verdict.llr is not None:
+                llr = "{:+.2f}".format(verdict.llr)
+                confidence = "{:.1f}%".format(
+                    100 * sprt_confidence(verdict.llr))
+            print("  {:<13} vs {:<13} {:<10} after {:>3} games "
+                  "(LLR {}, confidence {})".format(
+                      agent.name, cpu_agent.name, outcomes[verdict.decision],
+                      verdict.games, llr, confidence))
+    print("Early stopping skipped {} of {} scheduled games.".format(
+        saved, 2 * num_matches * len(pairing_verdicts) * len(test_agents)))
+
+
 def main():
+    # optional subsystems are imported here rather than at the top of the
+    # module, so that worker processes importing AGENTS start quickly
+    from isolation.feed import MoveFeed
+    from isolation.openings import load_suite
+    from isolation.profiling import Profiler
+    from isolation.results import ResultsStore
+    from isolation.ttable import DiskTranspositionTable
+
+    cache = None
+    if EVAL_CACHE:
+        cache = DiskTranspositionTable(EVAL_CACHE, EVAL_CACHE_ENTRIES)
 
     # Define two agents to compare -- these agents will play from the same
     # starting position against the same adversaries in the tournament
-    test_agents = [
-        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score_2), "AB_Custom_2"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3")
-    ]
+    test_agents = [make_agent(name, SANDBOX_AGENTS, cache) for name in
+                   ["AB_Improved", "AB_Custom", "AB_Custom_2", "AB_Custom_3"]]
 
     # Define a collection of agents to compete against the test agents
-    cpu_agents = [
-        Agent(RandomPlayer(), "Random"),
-        Agent(MinimaxPlayer(score_fn=open_move_score), "MM_Open"),
-        Agent(MinimaxPlayer(score_fn=center_score), "MM_Center"),
-        Agent(MinimaxPlayer(score_fn=improved_score), "MM_Improved"),
-        Agent(AlphaBetaPlayer(score_fn=open_move_score), "AB_Open"),
-        Agent(AlphaBetaPlayer(score_fn=center_score), "AB_Center"),
-        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")
-    ]
+    cpu_agents = [make_agent(name, SANDBOX_AGENTS, cache) for name in
+                  ["Random", "MM_Open", "MM_Center", "MM_Improved",
+                   "AB_Open", "AB_Center", "AB_Improved"]]
 
     print(DESCRIPTION)
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    feed = MoveFeed(FEED_PATH) if FEED_PATH else None
+    results = ResultsStore(RESULTS_DB) if RESULTS_DB else None
+    openings = load_suite(OPENING_SUITE) if OPENING_SUITE else None
+    profiler = None
+    if PROFILE_PATH:
+        profiler = Profiler(PROFILE_SAMPLE_INTERVAL, PROFILE_TIMERS)
+        for agent in test_agents + cpu_agents:
+            profiler.name(agent.player, agent.name)
+    try:
+        if profiler is None:
+            play_matches(cpu_agents, test_agents, NUM_MATCHES,
+                         SEQUENTIAL_TEST, feed, results=results,
+                         openings=openings)
+        else:
+            with profiler:
+                play_matches(cpu_agents, test_agents, NUM_MATCHES,
+                             SEQUENTIAL_TEST, feed, profiler, results,
+                             openings)
+            print("\n" + profiler.report())
+            profiler.write_collapsed(PROFILE_PATH)
+            if PROFILE_SAMPLE_INTERVAL:
+                profiler.write_collapsed(PROFILE_PATH + ".samples",
+                                         samples=True)
+    finally:
+        if feed is not None:
+            feed.close()
+        if results is not None:
+            results.close()
+        if cache is not None:
+            cache.close()
 
 
 if __name__ == "__main__":
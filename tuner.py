@@ -0,0 +1,319 @@
+"""Tune the weights of a parameterized heuristic by self-play with SPSA.
+
+A parameterized heuristic is a score function that takes its weights as a
+keyword argument, `score(game, player, weights=(...))`, such as
+`linear_score` below, a weighted sum of the mobility and area features
+used by the hand-written heuristics in game_agent.py.
+
+Every iteration of simultaneous perturbation stochastic approximation
+(Spall, 1998) perturbs all weights at once by +/- c_k in random
+directions, plays batches of paired games (the same random opening twice
+with the colors swapped) between alpha-beta agents using the two
+perturbed weight vectors, and moves the weights along the perturbation in
+proportion to the score difference. The games run concurrently on a
+process pool, and the agents search a fixed number of nodes per move, so
+the result does not depend on how loaded the machine is.
+
+After every iteration the state is written to a JSON checkpoint, and a
+tuning run started with an existing checkpoint resumes where it stopped,
+using the gain settings stored in it.
+
+Example:
+
+    python tuner.py --iterations 200 --pairs 16 --checkpoint spsa.json
+
+The tuned heuristic can be entered like any other score function, e.g.,
+`partial(AlphaBetaPlayer, score_fn=partial(linear_score, weights=...))`.
+"""
+import importlib
+import json
+import multiprocessing
+import os
+import random
+
+from collections import namedtuple, OrderedDict
+from functools import partial
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer
+
+# The features combined by linear_score, each computed from the point of
+# view of `player` with `opponent` the other player
+FEATURES = OrderedDict([
+    ("own_moves", lambda game, player, opponent:
+        len(game.get_legal_moves(player))),
+    ("opp_moves", lambda game, player, opponent:
+        len(game.get_legal_moves(opponent))),
+    ("area", lambda game, player, opponent:
+        game.get_reachable_area(player) - game.get_reachable_area(opponent)),
+    ("reach", lambda game, player, opponent:
+        game.get_second_order_mobility(player) -
+        game.get_second_order_mobility(opponent)),
+])
+
+# The "improved" score of sample_players.py
+DEFAULT_WEIGHTS = (1., -1., 0., 0.)
+
+# Gain sequences a_k = a / (k + 1 + A) ** alpha and c_k = c / (k + 1) **
+# gamma, with Spall's recommended exponents
+Settings = namedtuple("Settings", ["a", "c", "A", "alpha", "gamma"])
+
+DEFAULT_SETTINGS = Settings(a=1., c=0.5, A=10., alpha=0.602, gamma=0.101)
+
+# Two games from the same opening between agents scoring positions with
+# `score` (a "module:function" name) and weights `plus` and `minus`
+PairJob = namedtuple("PairJob", ["score", "plus", "minus", "opening",
+                                 "node_limit", "seed", "width", "height"])
+
+
+def linear_score(game, player, weights=DEFAULT_WEIGHTS):
+    """Calculate the heuristic value of a game state from the point of view
+    of the given player as the weighted sum of the FEATURES.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    player : object
+        A player instance in the current game.
+
+    weights : sequence<float> (optional)
+        One weight per feature, in the order of FEATURES.
+
+    Returns
+    -------
+    float
+        The heuristic value of the current game state to the specified player.
+    """
+    if game.is_loser(player):
+        return float("-inf")
+
+    if game.is_winner(player):
+        return float("inf")
+
+    opponent = game.get_opponent(player)
+    return float(sum(weight * feature(game, player, opponent)
+                     for weight, feature in zip(weights, FEATURES.values())
+                     if weight))
+
+
+def load_score(spec):
+    """Return the function named by "module:function"."""
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def random_opening(width, height, rng, plies=2):
+    """Return a list of `plies` random legal opening moves."""
+    game = Board("player_1", "player_2", width=width, height=height)
+    opening = []
+    for _ in range(plies):
+        move = rng.choice(sorted(game.get_legal_moves()))
+        game.apply_move(move)
+        opening.append(move)
+    return opening
+
+
+def play_pair(job):
+    """Play the two games of a PairJob and return the score of the `plus`
+    weights: +1 for winning both, 0 for a split and -1 for losing both.
+    """
+    score = load_score(job.score)
+    result = 0
+    for first in range(2):
+        plus = AlphaBetaPlayer(node_limit=job.node_limit,
+                               score_fn=partial(score, weights=job.plus))
+        minus = AlphaBetaPlayer(node_limit=job.node_limit,
+                                score_fn=partial(score, weights=job.minus))
+        players = (plus, minus) if first == 0 else (minus, plus)
+        game = Board(players[0], players[1], job.width, job.height)
+        for move in job.opening:
+            game.apply_move(tuple(move))
+        # the legal move order is shuffled with the global generator
+        random.seed(job.seed + first)
+        winner, _, _ = game.play(time_limit=None)
+        result += 1 if winner is plus else -1
+    return result / 2.
+
+
+def gains(iteration, settings):
+    """Return the step size a_k and perturbation size c_k of an iteration."""
+    a_k = settings.a / (iteration + 1 + settings.A) ** settings.alpha
+    c_k = settings.c / (iteration + 1) ** settings.gamma
+    return a_k, c_k
+
+
+def spsa_step(weights, iteration, settings, result_fn, rng):
+    """Run one SPSA iteration and return (new weights, match result).
+
+    `result_fn(plus, minus)` returns the mean result in [-1, 1] of the
+    weights `plus` against `minus`.
+    """
+    a_k, c_k = gains(iteration, settings)
+    delta = [rng.choice((-1, 1)) for _ in weights]
+    plus = tuple(w + c_k * d for w, d in zip(weights, delta))
+    minus = tuple(w - c_k * d for w, d in zip(weights, delta))
+    result = result_fn(plus, minus)
+    # gradient estimate result / (2 c_k delta_i), with 1 / delta_i = delta_i
+    new = tuple(w + a_k * result * d / (2 * c_k)
+                for w, d in zip(weights, delta))
+    return new, result
+
+
+def load_checkpoint(path):
+    """Read a tuning checkpoint, or return None if there is none."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    """Write the checkpoint atomically, so an interrupted write never
+    leaves a corrupt file behind.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+def tune(score="tuner:linear_score", weights=DEFAULT_WEIGHTS, iterations=100,
+         pairs=None, checkpoint=None, processes=None, node_limit=1000,
+         seed=0, settings=DEFAULT_SETTINGS, width=7, height=7,
+         match=play_pair, verbose=True):
+    """Optimize the weights of a parameterized heuristic with SPSA.
+
+    Parameters
+    ----------
+    score : str
+        The "module:function" name of the heuristic, importable in the
+        worker processes.
+
+    weights : sequence<float>
+        The starting weights, ignored when resuming from `checkpoint`.
+
+    iterations : int
+        The total number of iterations, including those already run.
+
+    pairs : int (optional)
+        Paired games per iteration (default: 8, or one per worker process
+        if there are more).
+
+    checkpoint : str (optional)
+        A JSON file to resume from and to save the state to after every
+        iteration.
+
+    processes : int (optional)
+        Worker processes (default: one per core); 0 plays every game in
+        this process.
+
+    node_limit : int
+        The number of nodes each agent searches per move.
+
+    match : callable
+        Plays one PairJob and returns the result of the `plus` weights in
+        [-1, 1]; must be picklable when `processes` is not 0.
+
+    verbose : bool
+        Print the result and weights after every iteration.
+
+    Returns
+    -------
+    dict
+        The final state: "weights", "iteration", "settings" and the
+        "history" of every iteration's result and weights.
+    """
+    state = load_checkpoint(checkpoint)
+    if state is None:
+        state = {"score": score, "weights": list(weights), "iteration": 0,
+                 "seed": seed, "settings": settings._asdict(), "history": []}
+    elif state["score"] != score:
+        raise ValueError("Checkpoint {!r} tunes {}, not {}.".format(
+            checkpoint, state["score"], score))
+    settings = Settings(**state["settings"])
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    pairs = pairs or max(8, processes)
+    pool = multiprocessing.Pool(processes) if processes else None
+    mapper = pool.map if pool is not None else map
+    try:
+        while state["iteration"] < iterations:
+            k = state["iteration"]
+            # each iteration draws from its own generator, so a resumed run
+            # plays exactly the games the uninterrupted run would have
+            rng = random.Random("{}:{}".format(state["seed"], k))
+
+            def result_fn(plus, minus):
+                jobs = [PairJob(score, plus, minus,
+                                random_opening(width, height, rng),
+                                node_limit, rng.getrandbits(32), width,
+                                height) for _ in range(pairs)]
+                results = list(mapper(match, jobs))
+                return sum(results) / len(results)
+
+            new, result = spsa_step(tuple(state["weights"]), k, settings,
+                                    result_fn, rng)
+            state["weights"] = list(new)
+            state["iteration"] = k + 1
+            state["history"].append({"iteration": k + 1, "result": result,
+                                     "weights": list(new)})
+            if checkpoint:
+                save_checkpoint(checkpoint, state)
+            if verbose:
+                print("{:>5} {:+6.2f}  {}".format(k + 1, result, "  ".join(
+                    "{:+8.3f}".format(w) for w in new)))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return state
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--score", default="tuner:linear_score",
+                        help="parameterized heuristic as module:function")
+    parser.add_argument("--weights", type=float, nargs="+",
+                        default=list(DEFAULT_WEIGHTS),
+                        help="starting weights (default: improved score)")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--pairs", type=int, default=None,
+                        help="paired games per iteration (default: 8 or "
+                             "one per process)")
+    parser.add_argument("--checkpoint", default=None,
+                        help="JSON file to resume from and save to")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--nodes", type=int, default=1000,
+                        help="nodes searched per move")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-a", type=float, default=DEFAULT_SETTINGS.a,
+                        help="step size scale")
+    parser.add_argument("-c", type=float, default=DEFAULT_SETTINGS.c,
+                        help="perturbation size scale")
+    parser.add_argument("-A", type=float, default=DEFAULT_SETTINGS.A,
+                        help="step size stability constant")
+    args = parser.parse_args()
+
+    if args.score == "tuner:linear_score":
+        print("features: " + ", ".join(FEATURES))
+    settings = DEFAULT_SETTINGS._replace(a=args.a, c=args.c, A=args.A)
+    state = tune(args.score, args.weights, args.iterations, args.pairs,
+                 args.checkpoint, args.processes, args.nodes, args.seed,
+                 settings)
+    recent = state["history"][-10:]
+    print("\ntuned weights: {}".format(tuple(round(w, 4)
+                                             for w in state["weights"])))
+    if recent:
+        print("mean result of the last {} iterations: {:+.3f}".format(
+            len(recent), sum(h["result"] for h in recent) / len(recent)))
+
+
+if __name__ == "__main__":
+    main()